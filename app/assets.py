@@ -0,0 +1,133 @@
+"""
+Content-hashed static asset URLs for Ace Citizenship.
+
+Templates link static files through the `asset_url()` global, which
+puts a hash of the file's bytes into its name:
+
+    asset_url("css/custom.css")  ->  /static/css/custom.3f2a9c1b04de.css
+
+The static mount strips the hash again, and only a URL whose hash
+matches the current file is served as `immutable` for a year. Any other
+URL (a plain path, or a stale hash from before a deploy) is served with
+`no-cache`, so browsers revalidate it by ETag. A deploy therefore
+changes every edited asset's URL, and nothing stale can outlive it.
+
+The manifest is hashed at startup. Entries are keyed by (mtime, size)
+so an edited file is rehashed on its next use without a restart.
+"""
+
+import hashlib
+import re
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from starlette.responses import Response
+from starlette.types import Scope
+
+from app.compression import PRECOMPRESSED_SUFFIXES, PrecompressedStaticFiles
+
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Hex digits of the sha256 kept in URLs
+FINGERPRINT_LENGTH = 12
+
+# name.<hash>.ext, as produced by asset_url()
+FINGERPRINTED_NAME = re.compile(
+    rf"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{FINGERPRINT_LENGTH}}})(?P<suffix>\.[^./]+)$"
+)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class AssetEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    fingerprint: str
+
+
+class AssetManifest:
+    """Fingerprints of the files under app/static, keyed by relative path."""
+
+    def __init__(self, directory: Path = STATIC_DIR):
+        self.directory = directory
+        self._entries: dict[str, AssetEntry] = {}
+        self._lock = threading.Lock()
+
+    def build(self) -> int:
+        """Hash every servable file; returns how many were hashed."""
+        sibling_suffixes = tuple(PRECOMPRESSED_SUFFIXES.values())
+        count = 0
+        for path in self.directory.rglob("*"):
+            if path.is_file() and not path.name.endswith(sibling_suffixes):
+                self.fingerprint(path.relative_to(self.directory).as_posix())
+                count += 1
+        return count
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        """Current fingerprint of a static file, or None if it doesn't exist."""
+        full_path = self.directory / path
+        try:
+            stat = full_path.stat()
+        except OSError:
+            return None
+
+        entry = self._entries.get(path)
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry.fingerprint
+
+        digest = hashlib.sha256(full_path.read_bytes()).hexdigest()[:FINGERPRINT_LENGTH]
+        with self._lock:
+            self._entries[path] = AssetEntry(stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+
+asset_manifest = AssetManifest()
+
+
+def asset_url(path: str) -> str:
+    """Fingerprinted /static URL for a path relative to app/static.
+
+    Unknown files get their plain URL, which is served but not cached
+    long-term. So do names the static mount couldn't split the hash back
+    out of (no suffix, or a dotfile).
+    """
+    path = path.lstrip("/")
+    fingerprint = asset_manifest.fingerprint(path)
+    if fingerprint is None:
+        return f"/static/{path}"
+    directory, slash, name = path.rpartition("/")
+    stem, dot, suffix = name.rpartition(".")
+    fingerprinted = f"{directory}{slash}{stem}.{fingerprint}.{suffix}"
+    if not dot or split_fingerprint(fingerprinted) != (path, fingerprint):
+        return f"/static/{path}"
+    return f"/static/{fingerprinted}"
+
+
+def split_fingerprint(path: str) -> tuple[str, Optional[str]]:
+    """Split a requested static path into (file path, fingerprint or None)."""
+    directory, slash, name = path.rpartition("/")
+    match = FINGERPRINTED_NAME.match(name)
+    if match is None:
+        return path, None
+    return f"{directory}{slash}{match['stem']}{match['suffix']}", match["hash"]
+
+
+class AssetStaticFiles(PrecompressedStaticFiles):
+    """Static mount that resolves fingerprinted URLs and sets their caching.
+
+    A URL whose fingerprint matches the file is immutable; everything else
+    (plain paths, fingerprints from an older deploy) must revalidate.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        file_path, fingerprint = split_fingerprint(path)
+        response = await super().get_response(file_path, scope)
+        if response.status_code in (200, 304):
+            current = asset_manifest.fingerprint(file_path) if fingerprint else None
+            response.headers["Cache-Control"] = (
+                IMMUTABLE_CACHE_CONTROL if current is not None and fingerprint == current
+                else REVALIDATE_CACHE_CONTROL
+            )
+        return response
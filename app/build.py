@@ -0,0 +1,167 @@
+"""
+Build step for Ace Citizenship static assets.
+
+Run once per deploy (railway.toml's buildCommand) or locally:
+
+    python -m app.build
+
+Steps, in order:
+
+1. Resize every PNG/JPG under app/static/images, subdirectories
+   included, into AVIF and WebP variants at IMAGE_WIDTHS, and record
+   them in the manifest that the `picture()` template global reads
+   (app/images.py).
+2. Write `.br` and `.gz` siblings next to every compressible file under
+   app/static, which PrecompressedStaticFiles serves in place of the
+   original.
+
+Outputs newer than their source are left alone, so reruns are cheap.
+"""
+
+import json
+import os
+import time
+from mimetypes import guess_type
+from pathlib import Path
+
+from app.compression import PRECOMPRESSED_SUFFIXES, available_encodings, compress, is_compressible
+from app.images import IMAGE_MANIFEST, STATIC_DIR, VARIANT_FORMATS, VARIANTS_DIR, variant_path
+
+try:
+    from PIL import Image, features
+except ImportError:  # Optional: no image variants without it
+    Image = None
+
+# Build once, serve many times: use the slowest, smallest settings
+STATIC_LEVELS = {"br": 11, "gzip": 9}
+
+# Variant widths in pixels (capped at, and topped up with, the original's)
+IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+
+# Raster originals that get variants
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg")
+
+# Encoder settings per format: visually lossless for photos and artwork
+VARIANT_OPTIONS = {
+    "avif": {"quality": 60},
+    "webp": {"quality": 80, "method": 6},
+}
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write-then-rename so a running server never sees half a file."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def is_fresh(output: Path, source_mtime: float) -> bool:
+    """Whether output exists and is at least as new as its source."""
+    return output.exists() and output.stat().st_mtime >= source_mtime
+
+
+def variant_widths(width: int) -> list[int]:
+    """Widths to produce for an image `width` pixels wide."""
+    widths = [candidate for candidate in IMAGE_WIDTHS if candidate < width]
+    if len(widths) < len(IMAGE_WIDTHS):
+        widths.append(width)
+    return widths
+
+
+def build_image_variants() -> tuple[int, int]:
+    """Write missing or stale image variants and the manifest; returns (written, up to date)."""
+    if Image is None:
+        print("Pillow not installed; skipping image variants")
+        return 0, 0
+
+    formats = [fmt for fmt in VARIANT_FORMATS if features.check(fmt)]
+    VARIANTS_DIR.mkdir(exist_ok=True)
+    manifest = {}
+    written = fresh = 0
+
+    for path in sorted((STATIC_DIR / "images").rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in IMAGE_SUFFIXES or VARIANTS_DIR in path.parents:
+            continue
+        static_path = path.relative_to(STATIC_DIR).as_posix()
+        source_mtime = path.stat().st_mtime
+
+        with Image.open(path) as original:
+            entry = {"width": original.width, "height": original.height, "formats": {}}
+            image = None  # Decoded only if a variant needs writing
+            for fmt in formats:
+                widths = variant_widths(original.width)
+                for width in widths:
+                    output = STATIC_DIR / variant_path(static_path, width, fmt)
+                    if is_fresh(output, source_mtime):
+                        fresh += 1
+                        continue
+                    output.parent.mkdir(parents=True, exist_ok=True)
+                    if image is None:
+                        image = original.convert("RGBA" if "A" in original.getbands() else "RGB")
+                    height = round(image.height * width / image.width)
+                    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                    tmp = output.with_name(output.name + ".tmp")
+                    resized.save(tmp, format=fmt.upper(), **VARIANT_OPTIONS[fmt])
+                    os.replace(tmp, output)
+                    written += 1
+                entry["formats"][fmt] = widths
+
+        manifest[static_path] = entry
+
+    data = json.dumps(manifest, indent=2, sort_keys=True).encode()
+    # Leave an unchanged manifest's mtime alone so its siblings stay fresh
+    if not IMAGE_MANIFEST.exists() or IMAGE_MANIFEST.read_bytes() != data:
+        write_atomic(IMAGE_MANIFEST, data)
+    return written, fresh
+
+
+def static_sources() -> list[Path]:
+    """Compressible files under app/static (not the siblings themselves)."""
+    suffixes = tuple(PRECOMPRESSED_SUFFIXES.values())
+    return sorted(
+        path for path in STATIC_DIR.rglob("*")
+        if path.is_file()
+        and not path.name.endswith(suffixes)
+        and is_compressible(guess_type(path.name)[0] or "")
+    )
+
+
+def compress_static() -> tuple[int, int]:
+    """Write missing or stale siblings; returns (written, up to date)."""
+    encodings = [encoding for encoding in available_encodings() if encoding in PRECOMPRESSED_SUFFIXES]
+    written = fresh = 0
+
+    for path in static_sources():
+        source_mtime = path.stat().st_mtime
+        data = None
+        for encoding in encodings:
+            sibling = path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding])
+            if is_fresh(sibling, source_mtime):
+                fresh += 1
+                continue
+
+            if data is None:
+                data = path.read_bytes()
+            encoded = compress(data, encoding, STATIC_LEVELS[encoding])
+            if len(encoded) >= len(data):
+                # Not worth it; drop any stale copy so it can't be served
+                sibling.unlink(missing_ok=True)
+                continue
+
+            write_atomic(sibling, encoded)
+            written += 1
+
+    return written, fresh
+
+
+def main() -> None:
+    start = time.perf_counter()
+    written, fresh = build_image_variants()
+    print(f"Image variants: {written} written, {fresh} up to date")
+    written, fresh = compress_static()
+    print(f"Precompressed static files: {written} written, {fresh} up to date")
+    print(f"Build finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Compression helpers for Ace Citizenship.
+
+Content-coding negotiation and encoders shared by prebuilt artifacts
+(sitemap, feed, llms-full.txt), the response compression middleware and
+the precompressed static file mount. gzip is always available; brotli
+and zstd are used when their optional packages are installed.
+"""
+
+import gzip
+import os
+import stat
+import zlib
+from mimetypes import guess_type
+from typing import Iterable, Optional
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: no br without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: no zstd without it
+    zstandard = None
+
+# Preference order when a client accepts several codings equally
+PREFERRED_ENCODINGS = ("br", "zstd", "gzip")
+
+# Smallest body worth compressing on the fly, in bytes
+COMPRESSION_MIN_SIZE = int(os.getenv("ACE_COMPRESSION_MIN_SIZE", "500"))
+
+# Per-request levels: each stays under a millisecond for a typical 25 KB
+# page (prebuilt artifacts and static siblings use higher ones)
+RESPONSE_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+
+# Media types worth compressing (images and fonts are already compressed)
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/rss+xml",
+    "application/atom+xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+# File suffix of each precompressed static sibling
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def gzip_compress(data: bytes, level: int = 6) -> bytes:
+    """gzip-encode data (mtime fixed at 0 so output is deterministic)."""
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_compress(data: bytes, quality: int = 5) -> bytes:
+    """brotli-encode data; requires the optional brotli package."""
+    return brotli.compress(data, quality=quality)
+
+
+def zstd_compress(data: bytes, level: int = 3) -> bytes:
+    """zstd-encode data; requires the optional zstandard package."""
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """Encode data with the named content coding at the given level."""
+    if encoding == "br":
+        return brotli_compress(data, level)
+    if encoding == "zstd":
+        return zstd_compress(data, level)
+    return gzip_compress(data, level)
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Content codings this process can produce, in preference order."""
+    missing = set()
+    if brotli is None:
+        missing.add("br")
+    if zstandard is None:
+        missing.add("zstd")
+    return tuple(encoding for encoding in PREFERRED_ENCODINGS if encoding not in missing)
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q-value}."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Pick the best content coding for an Accept-Encoding header.
+
+    Returns None for identity (no header, or nothing acceptable). Ties
+    in q-value go to the earlier entry in `available`.
+    """
+    if not header:
+        return None
+
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(media_type: str) -> bool:
+    """Whether a Content-Type is worth compressing."""
+    return media_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def add_vary(headers: MutableHeaders, value: str) -> None:
+    """Append a field to Vary unless it's already listed."""
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = value
+    elif value.lower() not in (item.strip().lower() for item in vary.split(",")):
+        headers["Vary"] = f"{vary}, {value}"
+
+
+class StreamCompressor:
+    """Incremental encoder for responses that arrive in several messages."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._encoder = brotli.Compressor(quality=RESPONSE_LEVELS["br"])
+            self._flush = self._encoder.finish
+        elif encoding == "zstd":
+            self._encoder = zstandard.ZstdCompressor(level=RESPONSE_LEVELS["zstd"]).compressobj()
+            self._flush = self._encoder.flush
+        else:
+            # wbits 31: zlib stream with a gzip header and trailer
+            self._encoder = zlib.compressobj(RESPONSE_LEVELS["gzip"], zlib.DEFLATED, 31)
+            self._flush = self._encoder.flush
+        self._encoding = encoding
+
+    def compress(self, data: bytes) -> bytes:
+        if self._encoding == "br":
+            return self._encoder.process(data)
+        return self._encoder.compress(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+
+class CompressionMiddleware:
+    """Compress dynamic responses with the best coding the client accepts.
+
+    Responses that are already encoded, not a compressible media type,
+    smaller than `minimum_size`, or under an excluded path prefix pass
+    through untouched. Excluded paths default to /admin: its pages mix
+    CSRF tokens with reflected input, the recipe for BREACH.
+
+    Single-message bodies (templates, JSON) are compressed in one shot so
+    Content-Length stays accurate; streamed bodies are encoded chunk by
+    chunk. A strong ETag is weakened on the way, since the encoded bytes
+    differ from the ones it was computed over.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        exclude_paths: tuple[str, ...] = ("/admin",),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.exclude_paths = exclude_paths
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] < 200
+                    or message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type", ""))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start until the first body chunk shows the size
+                    start = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                add_vary(headers, "Accept-Encoding")
+                if encoding is None or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+
+                if not more_body:
+                    body = compress(body, encoding, RESPONSE_LEVELS[encoding])
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                del headers["Content-Length"]
+                compressor = StreamCompressor(encoding)
+                await send(start)
+                start = None
+
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves `.br` / `.gz` siblings built by `python -m app.build`.
+
+    When a client accepts a coding and the sibling exists, the sibling is
+    sent with the original's media type, so static compression costs a
+    stat() per request instead of CPU. Files without siblings are served
+    as usual (and compressed by CompressionMiddleware if worthwhile).
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        siblings = {}
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+            try:
+                sibling_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            # A sibling older than its source is stale; ignore it
+            if stat.S_ISREG(sibling_stat.st_mode) and sibling_stat.st_mtime >= stat_result.st_mtime:
+                siblings[encoding] = sibling_stat
+
+        if not siblings:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        encoding = choose_encoding(request_headers.get("accept-encoding"), siblings)
+        if encoding is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        else:
+            # The sibling's own stat gives it a distinct ETag and length
+            response = FileResponse(
+                f"{full_path}{PRECOMPRESSED_SUFFIXES[encoding]}",
+                status_code=status_code,
+                stat_result=siblings[encoding],
+                media_type=guess_type(str(full_path))[0] or "text/plain",
+                headers={"Content-Encoding": encoding},
+            )
+        add_vary(response.headers, "Accept-Encoding")
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
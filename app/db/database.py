@@ -2,11 +2,17 @@
 SQLite database setup for Ace Citizenship blog.
 """
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Callable, TypeVar
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateColumn
 
 # Database path - configurable via environment variable
 DB_PATH = os.getenv("ACE_DB_PATH", str(Path(__file__).parent.parent.parent / "data" / "ace.db"))
@@ -17,22 +23,68 @@ Path(DB_PATH).parent.mkdir(parents=True, exist_ok=True)
 # SQLite URL
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+# Per-connection PRAGMA profiles, selected with ACE_DB_PROFILE.
+# "performance" uses WAL so readers never wait on the admin writer (and the
+# writer doesn't wait on readers); synchronous=NORMAL is durable in WAL mode
+# except for the last transactions on power loss. "safe" keeps SQLite's
+# rollback journal and full fsync, adding only the busy timeout.
+SQLITE_PROFILES = {
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,  # Read pages straight from the OS page cache
+        "cache_size": -32 * 1024,  # Negative = KiB per connection (32 MiB)
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms to wait for a lock before SQLITE_BUSY
+    },
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+}
+DB_PROFILE = os.getenv("ACE_DB_PROFILE", "performance")
+if DB_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(f"ACE_DB_PROFILE must be one of {sorted(SQLITE_PROFILES)}, got {DB_PROFILE!r}")
+
+# Connection pool. Sync routes and dependencies run in Starlette's thread
+# pool (40 threads), so each uvicorn worker keeps a few connections open
+# and lets bursts overflow rather than queue.
+DB_POOL_SIZE = int(os.getenv("ACE_DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("ACE_DB_MAX_OVERFLOW", "16"))
+DB_POOL_TIMEOUT = float(os.getenv("ACE_DB_POOL_TIMEOUT", "10"))
+
 # Create engine
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    connect_args={"check_same_thread": False},  # Needed for SQLite
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
 )
 
-# Enable foreign keys for SQLite
+# Enable foreign keys and apply the PRAGMA profile to each new connection
 @event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    for name, value in SQLITE_PROFILES[DB_PROFILE].items():
+        cursor.execute(f"PRAGMA {name}={value}")
     cursor.close()
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Blocking database work from async routes runs here rather than on the
+# event loop. Sized to the connection pool so queued calls wait for a
+# thread instead of a connection, and kept separate from the default
+# executor used by asyncio.to_thread (e.g. bot-verification DNS lookups).
+DB_THREADS = int(os.getenv("ACE_DB_THREADS", str(DB_POOL_SIZE)))
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="ace-db")
+
+T = TypeVar("T")
+
 # Base class for models
 Base = declarative_base()
 
@@ -46,7 +98,40 @@ def get_db():
         db.close()
 
 
+async def run_in_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking database call on the database thread pool.
+
+    A Session is only used by one call at a time, so passing the request's
+    session to successive calls on different threads is safe.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(func, *args, **kwargs))
+
+
 def init_db():
     """Initialize database tables."""
     from app.db import models  # noqa: F401 - Import models to register them
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+
+
+def upgrade_schema():
+    """Add model columns and indexes that are missing from existing tables.
+
+    create_all() only creates tables that don't exist yet (with their
+    indexes), so columns and indexes added to a model later are applied
+    here with ALTER TABLE ADD COLUMN and CREATE INDEX IF NOT EXISTS.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_spec = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_spec}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
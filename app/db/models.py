@@ -3,9 +3,21 @@ SQLAlchemy models for Ace Citizenship Blog.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, CheckConstraint, Index
+from sqlalchemy import (
+    Column, Integer, String, Text, DateTime, Boolean, CheckConstraint, Index, JSON, DDL,
+    event, column, false, table,
+)
 from app.db.database import Base
 
+WORDS_PER_MINUTE = 200
+
+
+def reading_time_minutes(word_count: int | None) -> int:
+    """Calculate reading time in minutes for a word count."""
+    if not word_count:
+        return 1
+    return max(1, round(word_count / WORDS_PER_MINUTE))
+
 
 class Post(Base):
     """
@@ -20,15 +32,25 @@ class Post(Base):
     excerpt = Column(Text)
     content_md = Column(Text, nullable=False)
     content_html = Column(Text)
+    # Derived from content at write time (see posts_service.set_post_content)
+    faq_items = Column(JSON)  # [{"question", "answer"}] for FAQPage schema
+    toc = Column(JSON)  # [{"level", "id", "title"}] heading outline
+    word_count = Column(Integer)
     featured_image = Column(String(500))
     seo_title = Column(String(200))
     seo_description = Column(String(500))
     status = Column(String(20), default='draft', nullable=False)
+    # Materialized visibility: published, or scheduled with scheduled_at passed.
+    # Kept in sync by the posts service and the publish scheduler.
+    is_live = Column(Boolean, default=False, server_default=false(), nullable=False)
     published_at = Column(DateTime)
     scheduled_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     file_path = Column(String(500))
+    # Content file stat at last sync; startup sync skips files that match
+    file_mtime_ns = Column(Integer)
+    file_size = Column(Integer)
     checksum = Column(String(64))
 
     __table_args__ = (
@@ -39,16 +61,71 @@ class Post(Base):
         Index('idx_posts_status', 'status'),
         Index('idx_posts_published_at', 'published_at'),
         Index('idx_posts_scheduled_at', 'scheduled_at'),
+        # Serves public listing order as an index range scan; slug and
+        # updated_at make it covering for the sitemap
+        Index(
+            'idx_posts_live_published',
+            is_live, published_at.desc(), id.desc(), slug, updated_at
+        ),
     )
 
     @property
     def reading_time(self) -> int:
-        """Calculate reading time in minutes (~200 words/min)."""
-        if not self.content_md:
-            return 1
-        word_count = len(self.content_md.split())
-        minutes = max(1, round(word_count / 200))
-        return minutes
+        """Reading time in minutes (~200 words/min) from the stored word count."""
+        return reading_time_minutes(self.word_count)
 
     def __repr__(self):
         return f"<Post {self.slug}>"
+
+
+class RenderCache(Base):
+    """
+    Rendered output of markdown content, keyed by content checksum.
+    Shared by every worker and kept across restarts and deploys.
+    """
+    __tablename__ = "render_cache"
+
+    checksum = Column(String(64), primary_key=True)  # SHA-256 of content_md
+    renderer_version = Column(Integer, primary_key=True)
+    content_html = Column(Text, nullable=False)
+    faq_items = Column(JSON)
+    toc = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<RenderCache {self.checksum[:12]} v{self.renderer_version}>"
+
+
+class ContentVersion(Base):
+    """
+    Single-row counter bumped by every post write.
+    Lets each worker notice writes made by the others (see content_version.py).
+    """
+    __tablename__ = "content_version"
+
+    id = Column(Integer, primary_key=True)  # Always 1
+    version = Column(Integer, nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<ContentVersion {self.version}>"
+
+
+# Full-text search index over post text (SQLite FTS5). Rows are keyed by
+# posts.id (as the FTS rowid) and maintained by the posts service.
+posts_fts = table(
+    "posts_fts",
+    column("rowid"),
+    column("title"),
+    column("excerpt"),
+    column("body"),
+)
+
+event.listen(
+    Base.metadata,
+    "after_create",
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts "
+        "USING fts5(title, excerpt, body, tokenize='porter unicode61')"
+    ),
+)
@@ -0,0 +1,113 @@
+"""
+Responsive image markup for Ace Citizenship templates.
+
+`python -m app.build` writes resized AVIF/WebP variants of the raster
+images under app/static/images, plus a manifest of what it produced.
+The `picture()` template global turns an image URL into a <picture>
+element whose sources list those variants by width, so browsers fetch
+the smallest modern file that fills the slot. Images without variants
+(external URLs, anything the build hasn't seen) fall back to a plain
+<img>. The manifest is read once at import, like the templates. All
+local URLs are fingerprinted through asset_url().
+"""
+
+import json
+import mimetypes
+from pathlib import Path, PurePosixPath
+from typing import Optional
+from urllib.parse import urlparse
+
+from markupsafe import Markup, escape
+
+from app.assets import asset_url
+
+STATIC_DIR = Path(__file__).parent / "static"
+VARIANTS_DIR = STATIC_DIR / "images" / "variants"
+IMAGE_MANIFEST = VARIANTS_DIR / "manifest.json"
+
+# Hosts whose /static/ URLs are ours (featured_image may be absolute)
+LOCAL_HOSTS = ("", "acecitizenship.app", "www.acecitizenship.app")
+
+# <source> order: browsers take the first type they support
+VARIANT_FORMATS = ("avif", "webp")
+
+# Older Pythons' tables lack AVIF, which StaticFiles would serve as text/plain
+mimetypes.add_type("image/avif", ".avif")
+
+
+def load_image_manifest() -> dict:
+    """Variants per static path, e.g. {"images/a.png": {"width": ..., "formats": ...}}."""
+    try:
+        return json.loads(IMAGE_MANIFEST.read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+image_manifest = load_image_manifest()
+
+
+def variant_path(static_path: str, width: int, fmt: str) -> str:
+    """Path under app/static of one resized variant.
+
+    Keeps the original's directory and suffix, so images/a/hero.jpg and
+    images/b/hero.png get separate variants.
+    """
+    source = PurePosixPath(static_path)
+    if source.parts[0] == "images":
+        source = source.relative_to("images")
+    return f"images/variants/{source}-{width}.{fmt}"
+
+
+def static_path_for(src: str) -> Optional[str]:
+    """Path under /static for a local image URL, or None for anything else."""
+    url = urlparse(src)
+    if url.netloc not in LOCAL_HOSTS or not url.path.startswith("/static/"):
+        return None
+    return url.path.removeprefix("/static/")
+
+
+def render_attrs(attrs: dict) -> str:
+    """Render HTML attributes; `class_` → class, True → bare, None → omitted."""
+    parts = []
+    for name, value in attrs.items():
+        if value is None or value is False:
+            continue
+        name = name.rstrip("_").replace("_", "-")
+        parts.append(f" {name}" if value is True else f' {name}="{escape(value)}"')
+    return "".join(parts)
+
+
+def picture(src: str, alt: str, sizes: str = "100vw", **attrs) -> Markup:
+    """<picture> with AVIF/WebP srcsets for src, falling back to a plain <img>.
+
+    Extra keyword arguments become <img> attributes (pass `class_` for
+    class). Images are lazy-loaded unless `loading` or `fetchpriority`
+    says otherwise, and get their intrinsic width/height when known so
+    the layout doesn't shift as they load.
+    """
+    if "fetchpriority" not in attrs:
+        attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+
+    static_path = static_path_for(src)
+    entry = image_manifest.get(static_path) if static_path else None
+    if entry is None:
+        src = asset_url(static_path) if static_path else src
+        return Markup(f"<img{render_attrs({'src': src, 'alt': alt, **attrs})}>")
+
+    attrs.setdefault("width", entry["width"])
+    attrs.setdefault("height", entry["height"])
+    sources = []
+    for fmt in VARIANT_FORMATS:
+        widths = entry["formats"].get(fmt)
+        if not widths:
+            continue
+        srcset = ", ".join(
+            f"{asset_url(variant_path(static_path, width, fmt))} {width}w" for width in widths
+        )
+        sources.append(
+            f"<source{render_attrs({'type': f'image/{fmt}', 'srcset': srcset, 'sizes': sizes})}>"
+        )
+
+    img = f"<img{render_attrs({'src': asset_url(static_path), 'alt': alt, **attrs})}>"
+    return Markup(f"<picture>{''.join(sources)}{img}</picture>")
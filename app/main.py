@@ -1,53 +1,102 @@
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI
 from fastapi.templating import Jinja2Templates
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from pathlib import Path
 
+from app.assets import AssetStaticFiles, asset_manifest
+from app.compression import CompressionMiddleware
 from app.routes import pages, blog, admin, auth, seo
 from app.routes.auth import limiter  # Import rate limiter
 from app.db.database import init_db, SessionLocal
 from app.services import posts as posts_service
+from app.services.artifacts import artifact_cache
+from app.services.content_watcher import CONTENT_WATCH_INTERVAL, watch_content_dir
+from app.services.scheduler import run_publish_scheduler
 from app.security.headers import SecurityHeadersMiddleware
+from app.security.kv_rate_limit import close_kv_client
 from app.security.logging import SecurityLogMiddleware
 from app.security.rate_limit import RateLimitMiddleware
 
 
-class HeadRequestMiddleware(BaseHTTPMiddleware):
+class HeadRequestMiddleware:
     """Handle HEAD requests by converting them to GET and stripping the body.
 
     FastAPI doesn't automatically support HEAD method for all routes.
     This middleware ensures HEAD requests work for SEO tools like Googlebot.
+    Headers (including Content-Length) are passed through untouched.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        if request.method == "HEAD":
-            request.scope["method"] = "GET"
-            response = await call_next(request)
-            response.body = b""
-            return response
-        return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_without_body(message: Message) -> None:
+            if message["type"] == "http.response.body":
+                message = {**message, "body": b""}
+            await send(message)
+
+        await self.app({**scope, "method": "GET"}, receive, send_without_body)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database and sync blog posts on startup."""
+    """Initialize database, sync blog posts and start background tasks."""
     # Initialize database tables
     init_db()
 
     # Sync markdown files to database
     db = SessionLocal()
     try:
-        synced = posts_service.sync_all_files(db)
-        print(f"Synced {len(synced)} blog posts from markdown files")
+        report = posts_service.sync_all_files(db)
+        print(f"Synced blog posts from markdown files: {report}")
+
+        backfilled = posts_service.backfill_derived_fields(db)
+        if backfilled:
+            print(f"Backfilled derived fields for {backfilled} blog posts")
+
+        pruned = posts_service.prune_render_cache(db)
+        if pruned:
+            print(f"Pruned {pruned} stale render cache entries")
+
+        promoted = posts_service.promote_due_posts(db)
+        if promoted:
+            print(f"Updated visibility for {promoted} blog posts")
     finally:
         db.close()
 
+    # Prebuild sitemap, feed and llms-full.txt so the first crawler doesn't wait
+    artifact_cache.warm()
+
+    # Hash static files up front so page renders don't
+    hashed = asset_manifest.build()
+    print(f"Fingerprinted {hashed} static assets")
+
+    # Flip scheduled posts live as they come due
+    tasks = [asyncio.create_task(run_publish_scheduler())]
+
+    # Pick up markdown edits without a restart
+    if CONTENT_WATCH_INTERVAL > 0:
+        tasks.append(asyncio.create_task(watch_content_dir()))
+
     yield
 
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Write out pending rate limit counts and release pooled connections
+    await close_kv_client()
+
+    posts_service.shutdown_render_pool()
+
 
 app = FastAPI(
     title="Ace Citizenship",
@@ -60,6 +109,7 @@ app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Middleware
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(HeadRequestMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(RateLimitMiddleware)
@@ -68,7 +118,7 @@ app.add_middleware(SecurityLogMiddleware, site_name="acecitizenship.app")
 # Static files
 app.mount(
     "/static",
-    StaticFiles(directory=Path(__file__).parent / "static"),
+    AssetStaticFiles(directory=Path(__file__).parent / "static"),
     name="static",
 )
 
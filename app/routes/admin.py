@@ -7,11 +7,16 @@ import os
 from datetime import datetime
 
 from fastapi import APIRouter, Request, Depends, HTTPException, Form
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import get_db, run_in_db
 from app.services import posts as posts_service
+from app.services.artifacts import artifact_cache
+from app.services.content_version import content_version
+from app.services.page_cache import page_cache
+from app.security.kv_rate_limit import auth_limiter_kv, form_limiter_kv
+from app.security.rate_limit import get_rate_limiter
 from app.routes.pages import templates
 from app.routes.auth import get_current_admin
 
@@ -28,6 +33,27 @@ def require_admin(request: Request):
         )
 
 
+@router.get("/stats")
+async def admin_stats(request: Request):
+    """Cache counters for operators."""
+    require_admin(request)
+    return JSONResponse({
+        "page_cache": page_cache.stats(),
+        "artifact_cache": artifact_cache.stats(),
+        "content_version": content_version.stats(),
+        "render_cache": {
+            **posts_service.render_cache_stats,
+            "renderer_version": posts_service.RENDERER_VERSION,
+            "workers": posts_service.RENDER_WORKERS,
+        },
+        "rate_limit": {
+            "middleware": get_rate_limiter().stats(),
+            "kv_form": form_limiter_kv.stats(),
+            "kv_auth": auth_limiter_kv.stats(),
+        },
+    })
+
+
 @router.get("/posts")
 async def admin_posts(
     request: Request,
@@ -35,7 +61,7 @@ async def admin_posts(
 ):
     """List all posts for admin."""
     require_admin(request)
-    posts = posts_service.list_posts(db)
+    posts = await run_in_db(posts_service.list_posts, db)
     return templates.TemplateResponse(
         "admin/posts.html",
         {"request": request, "posts": posts}
@@ -66,7 +92,7 @@ async def admin_create_post(
 ):
     """Create a new post."""
     require_admin(request)
-    existing = posts_service.get_post_by_slug(db, slug)
+    existing = await run_in_db(posts_service.get_post_by_slug, db, slug)
     if existing:
         return templates.TemplateResponse(
             "admin/edit.html",
@@ -77,8 +103,13 @@ async def admin_create_post(
             }
         )
 
-    post = posts_service.create_post(
-        db,
+    def create_post(**fields) -> int:
+        # create_post's last commit expires the post, so read its id here
+        # in the worker thread rather than lazily on the event loop
+        return posts_service.create_post(db, **fields).id
+
+    post_id = await run_in_db(
+        create_post,
         title=title,
         slug=slug,
         content_md=content_md,
@@ -88,7 +119,7 @@ async def admin_create_post(
         seo_description=seo_description or None
     )
 
-    return RedirectResponse(url=f"/admin/posts/{post.id}/edit", status_code=303)
+    return RedirectResponse(url=f"/admin/posts/{post_id}/edit", status_code=303)
 
 
 @router.get("/posts/{post_id}/edit")
@@ -99,7 +130,7 @@ async def admin_edit_post(
 ):
     """Edit post form."""
     require_admin(request)
-    post = posts_service.get_post(db, post_id)
+    post = await run_in_db(posts_service.get_post, db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -124,13 +155,13 @@ async def admin_update_post(
 ):
     """Update a post."""
     require_admin(request)
-    post = posts_service.get_post(db, post_id)
+    post = await run_in_db(posts_service.get_post, db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
     # Check slug uniqueness if changed
     if slug != post.slug:
-        existing = posts_service.get_post_by_slug(db, slug)
+        existing = await run_in_db(posts_service.get_post_by_slug, db, slug)
         if existing:
             return templates.TemplateResponse(
                 "admin/edit.html",
@@ -141,7 +172,8 @@ async def admin_update_post(
                 }
             )
 
-    posts_service.update_post(
+    await run_in_db(
+        posts_service.update_post,
         db,
         post,
         title=title,
@@ -152,6 +184,8 @@ async def admin_update_post(
         seo_title=seo_title or None,
         seo_description=seo_description or None
     )
+    # The final commit expired the post; reload it off the event loop
+    await run_in_db(db.refresh, post)
 
     return templates.TemplateResponse(
         "admin/edit.html",
@@ -167,11 +201,11 @@ async def admin_publish_post(
 ):
     """Publish a post."""
     require_admin(request)
-    post = posts_service.get_post(db, post_id)
+    post = await run_in_db(posts_service.get_post, db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    posts_service.publish_post(db, post)
+    await run_in_db(posts_service.publish_post, db, post)
     return RedirectResponse(url=f"/admin/posts/{post_id}/edit", status_code=303)
 
 
@@ -183,11 +217,11 @@ async def admin_unpublish_post(
 ):
     """Unpublish a post."""
     require_admin(request)
-    post = posts_service.get_post(db, post_id)
+    post = await run_in_db(posts_service.get_post, db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    posts_service.unpublish_post(db, post)
+    await run_in_db(posts_service.unpublish_post, db, post)
     return RedirectResponse(url=f"/admin/posts/{post_id}/edit", status_code=303)
 
 
@@ -200,7 +234,7 @@ async def admin_schedule_post(
 ):
     """Schedule a post for future publication."""
     require_admin(request)
-    post = posts_service.get_post(db, post_id)
+    post = await run_in_db(posts_service.get_post, db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -209,7 +243,7 @@ async def admin_schedule_post(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
 
-    posts_service.schedule_post(db, post, schedule_time)
+    await run_in_db(posts_service.schedule_post, db, post, schedule_time)
     return RedirectResponse(url=f"/admin/posts/{post_id}/edit", status_code=303)
 
 
@@ -221,9 +255,9 @@ async def admin_delete_post(
 ):
     """Delete a post."""
     require_admin(request)
-    post = posts_service.get_post(db, post_id)
+    post = await run_in_db(posts_service.get_post, db, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    posts_service.delete_post(db, post)
+    await run_in_db(posts_service.delete_post, db, post)
     return RedirectResponse(url="/admin/posts", status_code=303)
@@ -5,16 +5,26 @@ Public blog routes for Ace Citizenship.
 from typing import Optional
 
 from fastapi import APIRouter, Request, Depends, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.db.database import SessionLocal, get_db, run_in_db
 from app.services import posts as posts_service
+from app.services.artifacts import Artifact, artifact_cache, artifact_response, build_artifact, get_artifact
+from app.services.page_cache import page_cache
 from app.routes.pages import templates
 
 router = APIRouter(prefix="/blog", tags=["blog"])
 
 POSTS_PER_PAGE = 12
+PAGE_CACHE_CONTROL = "public, max-age=300"
+
+
+def cached_page_response(body: bytes) -> HTMLResponse:
+    """Build a response from a rendered page body."""
+    response = HTMLResponse(content=body)
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    return response
 
 
 @router.get("")
@@ -28,14 +38,27 @@ async def blog_index(
     if page < 1:
         page = 1
 
+    # Keyed on the parsed parameters only: templates build absolute URLs
+    # from the canonical site URL, never the request's Host. Searches
+    # aren't cached, so arbitrary queries can't evict the listing pages.
+    search = q.strip() if q else ""
+    cache_key = None if search else ("blog_index", page)
+    if cache_key is not None:
+        body = page_cache.get(cache_key)
+        if body is not None:
+            return cached_page_response(body)
+    generation = page_cache.generation
+
     offset = (page - 1) * POSTS_PER_PAGE
 
-    if q and q.strip():
-        posts, total = posts_service.search_published_posts(
-            db, q.strip(), limit=POSTS_PER_PAGE, offset=offset
+    if search:
+        posts, total = await run_in_db(
+            posts_service.search_published_posts,
+            db, search, limit=POSTS_PER_PAGE, offset=offset
         )
     else:
-        posts, total = posts_service.get_published_posts(
+        posts, total = await run_in_db(
+            posts_service.get_published_summaries,
             db, limit=POSTS_PER_PAGE, offset=offset
         )
 
@@ -53,14 +76,26 @@ async def blog_index(
             "search_query": q or ""
         }
     )
-    response.headers["Cache-Control"] = "public, max-age=300"
+    # Pages past the end are all the same empty page; don't store each one
+    if cache_key is not None and page <= max(total_pages, 1):
+        page_cache.set(
+            cache_key,
+            response.body,
+            generation,
+            expires_at=await run_in_db(posts_service.get_next_scheduled_at, db),
+        )
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
     return response
 
 
-@router.get("/feed.xml")
-async def blog_rss_feed(db: Session = Depends(get_db)):
-    """RSS 2.0 feed of published blog posts."""
-    posts, _ = posts_service.get_published_posts(db, limit=20, offset=0)
+def build_feed() -> Artifact:
+    """Build the RSS feed from the 20 newest published posts."""
+    db = SessionLocal()
+    try:
+        posts = posts_service.list_published_summaries(db, limit=20, offset=0)
+        _, last_modified = posts_service.get_published_state(db)
+    finally:
+        db.close()
 
     items = []
     for post in posts:
@@ -86,25 +121,39 @@ async def blog_rss_feed(db: Session = Depends(get_db)):
     </channel>
 </rss>"""
 
-    response = Response(content=rss.strip(), media_type="application/rss+xml")
-    response.headers["Cache-Control"] = "public, max-age=3600"
-    return response
+    return build_artifact(rss.strip().encode(), "application/rss+xml", last_modified)
+
+
+artifact_cache.register("feed", build_feed)
+
+
+@router.get("/feed.xml")
+async def blog_rss_feed(request: Request):
+    """RSS 2.0 feed of published blog posts."""
+    artifact = await get_artifact("feed", build_feed)
+    return artifact_response(request, artifact)
 
 
 @router.get("/{slug}")
 async def blog_post(request: Request, slug: str, db: Session = Depends(get_db)):
     """Single blog post view."""
-    post = posts_service.get_post_by_slug(db, slug)
+    cache_key = ("blog_post", slug)
+    body = page_cache.get(cache_key)
+    if body is not None:
+        return cached_page_response(body)
+    generation = page_cache.generation
+
+    post = await run_in_db(posts_service.get_post_by_slug, db, slug)
 
     if not post or post.status not in ('published', 'scheduled'):
         raise HTTPException(status_code=404, detail="Post not found")
 
-    related_posts = posts_service.get_related_posts(db, post.id, limit=3)
+    related_posts = await run_in_db(
+        posts_service.get_related_posts, db, post.id, limit=3
+    )
 
-    # Extract FAQ items from post content for Schema.org FAQPage markup
-    faq_items = []
-    if post.content_html:
-        faq_items = posts_service.extract_faq_items(post.content_html)
+    # FAQ items for Schema.org FAQPage markup are extracted at write time
+    faq_items = post.faq_items or []
 
     response = templates.TemplateResponse(
         "blog/post.html",
@@ -115,5 +164,11 @@ async def blog_post(request: Request, slug: str, db: Session = Depends(get_db)):
             "faq_items": faq_items
         }
     )
-    response.headers["Cache-Control"] = "public, max-age=300"
+    page_cache.set(
+        cache_key,
+        response.body,
+        generation,
+        expires_at=await run_in_db(posts_service.get_next_scheduled_at, db),
+    )
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
     return response
@@ -2,8 +2,13 @@ from fastapi import APIRouter, Request
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 
+from app.assets import asset_url
+from app.images import picture
+
 router = APIRouter()
 templates = Jinja2Templates(directory=Path(__file__).parent.parent / "templates")
+templates.env.globals["asset_url"] = asset_url
+templates.env.globals["picture"] = picture
 
 
 @router.get("/")
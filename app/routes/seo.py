@@ -4,18 +4,23 @@ Handles sitemap.xml, robots.txt, AASA, llms.txt, and other SEO-related endpoints
 """
 
 import json
-from datetime import datetime
-
+from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
+from typing import Iterator, Optional
+from xml.sax.saxutils import escape
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import Response, RedirectResponse, FileResponse
 from sqlalchemy.orm import Session
 
 APP_DIR = Path(__file__).parent.parent
 
-from app.db.database import get_db
+from app.db.database import SessionLocal
 from app.services import posts as posts_service
+from app.services.artifacts import (
+    Artifact, artifact_cache, artifact_response, build_artifact, get_artifact
+)
 
 router = APIRouter(tags=["seo"])
 
@@ -27,59 +32,146 @@ APP_BUNDLE_ID = "com.941apps.Ace-Citizenship"
 APP_CLIP_BUNDLE_ID = "com.941apps.Ace-Citizenship.Clip"
 
 
-@router.get("/sitemap.xml")
-async def sitemap(db: Session = Depends(get_db)):
-    """
-    Dynamic XML sitemap including all pages and blog posts.
-    Updates automatically when new posts are published.
-    """
-    # Static pages with their priorities and change frequencies
-    static_pages = [
-        {"loc": "/", "priority": "1.0", "changefreq": "weekly"},
-        {"loc": "/blog", "priority": "0.9", "changefreq": "daily"},
-        {"loc": "/support", "priority": "0.5", "changefreq": "monthly"},
-        {"loc": "/privacy", "priority": "0.3", "changefreq": "yearly"},
-        {"loc": "/terms", "priority": "0.3", "changefreq": "yearly"},
-    ]
-
-    # Get all published blog posts
-    posts, _ = posts_service.get_published_posts(db, limit=1000, offset=0)
-
-    # Build URL entries
-    urls = []
-
-    # Static pages
-    for page in static_pages:
-        lastmod = datetime.now().strftime("%Y-%m-%d")
-        urls.append(f"""
-    <url>
-        <loc>{SITE_URL}{page['loc']}</loc>
-        <lastmod>{lastmod}</lastmod>
-        <changefreq>{page['changefreq']}</changefreq>
-        <priority>{page['priority']}</priority>
-    </url>""")
+# Static pages with their priorities, change frequencies and the templates
+# their content comes from (lastmod is the newest template mtime, so it only
+# moves when a deploy changes the page)
+STATIC_PAGES = [
+    {"loc": "/", "priority": "1.0", "changefreq": "weekly",
+     "templates": ["index.html", "components/hero.html", "components/features.html"]},
+    {"loc": "/blog", "priority": "0.9", "changefreq": "daily", "templates": []},
+    {"loc": "/support", "priority": "0.5", "changefreq": "monthly", "templates": ["support.html"]},
+    {"loc": "/privacy", "priority": "0.3", "changefreq": "yearly", "templates": ["privacy.html"]},
+    {"loc": "/terms", "priority": "0.3", "changefreq": "yearly", "templates": ["terms.html"]},
+]
 
-    # Blog posts
-    for post in posts:
-        lastmod = post.updated_at.strftime("%Y-%m-%d") if post.updated_at else post.published_at.strftime("%Y-%m-%d")
-        urls.append(f"""
-    <url>
-        <loc>{SITE_URL}/blog/{post.slug}</loc>
-        <lastmod>{lastmod}</lastmod>
-        <changefreq>monthly</changefreq>
-        <priority>0.7</priority>
-    </url>""")
+# Posts per sitemap file; above this /sitemap.xml becomes a sitemap index
+SITEMAP_MAX_URLS = 1000
+
+
+def template_mtime(names: list[str]) -> Optional[datetime]:
+    """Newest modification time (UTC) of the given templates."""
+    mtimes = [(APP_DIR / "templates" / name).stat().st_mtime for name in names]
+    if not mtimes:
+        return None
+    return datetime.fromtimestamp(max(mtimes), timezone.utc).replace(tzinfo=None)
 
-    sitemap_xml = f"""<?xml version="1.0" encoding="UTF-8"?>
+
+STATIC_PAGE_MTIMES = {page["loc"]: template_mtime(page["templates"]) for page in STATIC_PAGES}
+STATIC_PAGES_MODIFIED = max(mtime for mtime in STATIC_PAGE_MTIMES.values() if mtime)
+
+
+def sitemap_url(loc: str, lastmod: datetime, changefreq: str, priority: str) -> str:
+    """Render one <url> entry."""
+    return f"""
+    <url>
+        <loc>{escape(loc)}</loc>
+        <lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>
+        <changefreq>{changefreq}</changefreq>
+        <priority>{priority}</priority>
+    </url>"""
+
+
+def iter_sitemap_urlset(
+    db: Session,
+    include_static: bool,
+    offset: int,
+    limit: int,
+    posts_modified: Optional[datetime]
+) -> Iterator[str]:
+    """Yield one <urlset>: optionally the static pages, then a slice of posts."""
+    yield """<?xml version="1.0" encoding="UTF-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
         xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
         xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9
-        http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">{"".join(urls)}
-</urlset>"""
+        http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">"""
+
+    if include_static:
+        for page in STATIC_PAGES:
+            yield sitemap_url(
+                f"{SITE_URL}{page['loc']}",
+                STATIC_PAGE_MTIMES[page["loc"]] or posts_modified or STATIC_PAGES_MODIFIED,
+                page["changefreq"],
+                page["priority"]
+            )
+
+    for post in posts_service.iter_published_rows(
+        db, posts_service.SITEMAP_COLUMNS, offset=offset, limit=limit
+    ):
+        yield sitemap_url(
+            f"{SITE_URL}/blog/{post.slug}",
+            post.updated_at or post.published_at,
+            "monthly",
+            "0.7"
+        )
+
+    yield "\n</urlset>"
+
+
+def iter_sitemap_index(pages: int, lastmod: datetime) -> Iterator[str]:
+    """Yield a <sitemapindex> pointing at the numbered child sitemaps."""
+    yield """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">"""
+    for page in range(1, pages + 1):
+        yield f"""
+    <sitemap>
+        <loc>{SITE_URL}/sitemap-{page}.xml</loc>
+        <lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>
+    </sitemap>"""
+    yield "\n</sitemapindex>"
+
+
+def build_sitemap(page: int) -> Optional[Artifact]:
+    """Build /sitemap.xml (page 0) or one numbered child sitemap.
+
+    Page 0 is the urlset itself until the posts outgrow SITEMAP_MAX_URLS,
+    then an index of the children. Returns None for a page out of range,
+    including every numbered page while there is no index.
+    """
+    db = SessionLocal()
+    try:
+        count, posts_modified = posts_service.get_published_state(db)
+        last_modified = max(filter(None, (posts_modified, STATIC_PAGES_MODIFIED)))
+        pages = max(1, -(-count // SITEMAP_MAX_URLS))
+
+        if page == 0 and pages > 1:
+            parts = iter_sitemap_index(pages, last_modified)
+        elif page == 0 or (pages > 1 and page <= pages):
+            first = max(page, 1)
+            parts = iter_sitemap_urlset(
+                db, first == 1, (first - 1) * SITEMAP_MAX_URLS, SITEMAP_MAX_URLS, last_modified
+            )
+        else:
+            return None
+        body = "".join(parts).encode()
+    finally:
+        db.close()
+
+    return build_artifact(body, "application/xml", last_modified)
+
+
+artifact_cache.register(("sitemap", 0), partial(build_sitemap, 0))
 
-    response = Response(content=sitemap_xml.strip(), media_type="application/xml")
-    response.headers["Cache-Control"] = "public, max-age=3600"
-    return response
+
+@router.get("/sitemap.xml")
+async def sitemap(request: Request):
+    """
+    Dynamic XML sitemap including all pages and blog posts.
+    Updates automatically when new posts are published; past
+    SITEMAP_MAX_URLS posts it becomes an index of numbered sitemaps.
+    """
+    artifact = await get_artifact(("sitemap", 0), partial(build_sitemap, 0))
+    return artifact_response(request, artifact)
+
+
+@router.get("/sitemap-{page}.xml")
+async def sitemap_page(request: Request, page: int):
+    """One child sitemap of the index; the first also lists the static pages."""
+    if page < 1:
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+    artifact = await get_artifact(("sitemap", page), partial(build_sitemap, page))
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+    return artifact_response(request, artifact)
 
 
 @router.get("/robots.txt")
@@ -218,12 +310,14 @@ async def well_known_llms_txt():
     return RedirectResponse(url="/llms.txt", status_code=301)
 
 
-@router.get("/llms-full.txt")
-async def llms_full_txt(db: Session = Depends(get_db)):
-    """
-    Extended llms.txt with complete blog content index for AI systems.
-    """
-    posts, _ = posts_service.get_published_posts(db, limit=1000, offset=0)
+def build_llms_full() -> Artifact:
+    """Build llms-full.txt: the site overview plus every published post."""
+    db = SessionLocal()
+    try:
+        posts = posts_service.list_published_summaries(db, limit=1000, offset=0)
+        _, last_modified = posts_service.get_published_state(db)
+    finally:
+        db.close()
 
     content_parts = [f"""# Ace Citizenship - Complete Content Index
 
@@ -270,9 +364,20 @@ Summary: {post.excerpt or 'No excerpt available.'}
 This content is provided for AI training and retrieval. Please cite acecitizenship.app when referencing.
 """)
 
-    response = Response(content="".join(content_parts).strip(), media_type="text/plain")
-    response.headers["Cache-Control"] = "public, max-age=3600"
-    return response
+    body = "".join(content_parts).strip().encode()
+    return build_artifact(body, "text/plain", last_modified)
+
+
+artifact_cache.register("llms-full", build_llms_full)
+
+
+@router.get("/llms-full.txt")
+async def llms_full_txt(request: Request):
+    """
+    Extended llms.txt with complete blog content index for AI systems.
+    """
+    artifact = await get_artifact("llms-full", build_llms_full)
+    return artifact_response(request, artifact)
 
 
 @router.get("/humans.txt")
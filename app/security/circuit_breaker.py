@@ -0,0 +1,101 @@
+"""
+Circuit breaker for calls to a remote dependency.
+
+After `failure_threshold` consecutive failures the breaker opens, and
+callers skip the remote call entirely instead of each waiting out a
+timeout. Once the recovery delay has passed, one probe call is let
+through (half-open): if it succeeds the breaker closes, and if it fails
+the breaker reopens with the delay doubled, up to `max_recovery`.
+
+Delays are jittered so instances that saw the same outage don't all
+probe at the same moment.
+"""
+
+import random
+import time
+from typing import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probing.
+
+    Callers ask allow() before each call and report the outcome with
+    record_success() or record_failure().
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery: float = 10.0,
+        max_recovery: float = 300.0,
+        jitter: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+        rand: Callable[[], float] = random.random,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery = recovery
+        self.max_recovery = max_recovery
+        self.jitter = jitter
+        self._clock = clock
+        self._rand = rand
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._delay = recovery
+        self._retry_at = 0.0
+        self._probing = False
+
+        # Operator-visible counters
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether to make the call now; False means fail fast."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self._clock() >= self._retry_at:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self._probing:
+            # One probe at a time; everyone else keeps failing fast
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._delay = self.recovery
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            # Failed probe: back off further before the next one
+            self._delay = min(self._delay * 2, self.max_recovery)
+            self._open()
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._probing = False
+        self.opened += 1
+        spread = 1 + self.jitter * (2 * self._rand() - 1)
+        self._retry_at = self._clock() + self._delay * spread
+
+    def stats(self) -> dict:
+        """State and counters for operators."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_in": (
+                round(max(self._retry_at - self._clock(), 0.0), 1) if self.state == OPEN else 0.0
+            ),
+        }
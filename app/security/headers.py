@@ -17,16 +17,34 @@ Headers implemented:
 - Cross-Origin-Resource-Policy (CORP) - for API endpoints only
 """
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from types import MappingProxyType
+from urllib.parse import urlsplit
 
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+
+def get_hostname(scope: Scope) -> str:
+    """Extract the request hostname from the Host header (or server address).
+
+    Mirrors ``request.url.hostname`` without building a full URL object.
+    """
+    for key, value in scope["headers"]:
+        if key == b"host":
+            return urlsplit(f"//{value.decode('latin-1')}").hostname or ""
+    server = scope.get("server")
+    return server[0] if server else ""
+
+
+class SecurityHeadersMiddleware:
     """Add hardened security headers to all responses.
 
     This middleware implements Plus Ultra security headers for maximum
     protection while maintaining compatibility with CDN-loaded resources.
+
+    Implemented as raw ASGI middleware: headers are added to the
+    ``http.response.start`` message, so response bodies stream through
+    untouched.
     """
 
     # Comprehensive Permissions-Policy denying all unused features
@@ -83,9 +101,24 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             app: The ASGI application
             csp_overrides: Optional dict to override default CSP directives
         """
-        super().__init__(app)
+        self.app = app
         self.csp_overrides = csp_overrides or {}
 
+    @property
+    def csp_overrides(self) -> MappingProxyType:
+        """Current CSP overrides (read-only; assign a new dict to change them)."""
+        return self._csp_overrides
+
+    @csp_overrides.setter
+    def csp_overrides(self, overrides: dict) -> None:
+        # Precomputed header blocks embed the CSP, so rebuild them on change
+        self._csp_overrides = MappingProxyType(dict(overrides))
+        self._header_blocks = {
+            (is_localhost, is_static): self._build_header_block(is_localhost, is_static)
+            for is_localhost in (True, False)
+            for is_static in (True, False)
+        }
+
     def _build_csp(self, is_localhost: bool) -> str:
         """Build CSP string, optionally including upgrade-insecure-requests."""
         directives = {**self.CSP_DIRECTIVES, **self.csp_overrides}
@@ -99,38 +132,34 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             for key, value in directives.items()
         )
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
-
-        # Check if localhost (skip certain security headers for local dev)
-        # Also treat .local/.test domains as local development (for Caddy reverse proxy)
-        hostname = request.url.hostname or ""
-        is_localhost = hostname in ("localhost", "127.0.0.1") or hostname.endswith(".local") or hostname.endswith(".test")
+    def _build_headers(self, is_localhost: bool, is_static: bool) -> dict[str, str]:
+        """Build the full security header set for one response variant."""
+        headers = {}
 
         # === Core Security Headers ===
 
         # Prevent MIME type sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
+        headers["X-Content-Type-Options"] = "nosniff"
 
         # Prevent clickjacking (redundant with CSP frame-ancestors but broader support)
-        response.headers["X-Frame-Options"] = "DENY"
+        headers["X-Frame-Options"] = "DENY"
 
         # Legacy XSS protection (modern browsers use CSP, but older ones need this)
-        response.headers["X-XSS-Protection"] = "1; mode=block"
+        headers["X-XSS-Protection"] = "1; mode=block"
 
         # Control referrer information leakage
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
 
         # === Transport Security ===
 
         # Enforce HTTPS for 1 year, include subdomains (production only)
         if not is_localhost:
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+            headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
 
         # === Cross-Origin Policies ===
 
         # Prevent other sites from opening this site in a popup and accessing window.opener
-        response.headers["Cross-Origin-Opener-Policy"] = "same-origin"
+        headers["Cross-Origin-Opener-Policy"] = "same-origin"
 
         # Note: Cross-Origin-Embedder-Policy (COEP) is intentionally NOT set
         # because it requires all CDN resources to have CORP headers, which
@@ -138,22 +167,57 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         # would break Bootstrap, HTMX, and Alpine.js loaded from CDNs.
 
         # === Content Security Policy ===
-        response.headers["Content-Security-Policy"] = self._build_csp(is_localhost)
+        headers["Content-Security-Policy"] = self._build_csp(is_localhost)
 
         # === Feature/Permissions Policy ===
         # Comprehensive deny list for browser features we don't use
-        response.headers["Permissions-Policy"] = self.PERMISSIONS_POLICY
+        headers["Permissions-Policy"] = self.PERMISSIONS_POLICY
 
-        # === Cache Headers for Static Assets ===
-        if request.url.path.startswith("/static/"):
-            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        # === Static Assets ===
+        # Cache-Control is set by the static mount: only fingerprinted
+        # URLs (app/assets.py) are safe to mark immutable
+        if is_static:
             # Add CORP for static assets (safe since they're self-hosted)
-            response.headers["Cross-Origin-Resource-Policy"] = "same-origin"
+            headers["Cross-Origin-Resource-Policy"] = "same-origin"
 
-        return response
+        return headers
 
+    def _build_header_block(
+        self, is_localhost: bool, is_static: bool
+    ) -> tuple[frozenset[bytes], list[tuple[bytes, bytes]]]:
+        """Encode a header variant as raw ASGI header tuples.
 
-class APISecurityHeadersMiddleware(BaseHTTPMiddleware):
+        Returns the set of (lowercase) names being set, so any existing
+        values can be replaced, and the encoded header list to append.
+        """
+        block = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in self._build_headers(is_localhost, is_static).items()
+        ]
+        return frozenset(name for name, _ in block), block
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Check if localhost (skip certain security headers for local dev)
+        # Also treat .local/.test domains as local development (for Caddy reverse proxy)
+        hostname = get_hostname(scope)
+        is_localhost = hostname in ("localhost", "127.0.0.1") or hostname.endswith(".local") or hostname.endswith(".test")
+        names, block = self._header_blocks[(is_localhost, scope["path"].startswith("/static/"))]
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    header for header in message.get("headers", ()) if header[0] not in names
+                ] + block
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class APISecurityHeadersMiddleware:
     """Stricter security headers for API-only endpoints.
 
     This middleware adds Cross-Origin-Resource-Policy: same-origin
@@ -161,14 +225,24 @@ class APISecurityHeadersMiddleware(BaseHTTPMiddleware):
     serve resources to cross-origin contexts.
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
 
-        # API responses should not be embeddable cross-origin
-        response.headers["Cross-Origin-Resource-Policy"] = "same-origin"
+                # API responses should not be embeddable cross-origin
+                headers["Cross-Origin-Resource-Policy"] = "same-origin"
 
-        # API responses typically don't need caching
-        if "Cache-Control" not in response.headers:
-            response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate"
+                # API responses typically don't need caching
+                if "Cache-Control" not in headers:
+                    headers["Cache-Control"] = "no-store, no-cache, must-revalidate"
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
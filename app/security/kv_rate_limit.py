@@ -5,6 +5,21 @@ Provides distributed, persistent rate limiting that survives deploys
 and works across multiple instances. Falls back to in-memory if KV
 is unavailable.
 
+Each instance counts requests locally and decides from its own
+counters, so a check never waits on the network. Increments are
+written behind to KV by a background flush every KV_FLUSH_INTERVAL
+seconds, coalesced per client, and the flush merges other instances'
+counts back in. All KV calls share one pooled client, closed by
+close_kv_client() at shutdown, behind a circuit breaker so an outage
+costs failed flushes at most a few timeouts, not one per call.
+
+Known limit: KV has no atomic increment, so a flush is a GET then a
+PUT. Two instances flushing the same client's counter at the same time
+can both read the old value, and one write overwrites the other's
+increments. Each instance still enforces the limit on its own counts,
+so the worst case is a client getting up to one limit per instance in
+a window, as with no sharing at all.
+
 Usage:
     @rate_limit_form_kv
     async def submit_form(request: Request, ...):
@@ -14,17 +29,20 @@ Usage:
 import asyncio
 import os
 import time
-from collections import defaultdict
 from functools import wraps
-from typing import Callable
+from typing import Callable, Optional
 
 import httpx
 from fastapi import HTTPException, Request
 
+from app.security.circuit_breaker import CircuitBreaker
+from app.security.rate_limit import RATE_LIMIT_MAX_KEYS, InMemoryRateLimiter
+
 
 # Cloudflare KV configuration
 CF_ACCOUNT_ID = os.getenv("CF_ACCOUNT_ID", "0cbfc64a7f11a17453d2cb691107fa45")
 CF_API_TOKEN = os.getenv("CF_API_TOKEN", "")
+CF_API_BASE = os.getenv("CF_API_BASE", "https://api.cloudflare.com/client/v4")
 KV_NAMESPACE_ID = os.getenv("KV_RATE_LIMIT_NAMESPACE", "102b222e36ef416298b3414fa9d294a5")
 SITE_NAME = os.getenv("SITE_NAME", "unknown")
 
@@ -33,12 +51,66 @@ FORM_LIMIT = int(os.getenv("RATE_LIMIT_FORM", "5"))  # requests per minute
 AUTH_LIMIT = int(os.getenv("RATE_LIMIT_AUTH", "10"))  # requests per minute
 WINDOW_SECONDS = 60
 
+# Seconds between write-behind flushes of local increments to KV
+KV_FLUSH_INTERVAL = float(os.getenv("KV_RATE_LIMIT_FLUSH_INTERVAL", "1.0"))
+
+# Shared KV client: per-call timeout and connection pool
+KV_TIMEOUT = 2.0
+KV_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30)
+
+# Clients a flush writes at once, so a big flush queues here, not on the pool timeout
+KV_FLUSH_CONCURRENCY = 10
+
+# Responses counted as breaker failures besides 5xx: throttled, or the
+# token is missing, expired or revoked (every call would fail the same way)
+KV_FAILURE_STATUSES = frozenset({401, 403, 429})
+
+_kv_client: Optional[httpx.AsyncClient] = None
+
+# Shared by every limiter: an outage is the same outage for all of them.
+# Five straight failures open it; probes start after ~10s, backing off to 5 min.
+kv_breaker = CircuitBreaker(failure_threshold=5, recovery=10.0, max_recovery=300.0)
+
+# Every KVRateLimiter, so shutdown can flush them all
+_limiters: list["KVRateLimiter"] = []
+
+
+def get_kv_client() -> httpx.AsyncClient:
+    """Shared KV API client; keeps connections (and TLS sessions) alive between calls."""
+    global _kv_client
+    if _kv_client is None or _kv_client.is_closed:
+        _kv_client = httpx.AsyncClient(
+            base_url=(
+                f"{CF_API_BASE}/accounts/{CF_ACCOUNT_ID}"
+                f"/storage/kv/namespaces/{KV_NAMESPACE_ID}/values"
+            ),
+            headers={
+                "Authorization": f"Bearer {CF_API_TOKEN}",
+                "Content-Type": "text/plain",
+            },
+            timeout=KV_TIMEOUT,
+            limits=KV_POOL_LIMITS,
+        )
+    return _kv_client
+
+
+async def close_kv_client() -> None:
+    """Flush every limiter's pending increments, then close the shared client."""
+    global _kv_client
+    for limiter in _limiters:
+        await limiter.close()
+    if _kv_client is not None:
+        await _kv_client.aclose()
+        _kv_client = None
+
 
 class KVRateLimiter:
     """Cloudflare KV-backed rate limiter with in-memory fallback.
 
-    Uses a simple counter approach with TTL-based expiration.
-    If KV is unavailable, falls back to in-memory limiting.
+    Uses a fixed-window counter per client. This instance's counters are
+    authoritative for the check; KV spreads counts between instances
+    and across deploys via the write-behind flush. If KV isn't
+    configured, falls back to in-memory limiting.
     """
 
     def __init__(
@@ -51,92 +123,170 @@ class KVRateLimiter:
         self.prefix = prefix
         self.site_name = site_name
 
-        # In-memory fallback
-        self._fallback: dict[str, list[float]] = defaultdict(list)
-        self._last_cleanup = time.time()
-
-        # KV API configuration
-        self._kv_base_url = (
-            f"https://api.cloudflare.com/client/v4/accounts/{CF_ACCOUNT_ID}"
-            f"/storage/kv/namespaces/{KV_NAMESPACE_ID}/values"
-        )
-        self._headers = {
-            "Authorization": f"Bearer {CF_API_TOKEN}",
-            "Content-Type": "text/plain",
-        }
+        # In-memory fallback (bounded, so an outage plus an IP spray can't OOM us)
+        self._fallback = InMemoryRateLimiter(window_seconds=WINDOW_SECONDS)
 
         # Track if KV is available
         self._kv_available = bool(CF_API_TOKEN)
 
-    def _get_window_key(self, client_ip: str) -> str:
-        """Generate a unique key for the current time window."""
-        window = int(time.time() // WINDOW_SECONDS)
+        # Counts per client IP in the current window, including other
+        # instances' counts merged in by flushes
+        self._window = -1
+        self._counts: dict[str, int] = {}
+        # Increments not yet written to KV, per (client IP, window)
+        self._pending: dict[tuple[str, int], int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Operator-visible counters
+        self.flushes = 0
+        self.flushed_increments = 0
+        self.flush_errors = 0
+
+        _limiters.append(self)
+
+    def _current_window(self) -> int:
+        return int(time.time() // WINDOW_SECONDS)
+
+    def _get_window_key(self, client_ip: str, window: int) -> str:
+        """KV key for a client's counter in one time window."""
         return f"{self.prefix}:{self.site_name}:{client_ip}:{window}"
 
-    async def _kv_get(self, key: str) -> int | None:
-        """Get value from Cloudflare KV."""
-        if not self._kv_available:
+    async def _kv_request(self, method: str, key: str, **kwargs) -> httpx.Response | None:
+        """Call the KV API through the breaker; None if skipped or it failed."""
+        if not self._kv_available or not kv_breaker.allow():
             return None
 
+        healthy = False
         try:
-            async with httpx.AsyncClient(timeout=2.0) as client:
-                resp = await client.get(
-                    f"{self._kv_base_url}/{key}",
-                    headers=self._headers,
-                )
-                if resp.status_code == 200:
-                    return int(resp.text)
-                elif resp.status_code == 404:
-                    return 0
-                return None
+            resp = await get_kv_client().request(method, f"/{key}", **kwargs)
+            healthy = resp.status_code < 500 and resp.status_code not in KV_FAILURE_STATUSES
+            return resp
         except Exception:
             return None
+        finally:
+            # Also runs on cancellation, so a half-open probe is never left hanging
+            if healthy:
+                kv_breaker.record_success()
+            else:
+                kv_breaker.record_failure()
 
-    async def _kv_increment(self, key: str) -> bool:
-        """Increment counter in Cloudflare KV with TTL."""
-        if not self._kv_available:
-            return False
-
-        try:
-            # Get current value
-            current = await self._kv_get(key) or 0
-            new_value = current + 1
-
-            # Set new value with TTL
-            async with httpx.AsyncClient(timeout=2.0) as client:
-                resp = await client.put(
-                    f"{self._kv_base_url}/{key}",
-                    headers=self._headers,
-                    content=str(new_value),
-                    params={"expiration_ttl": WINDOW_SECONDS + 10},  # Extra buffer
-                )
-                return resp.status_code == 200
-        except Exception:
-            return False
+    async def _kv_get(self, key: str) -> int | None:
+        """Get value from Cloudflare KV."""
+        resp = await self._kv_request("GET", key)
+        if resp is None:
+            return None
+        if resp.status_code == 200:
+            try:
+                return int(resp.text)
+            except ValueError:
+                return None
+        elif resp.status_code == 404:
+            return 0
+        return None
+
+    async def _kv_put(self, key: str, value: int) -> bool:
+        """Set a counter in Cloudflare KV with TTL."""
+        resp = await self._kv_request(
+            "PUT",
+            key,
+            content=str(value),
+            params={"expiration_ttl": WINDOW_SECONDS + 10},  # Extra buffer
+        )
+        return resp is not None and resp.status_code == 200
 
-    def _fallback_check(self, key: str) -> bool:
+    def _fallback_check(self, client_ip: str) -> bool:
         """In-memory fallback rate limiting."""
-        current_time = time.time()
-        cutoff = current_time - WINDOW_SECONDS
-
-        # Cleanup old entries periodically
-        if current_time - self._last_cleanup > WINDOW_SECONDS:
-            for k in list(self._fallback.keys()):
-                self._fallback[k] = [t for t in self._fallback[k] if t > cutoff]
-                if not self._fallback[k]:
-                    del self._fallback[k]
-            self._last_cleanup = current_time
+        allowed, _, _ = self._fallback.check(client_ip, self.requests_per_minute)
+        return not allowed
 
-        # Filter to recent requests
-        recent = [t for t in self._fallback[key] if t > cutoff]
-        self._fallback[key] = recent
+    def _local_check(self, client_ip: str) -> bool:
+        """Count one request against the local counters; True if over the limit.
 
-        if len(recent) >= self.requests_per_minute:
-            return True  # Rate limited
-
-        self._fallback[key].append(current_time)
+        No await between reading and bumping the count, so concurrent
+        requests can't both take the last slot.
+        """
+        window = self._current_window()
+        if window != self._window:
+            self._window = window
+            self._counts.clear()
+
+        count = self._counts.get(client_ip, 0)
+        if count >= self.requests_per_minute:
+            return True
+        if not count and len(self._counts) >= RATE_LIMIT_MAX_KEYS:
+            # IP spray: the bounded fallback handles clients past the cap
+            return self._fallback_check(client_ip)
+
+        self._counts[client_ip] = count + 1
+        pending_key = (client_ip, window)
+        self._pending[pending_key] = self._pending.get(pending_key, 0) + 1
+        self._schedule_flush()
         return False
 
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        """Flush every KV_FLUSH_INTERVAL until nothing is pending."""
+        while self._pending:
+            await asyncio.sleep(KV_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write pending increments to KV, one read-add-write per client."""
+        pending, self._pending = self._pending, {}
+        window = self._current_window()
+        # A finished window's counter is never read again
+        batch = [(ip, n) for (ip, pending_window), n in pending.items() if pending_window == window]
+        if not batch:
+            return
+        self.flushes += 1
+        slots = asyncio.Semaphore(KV_FLUSH_CONCURRENCY)
+        await asyncio.gather(*(self._flush_client(ip, window, n, slots) for ip, n in batch))
+
+    async def _flush_client(
+        self, client_ip: str, window: int, increments: int, slots: asyncio.Semaphore
+    ) -> None:
+        key = self._get_window_key(client_ip, window)
+        async with slots:
+            remote = await self._kv_get(key)
+            total = None if remote is None else remote + increments
+            written = total is not None and await self._kv_put(key, total)
+        if not written:
+            # Retry with the next flush
+            self.flush_errors += 1
+            pending_key = (client_ip, window)
+            self._pending[pending_key] = self._pending.get(pending_key, 0) + increments
+            return
+
+        self.flushed_increments += increments
+        # Take in requests other instances counted for this client
+        if window == self._window and client_ip in self._counts:
+            self._counts[client_ip] = max(self._counts[client_ip], total)
+
+    async def close(self) -> None:
+        """Stop the background flush and write out what's pending."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        if self._pending:
+            await self.flush()
+
+    def stats(self) -> dict:
+        """Backend state, flush counters and fallback memory for operators."""
+        return {
+            "kv_available": self._kv_available,
+            "local_keys": len(self._counts),
+            "pending_keys": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_increments": self.flushed_increments,
+            "flush_errors": self.flush_errors,
+            "breaker": kv_breaker.stats(),
+            "fallback": self._fallback.stats(),
+        }
+
     async def is_rate_limited(self, client_ip: str) -> bool:
         """Check if client is rate limited.
 
@@ -146,20 +296,9 @@ class KVRateLimiter:
         Returns:
             True if rate limited, False otherwise
         """
-        key = self._get_window_key(client_ip)
-
-        # Try KV first
-        count = await self._kv_get(key)
-        if count is not None:
-            if count >= self.requests_per_minute:
-                return True
-
-            # Increment counter
-            if await self._kv_increment(key):
-                return False
-
-        # Fallback to in-memory
-        return self._fallback_check(key)
+        if not self._kv_available:
+            return self._fallback_check(client_ip)
+        return self._local_check(client_ip)
 
 
 def get_client_ip(request: Request) -> str:
@@ -228,6 +367,10 @@ def rate_limit_auth_kv(func: Callable) -> Callable:
     return wrapper
 
 
+# Limiters for RateLimitContext, shared per (prefix, limit) so their counts persist
+_context_limiters: dict[tuple[str, int], KVRateLimiter] = {}
+
+
 # Async context manager for custom rate limiting
 class RateLimitContext:
     """Context manager for custom rate limiting scenarios."""
@@ -239,10 +382,13 @@ class RateLimitContext:
         prefix: str = "custom",
     ):
         self.request = request
-        self.limiter = KVRateLimiter(
-            requests_per_minute=requests_per_minute,
-            prefix=prefix,
-        )
+        key = (prefix, requests_per_minute)
+        if key not in _context_limiters:
+            _context_limiters[key] = KVRateLimiter(
+                requests_per_minute=requests_per_minute,
+                prefix=prefix,
+            )
+        self.limiter = _context_limiters[key]
 
     async def __aenter__(self):
         ip = get_client_ip(self.request)
@@ -6,8 +6,7 @@ import time
 from typing import Pattern
 
 from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.security.axiom import get_axiom_client, create_event
 
@@ -122,39 +121,56 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-class SecurityLogMiddleware(BaseHTTPMiddleware):
+class SecurityLogMiddleware:
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         site_name: str = SITE_NAME,
         log_all: bool = True,
         log_threats_only: bool = False,
     ):
-        super().__init__(app)
+        self.app = app
         self.site_name = site_name
         self.log_all = log_all
         self.log_threats_only = log_threats_only
         self.axiom = get_axiom_client()
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.perf_counter()
+        request = Request(scope)
         ip = get_client_ip(request)
         country = request.headers.get("CF-IPCountry", "")
         user_agent = request.headers.get("User-Agent", "")
-        path = request.url.path
+        path = scope["path"]
         query = str(request.query_params)
-        method = request.method
+        method = scope["method"]
         ray_id = request.headers.get("CF-Ray", "")
         referer = request.headers.get("Referer")
         threat_type, threat_details = detect_threats(path, query, user_agent, method)
-        response = await call_next(request)
-        duration_ms = (time.perf_counter() - start_time) * 1000
-        rate_limited = response.status_code == 429
+
+        status_code = 500
+        duration_ms = 0.0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, duration_ms
+            if message["type"] == "http.response.start":
+                # Duration is time-to-headers, matching the previous call_next timing
+                status_code = message["status"]
+                duration_ms = (time.perf_counter() - start_time) * 1000
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+        rate_limited = status_code == 429
         should_log = (
             self.log_all
             or threat_type is not None
             or rate_limited
-            or response.status_code >= 400
+            or status_code >= 400
         )
         if self.log_threats_only:
             should_log = threat_type is not None or rate_limited
@@ -167,7 +183,7 @@ class SecurityLogMiddleware(BaseHTTPMiddleware):
                 method=method,
                 path=path,
                 query=query[:500] if query else "",
-                status=response.status_code,
+                status=status_code,
                 duration_ms=round(duration_ms, 2),
                 ray_id=ray_id,
                 threat_type=threat_type,
@@ -176,4 +192,3 @@ class SecurityLogMiddleware(BaseHTTPMiddleware):
                 referer=referer[:500] if referer else None,
             )
             await self.axiom.log_event(event)
-        return response
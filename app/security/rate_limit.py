@@ -15,13 +15,15 @@ Security Note:
 """
 
 import logging
+import os
 import time
-from collections import defaultdict
-from typing import Optional
+from collections import OrderedDict
+from typing import Callable, Optional
 
-from fastapi import Request, Response
+from fastapi import Request
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.security.bot_verification import (
     BotTier,
@@ -29,6 +31,7 @@ from app.security.bot_verification import (
     get_bot_verifier,
     verify_bot,
 )
+from app.security.sketch import WindowedCountMinSketch
 
 logger = logging.getLogger(__name__)
 
@@ -102,52 +105,258 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-class InMemoryRateLimiter:
-    """Sliding window rate limiter."""
+def current_window(window_seconds: int, now: float) -> tuple[int, float]:
+    """Fixed window index for `now` and the fraction of it that has elapsed."""
+    window, offset = divmod(now, window_seconds)
+    return int(window), offset / window_seconds
 
-    def __init__(self, window_seconds: int = 60):
-        self.window_seconds = window_seconds
-        self._requests: dict[str, list[float]] = defaultdict(list)
-        self._last_cleanup = time.time()
-
-    def _cleanup(self):
-        now = time.time()
-        if now - self._last_cleanup < 60:
-            return
-        cutoff = now - self.window_seconds
-        for key in list(self._requests.keys()):
-            self._requests[key] = [t for t in self._requests[key] if t > cutoff]
-            if not self._requests[key]:
-                del self._requests[key]
-        self._last_cleanup = now
-
-    def check(self, key: str, limit: int) -> tuple[bool, int, int]:
-        """Check if allowed. Returns (allowed, remaining, reset_seconds)."""
-        now = time.time()
-        cutoff = now - self.window_seconds
-        self._cleanup()
-        self._requests[key] = [t for t in self._requests[key] if t > cutoff]
-        current = len(self._requests[key])
-        if current >= limit:
-            oldest = min(self._requests[key]) if self._requests[key] else now
-            reset = int(oldest + self.window_seconds - now) + 1
-            return False, 0, reset
-        self._requests[key].append(now)
-        return True, limit - current - 1, self.window_seconds
 
+def sliding_window_reset(
+    window_seconds: int, limit: int, current: int, previous: int, elapsed: float
+) -> int:
+    """Seconds until a rejected key's sliding-window estimate drops below the limit."""
+    if current < limit:
+        # The previous bucket's weight has to fall off within this window
+        needed = 1 - (limit - current) / previous
+        wait = (needed - elapsed) * window_seconds
+    else:
+        # Wait for the next window, then for this window's count to decay
+        needed = 1 - limit / current
+        wait = (1 - elapsed + needed) * window_seconds
+    # The estimate is still at the limit at exactly `wait`, so round up
+    # past it; the epsilon keeps a whole-second wait that float error
+    # put just under the integer from landing on it
+    return max(int(wait + 1e-9) + 1, 1)
+
+
+# Most keys tracked exactly per limiter; ~170 bytes each, so ~8.5 MB
+RATE_LIMIT_MAX_KEYS = int(os.getenv("ACE_RATE_LIMIT_MAX_KEYS", "50000"))
+if RATE_LIMIT_MAX_KEYS < 1:
+    raise ValueError(f"ACE_RATE_LIMIT_MAX_KEYS must be at least 1, not {RATE_LIMIT_MAX_KEYS}")
+
+# What happens to a new key when every tracked key is still live:
+# "sketch" counts it approximately in fixed memory, "evict" drops the
+# least recently used key to make room
+RATE_LIMIT_OVERFLOW = os.getenv("ACE_RATE_LIMIT_OVERFLOW", "sketch")
+if RATE_LIMIT_OVERFLOW not in ("sketch", "evict"):
+    raise ValueError(f"ACE_RATE_LIMIT_OVERFLOW must be 'sketch' or 'evict', not {RATE_LIMIT_OVERFLOW!r}")
+
+# Rough per-key footprint of the exact table (key string, list, dict node)
+APPROX_BYTES_PER_KEY = 170
+
+# Where counters live: "memory" is per process, "sqlite" is one file
+# shared by every worker on the host (use it with uvicorn --workers N)
+RATE_LIMIT_BACKENDS = ("memory", "sqlite")
+RATE_LIMIT_BACKEND = os.getenv("ACE_RATE_LIMIT_BACKEND", "memory")
+if RATE_LIMIT_BACKEND not in RATE_LIMIT_BACKENDS:
+    raise ValueError(f"ACE_RATE_LIMIT_BACKEND must be 'memory' or 'sqlite', not {RATE_LIMIT_BACKEND!r}")
 
-_rate_limiter = InMemoryRateLimiter()
 
+class InMemoryRateLimiter:
+    """Sliding window counter rate limiter (two buckets per key).
+
+    Each key holds its count for the current fixed window and the one
+    before it; the sliding-window estimate weights the previous count by
+    how much of it still overlaps the last `window_seconds`. That's O(1)
+    time and three integers per key, however many requests are allowed.
+
+    Keys are kept in access order, so idle ones collect at the front and
+    are expired lazily, a few per call, instead of in a periodic sweep.
+
+    At most `max_keys` keys are tracked exactly, so an IP spray can't
+    grow memory without bound. Once the table is full of live keys, new
+    keys overflow in one of two defined ways:
+
+    - "sketch": counted in a windowed count-min sketch (fixed ~2 MiB,
+      allocated on first overflow). Counts can only be overestimated, so
+      overflow keys may be throttled early but never late. Tracked keys
+      stay exact, and a key that later gets a table slot starts from its
+      sketch count.
+    - "evict": the least recently used key is dropped. Its count restarts
+      at zero, so it may get up to one extra window's quota.
+    """
+
+    # check() never blocks, so the middleware calls it on the event loop
+    blocking = False
+
+    # Most idle keys dropped per check(); new keys arrive at most one per
+    # call, so the backlog still drains, without a stop-the-world pass
+    EXPIRE_BATCH = 32
+
+    def __init__(
+        self,
+        window_seconds: int = 60,
+        clock: Callable[[], float] = time.monotonic,
+        max_keys: int = RATE_LIMIT_MAX_KEYS,
+        overflow: str = RATE_LIMIT_OVERFLOW,
+    ):
+        if max_keys < 1:
+            raise ValueError(f"max_keys must be at least 1, not {max_keys}")
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self.max_keys = max_keys
+        self.overflow = overflow
+        # key -> [window index, count in that window, count in the window before]
+        self._windows: OrderedDict[str, list[int]] = OrderedDict()
+        # Window in which the front of _windows was last seen to be live
+        self._expired_through = -1
+        self._sketch: Optional[WindowedCountMinSketch] = None
+
+        # Operator-visible counters
+        self.expired = 0
+        self.evictions = 0
+        self.overflow_checks = 0
+
+    def _expire(self, window: int) -> None:
+        """Drop idle keys from the front; both of their buckets are over."""
+        windows = self._windows
+        for _ in range(self.EXPIRE_BATCH):
+            for key, entry in windows.items():
+                break
+            else:
+                self._expired_through = window
+                return
+            if entry[0] >= window - 1:
+                # Keys only go stale when the window advances
+                self._expired_through = window
+                return
+            del windows[key]
+            self.expired += 1
+
+    def _make_room(self, window: int) -> bool:
+        """Free a table slot for a new key; False means count it in the sketch."""
+        windows = self._windows
+        for key, entry in windows.items():
+            break
+        if entry[0] < window - 1:
+            del windows[key]
+            self.expired += 1
+            return True
+        if self.overflow == "sketch":
+            return False
+        del windows[key]
+        self.evictions += 1
+        return True
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware with verified bot classification."""
+    def check(self, key: str, limit: int) -> tuple[bool, int, int]:
+        """Check if allowed. Returns (allowed, remaining, reset_seconds)."""
+        window, elapsed = current_window(self.window_seconds, self._clock())
+        if self._expired_through != window:
+            self._expire(window)
+
+        entry = self._windows.get(key)
+        if entry is None:
+            if len(self._windows) >= self.max_keys and not self._make_room(window):
+                return self._check_sketch(key, limit, window, elapsed)
+            entry = self._windows[key] = [window, 0, 0]
+            sketch = self._sketch
+            if sketch is not None and not sketch.is_empty(window):
+                # Carry over what the key did while it overflowed
+                entry[1], entry[2] = sketch.counts(sketch.slots(key), window)
+        else:
+            self._windows.move_to_end(key)
+            if entry[0] != window:
+                # Roll forward: the current bucket becomes the previous one,
+                # unless a whole window passed with no requests
+                entry[2] = entry[1] if entry[0] == window - 1 else 0
+                entry[1] = 0
+                entry[0] = window
+        _, current, previous = entry
+
+        estimate = previous * (1 - elapsed) + current
+        if estimate >= limit:
+            return False, 0, sliding_window_reset(self.window_seconds, limit, current, previous, elapsed)
+
+        entry[1] = current + 1
+        return True, max(int(limit - estimate - 1), 0), self.window_seconds
+
+    def _check_sketch(self, key: str, limit: int, window: int, elapsed: float) -> tuple[bool, int, int]:
+        """check() for a key that doesn't fit in the table."""
+        self.overflow_checks += 1
+        if self._sketch is None:
+            self._sketch = WindowedCountMinSketch()
+        slots = self._sketch.slots(key)
+        current, previous = self._sketch.counts(slots, window)
+
+        estimate = previous * (1 - elapsed) + current
+        if estimate >= limit:
+            return False, 0, sliding_window_reset(self.window_seconds, limit, current, previous, elapsed)
+
+        self._sketch.add(slots, window)
+        return True, max(int(limit - estimate - 1), 0), self.window_seconds
+
+    def stats(self) -> dict:
+        """Memory and eviction counters for operators."""
+        sketch_bytes = self._sketch.nbytes if self._sketch is not None else 0
+        return {
+            "backend": "memory",
+            "keys": len(self._windows),
+            "max_keys": self.max_keys,
+            "overflow": self.overflow,
+            "approx_bytes": len(self._windows) * APPROX_BYTES_PER_KEY + sketch_bytes,
+            "sketch_bytes": sketch_bytes,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "overflow_checks": self.overflow_checks,
+        }
+
+
+def create_rate_limiter(backend: str = RATE_LIMIT_BACKEND):
+    """Build a rate limiter for one of RATE_LIMIT_BACKENDS."""
+    if backend == "memory":
+        return InMemoryRateLimiter()
+    if backend == "sqlite":
+        # Imported here: the shared backend builds on this module
+        from app.security.shared_rate_limit import SQLiteRateLimiter
+
+        return SQLiteRateLimiter()
+    raise ValueError(f"Unknown rate limit backend {backend!r}; expected one of {RATE_LIMIT_BACKENDS}")
+
+
+_rate_limiter = create_rate_limiter()
+
+
+def get_rate_limiter():
+    """Get the middleware's global rate limiter instance."""
+    return _rate_limiter
+
+
+def _send_with_headers(send: Send, extra_headers: dict[str, str]) -> Send:
+    """Wrap an ASGI send callable to add headers to the response start message."""
+
+    async def wrapped(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(scope=message)
+            for name, value in extra_headers.items():
+                headers[name] = value
+        await send(message)
+
+    return wrapped
+
+
+class RateLimitMiddleware:
+    """Rate limiting middleware with verified bot classification.
+
+    Uses the global limiter (ACE_RATE_LIMIT_BACKEND) unless `backend`
+    names one of RATE_LIMIT_BACKENDS for this middleware alone.
+    """
+
+    def __init__(self, app: ASGIApp, backend: Optional[str] = None):
+        self.app = app
+        self.limiter = get_rate_limiter() if backend is None else create_rate_limiter(backend)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        path = request.url.path
+        path = scope["path"]
 
         if path.startswith("/health") or path.startswith("/static"):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
+        request = Request(scope)
         user_agent = request.headers.get("user-agent", "")
         client_ip = get_client_ip(request)
 
@@ -160,26 +369,31 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 f"Blocked attack tool: ip={client_ip} path={path} "
                 f"user_agent={user_agent[:100]}"
             )
-            return JSONResponse(status_code=403, content={"error": "Forbidden"})
+            response = JSONResponse(status_code=403, content={"error": "Forbidden"})
+            await response(scope, receive, send)
+            return
 
         # VERIFIED BOTS: Skip rate limiting entirely (cryptographically verified)
         if category in ("verified_search", "verified_ai"):
-            response = await call_next(request)
-            response.headers["X-RateLimit-Category"] = category
+            extra_headers = {"X-RateLimit-Category": category}
             if verification:
-                response.headers["X-Bot-Verified"] = verification.verified_as or ""
-            return response
+                extra_headers["X-Bot-Verified"] = verification.verified_as or ""
+            await self.app(scope, receive, _send_with_headers(send, extra_headers))
+            return
 
         # Get rate limit for this category
         limit = RATE_LIMIT_VALUES.get(category)
         if limit is None:
-            response = await call_next(request)
-            response.headers["X-RateLimit-Category"] = category
-            return response
+            extra_headers = {"X-RateLimit-Category": category}
+            await self.app(scope, receive, _send_with_headers(send, extra_headers))
+            return
 
         # Check rate limit
         rate_key = f"{client_ip}:{category}"
-        allowed, remaining, reset = _rate_limiter.check(rate_key, limit)
+        if self.limiter.blocking:
+            allowed, remaining, reset = await self.limiter.check_async(rate_key, limit)
+        else:
+            allowed, remaining, reset = self.limiter.check(rate_key, limit)
 
         if not allowed:
             log_extra = ""
@@ -189,7 +403,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 f"Rate limit exceeded: ip={client_ip} category={category} "
                 f"path={path}{log_extra} user_agent={user_agent[:100]}"
             )
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=429,
                 content={"error": "Rate limit exceeded"},
                 headers={
@@ -199,9 +413,12 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "X-RateLimit-Category": category,
                 },
             )
+            await response(scope, receive, send)
+            return
 
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(limit)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Category"] = category
-        return response
+        extra_headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Category": category,
+        }
+        await self.app(scope, receive, _send_with_headers(send, extra_headers))
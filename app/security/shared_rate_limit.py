@@ -0,0 +1,181 @@
+"""
+SQLite-backed rate limiter shared by every worker process on a host.
+
+InMemoryRateLimiter keeps its counters per process, so under
+`uvicorn --workers N` each worker enforces its own limit and a client
+gets N times the quota. This backend keeps the same two-bucket sliding
+window counters in a small SQLite file instead. Each check is one
+atomic UPSERT ... RETURNING, so concurrent workers can never both
+spend the last request of a window.
+
+The counters are disposable: the file runs with synchronous=OFF, and
+if it is locked or broken the check falls back to a per-process
+InMemoryRateLimiter rather than failing the request.
+
+A check is file I/O and can wait up to RATE_LIMIT_BUSY_TIMEOUT_MS for
+another worker's write, so the middleware runs it on this limiter's own
+thread (check_async) rather than on the event loop. The connection is
+shared behind a lock, so one thread is all a worker can use anyway; a
+check normally takes ~30 µs there, and at worst the busy timeout.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from app.db.database import DB_PATH
+from app.security.rate_limit import InMemoryRateLimiter, current_window, sliding_window_reset
+
+logger = logging.getLogger(__name__)
+
+# Shared counter file; every worker on the host must point at the same one
+RATE_LIMIT_DB_PATH = os.getenv(
+    "ACE_RATE_LIMIT_DB_PATH", str(Path(DB_PATH).with_name("rate_limit.db"))
+)
+
+# How long a check waits for another worker's write, in milliseconds
+RATE_LIMIT_BUSY_TIMEOUT_MS = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    window INTEGER NOT NULL,
+    current INTEGER NOT NULL,
+    previous INTEGER NOT NULL,
+    allowed INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rate_limits_window ON rate_limits (window);
+"""
+
+# Roll the key's buckets forward to :window, then count the request only
+# if the sliding-window estimate is under the limit. SET expressions all
+# see the row's old values, so the rolled buckets are spelled out in each.
+CHECK_SQL = """
+INSERT INTO rate_limits (key, window, current, previous, allowed)
+VALUES (:key, :window, 1, 0, 1)
+ON CONFLICT (key) DO UPDATE SET
+    allowed = (
+        CASE WHEN window = :window THEN previous WHEN window = :window - 1 THEN current ELSE 0 END
+        * :weight
+        + CASE WHEN window = :window THEN current ELSE 0 END
+    ) < :limit,
+    current = CASE WHEN window = :window THEN current ELSE 0 END + ((
+        CASE WHEN window = :window THEN previous WHEN window = :window - 1 THEN current ELSE 0 END
+        * :weight
+        + CASE WHEN window = :window THEN current ELSE 0 END
+    ) < :limit),
+    previous = CASE WHEN window = :window THEN previous WHEN window = :window - 1 THEN current ELSE 0 END,
+    window = :window
+RETURNING allowed, current, previous
+"""
+
+# Idle rows removed per statement, so expiry never holds the write lock long
+EXPIRE_BATCH = 500
+
+EXPIRE_SQL = """
+DELETE FROM rate_limits WHERE key IN (
+    SELECT key FROM rate_limits WHERE window < :window - 1 LIMIT :batch
+)
+"""
+
+
+class SQLiteRateLimiter:
+    """Sliding window counter rate limiter stored in a shared SQLite file.
+
+    Same check() contract and arithmetic as InMemoryRateLimiter. Window
+    indexes come from wall-clock time, so all workers agree on them.
+    """
+
+    # check() does file I/O; the middleware awaits check_async() instead
+    blocking = True
+
+    def __init__(
+        self,
+        path: str = RATE_LIMIT_DB_PATH,
+        window_seconds: int = 60,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.window_seconds = window_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._expired_through = -1
+        # Used only while the shared file is unavailable
+        self._fallback = InMemoryRateLimiter(window_seconds, clock=clock)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ace-rate-limit")
+
+        # Operator-visible counters
+        self.expired = 0
+        self.fallbacks = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            self.path,
+            timeout=RATE_LIMIT_BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,  # Autocommit: each statement is its own transaction
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _expire(self, window: int) -> None:
+        """Delete one batch of idle rows; the next window change does the rest."""
+        deleted = self._conn.execute(EXPIRE_SQL, {"window": window, "batch": EXPIRE_BATCH}).rowcount
+        self.expired += deleted
+        if deleted < EXPIRE_BATCH:
+            self._expired_through = window
+
+    def check(self, key: str, limit: int) -> tuple[bool, int, int]:
+        """Check if allowed. Returns (allowed, remaining, reset_seconds)."""
+        window, elapsed = current_window(self.window_seconds, self._clock())
+        try:
+            with self._lock:
+                if self._expired_through != window:
+                    self._expire(window)
+                allowed, current, previous = self._conn.execute(CHECK_SQL, {
+                    "key": key,
+                    "window": window,
+                    "weight": 1 - elapsed,
+                    "limit": limit,
+                }).fetchone()
+        except sqlite3.Error as e:
+            self.fallbacks += 1
+            logger.warning(f"Shared rate limit store unavailable, using in-process limits: {e}")
+            return self._fallback.check(key, limit)
+
+        if not allowed:
+            return False, 0, sliding_window_reset(self.window_seconds, limit, current, previous, elapsed)
+        # current already includes this request
+        estimate = previous * (1 - elapsed) + current
+        return True, max(int(limit - estimate), 0), self.window_seconds
+
+    async def check_async(self, key: str, limit: int) -> tuple[bool, int, int]:
+        """check() on the limiter's thread, keeping file waits off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.check, key, limit)
+
+    def stats(self) -> dict:
+        """Row count and fallback counters for operators."""
+        with self._lock:
+            try:
+                keys = self._conn.execute("SELECT count(*) FROM rate_limits").fetchone()[0]
+            except sqlite3.Error:
+                keys = None
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "keys": keys,
+            "expired": self.expired,
+            "fallbacks": self.fallbacks,
+            "fallback": self._fallback.stats(),
+        }
@@ -0,0 +1,264 @@
+"""
+Prebuilt artifact cache for crawler-facing documents.
+
+sitemap.xml, the RSS feed and llms-full.txt only change when posts do,
+but bots fetch them constantly. Each is rendered once per content change
+and held as bytes alongside precompressed gzip/brotli/zstd variants and a
+strong ETag, so a request is a dict lookup plus a send. The posts service
+clears the cache on every write, and other workers' writes are picked up
+through the shared content version; routes rebuild lazily on the next
+request, and the lifespan warms the registered builders at startup.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.compression import available_encodings, choose_encoding, compress
+from app.db.database import run_in_db
+from app.services.content_version import content_version
+
+# Artifacts are built once per content change, so favour ratio. Brotli
+# stops at 9: 11 is ~30x slower (0.7 s for a 10k-post llms-full.txt) for
+# ~10% less, and the first request after a publish waits on the build.
+# zstd 12 costs about the same as the other two.
+ARTIFACT_LEVELS = {"br": 9, "zstd": 12, "gzip": 9}
+
+# Crawlers that don't revalidate see changes within the hour
+ARTIFACT_CACHE_CONTROL = "public, max-age=3600"
+
+# Suffix added to the ETag of each encoded variant
+ENCODING_ETAG_SUFFIX = {"br": "-br", "zstd": "-zst", "gzip": "-gz"}
+
+
+@dataclass(frozen=True, slots=True)
+class Artifact:
+    """A prebuilt response body and its encoded variants."""
+    body: bytes
+    media_type: str
+    etag: str  # Strong ETag of the identity body, quoted
+    cache_control: str
+    last_modified: Optional[datetime] = None  # Naive UTC
+    variants: dict[str, bytes] = field(default_factory=dict)  # coding -> body
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """ETag for one representation (encodings differ, per RFC 9110)."""
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}{ENCODING_ETAG_SUFFIX[encoding]}"'
+
+
+def build_artifact(
+    body: bytes,
+    media_type: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = ARTIFACT_CACHE_CONTROL
+) -> Artifact:
+    """Hash and precompress a rendered body."""
+    variants = {}
+    for encoding in available_encodings():
+        encoded = compress(body, encoding, ARTIFACT_LEVELS[encoding])
+        # Tiny bodies can grow when compressed; serve those as-is
+        if len(encoded) < len(body):
+            variants[encoding] = encoded
+
+    return Artifact(
+        body=body,
+        media_type=media_type,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        cache_control=cache_control,
+        last_modified=last_modified,
+        variants=variants,
+    )
+
+
+class ArtifactCache:
+    """Prebuilt artifacts keyed by name (and parameters).
+
+    Builders run at most once per key per content version: concurrent
+    misses for the same key wait for the first build (single flight), and
+    a build that started before clear() is never stored. ``version``
+    returns the shared content version; a change seen on lookup clears
+    the cache.
+    """
+
+    def __init__(self, version: Optional[Callable[[], int]] = None):
+        self._version_source = version
+        self._version: Optional[int] = None
+        self._artifacts: dict[Hashable, Artifact] = {}
+        self._build_locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._builders: dict[Hashable, Callable[[], Optional[Artifact]]] = {}
+        self.generation = 0
+
+        # Operator-visible counters
+        self.hits = 0
+        self.builds = 0
+        self.invalidations = 0
+
+    def register(self, key: Hashable, build: Callable[[], Optional[Artifact]]) -> None:
+        """Register a builder that warm() runs at startup."""
+        self._builders[key] = build
+
+    def get_or_build(
+        self, key: Hashable, build: Callable[[], Optional[Artifact]]
+    ) -> Optional[Artifact]:
+        """Return the artifact for key, building it on a miss.
+
+        Blocking (builders query the database); call via run_in_db.
+        A builder returns None for keys that don't exist (e.g. a sitemap
+        page past the end); that isn't cached, so junk keys can't grow it.
+        """
+        with self._lock:
+            self._check_version()
+            artifact = self._artifacts.get(key)
+            if artifact is not None:
+                self.hits += 1
+                return artifact
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                artifact = self._artifacts.get(key)
+                if artifact is not None:
+                    self.hits += 1
+                    return artifact
+                generation = self.generation
+
+            built = False
+            try:
+                artifact = build()
+                built = True
+            finally:
+                # Store before releasing the key, so a miss arriving now
+                # finds the artifact instead of starting a second build
+                with self._lock:
+                    if built:
+                        self.builds += 1
+                        if artifact is not None and generation == self.generation:
+                            self._artifacts[key] = artifact
+                    if self._build_locks.get(key) is build_lock:
+                        del self._build_locks[key]
+            return artifact
+
+    def lookup(self, key: Hashable) -> Optional[Artifact]:
+        """Return a built artifact without building. Safe on the event loop."""
+        with self._lock:
+            self._check_version()
+            artifact = self._artifacts.get(key)
+            if artifact is not None:
+                self.hits += 1
+            return artifact
+
+    def warm(self) -> int:
+        """Build every registered artifact; returns how many were built."""
+        for key, build in self._builders.items():
+            self.get_or_build(key, build)
+        return len(self._builders)
+
+    def _reset(self) -> None:
+        self._artifacts.clear()
+        self._build_locks.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def _check_version(self) -> None:
+        """Reset if another worker wrote since the cache was filled. Caller holds the lock."""
+        if self._version_source is None:
+            return
+        version = self._version_source()
+        if version != self._version:
+            if self._version is not None:
+                self._reset()
+            self._version = version
+
+    def clear(self) -> None:
+        """Drop every artifact (called after any post write)."""
+        with self._lock:
+            self._reset()
+            if self._version_source is not None:
+                self._version = self._version_source()
+
+    def stats(self) -> dict:
+        """Counters and sizes for operators."""
+        with self._lock:
+            return {
+                "entries": len(self._artifacts),
+                "bytes": sum(
+                    len(artifact.body) + sum(map(len, artifact.variants.values()))
+                    for artifact in self._artifacts.values()
+                ),
+                "hits": self.hits,
+                "builds": self.builds,
+                "invalidations": self.invalidations,
+                "encodings": list(available_encodings()),
+            }
+
+
+artifact_cache = ArtifactCache(version=content_version.current)
+
+
+async def get_artifact(
+    key: Hashable, build: Callable[[], Optional[Artifact]]
+) -> Optional[Artifact]:
+    """Cached artifact for key; builds off the event loop on a miss."""
+    artifact = artifact_cache.lookup(key)
+    if artifact is not None:
+        return artifact
+    return await run_in_db(artifact_cache.get_or_build, key, build)
+
+
+def not_modified(request: Request, artifact: Artifact) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against an artifact.
+
+    Any encoded variant's ETag matches, so a cache that stored the gzip
+    copy still revalidates after asking for brotli.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return any(
+            artifact.variant_etag(encoding) in tags
+            for encoding in (None, *artifact.variants)
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and artifact.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        return artifact.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def artifact_response(request: Request, artifact: Artifact) -> Response:
+    """Serve an artifact in the best encoding the client accepts, or a 304."""
+    encoding = choose_encoding(request.headers.get("accept-encoding"), artifact.variants)
+    headers = {
+        "Cache-Control": artifact.cache_control,
+        "ETag": artifact.variant_etag(encoding),
+        "Vary": "Accept-Encoding",
+    }
+    if artifact.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            artifact.last_modified.replace(tzinfo=timezone.utc), usegmt=True
+        )
+
+    if not_modified(request, artifact):
+        return Response(status_code=304, headers=headers)
+
+    if encoding is None:
+        return Response(artifact.body, media_type=artifact.media_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(artifact.variants[encoding], media_type=artifact.media_type, headers=headers)
@@ -0,0 +1,113 @@
+"""
+Shared content version for the per-worker caches.
+
+Every uvicorn worker keeps its own page cache, artifact cache and search
+counts, but a write handled by one worker (an admin edit, the publish
+scheduler, the content watcher) must empty them in all of them. Each
+write bumps the one-row `content_version` table as it clears its own
+caches, and the caches compare the version they were filled under with
+the shared one on lookup.
+
+Lookups run on the event loop, so the shared row is read at most once
+per CONTENT_VERSION_INTERVAL seconds per worker over a dedicated SQLite
+connection (a primary-key SELECT, a few microseconds). Other workers
+therefore see a write within that interval.
+
+`changed_at` also dates the published set as a whole: unpublishing or
+deleting a post doesn't move any remaining post's updated_at, so the
+crawler artifacts' Last-Modified comes from here.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.db.database import DB_PATH, engine
+from app.db.models import ContentVersion
+
+# Longest a worker serves cached content after another worker's write
+CONTENT_VERSION_INTERVAL = float(os.getenv("ACE_CONTENT_VERSION_INTERVAL", "1"))
+
+
+class ContentVersionTracker:
+    """Reads (throttled) and bumps the shared content version."""
+
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        interval: float = CONTENT_VERSION_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.path = path
+        self.interval = interval
+        self._clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._version = 0
+        self._checked_at: Optional[float] = None
+
+        # Operator-visible counters
+        self.reads = 0
+        self.bumps = 0
+
+    def _read(self) -> int:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.reads += 1
+        try:
+            row = self._conn.execute("SELECT version FROM content_version WHERE id = 1").fetchone()
+        except sqlite3.Error:
+            # Table not created yet (before init_db) or the file is busy
+            return self._version
+        return row[0] if row else 0
+
+    def current(self) -> int:
+        """Shared version, at most `interval` seconds old. Safe on the event loop."""
+        now = self._clock()
+        with self._lock:
+            if self._checked_at is None or now - self._checked_at >= self.interval:
+                self._version = self._read()
+                self._checked_at = now
+            return self._version
+
+    def bump(self) -> int:
+        """Record a content change for every worker. Returns the new version.
+
+        Runs in its own short transaction, after the write has committed,
+        so the caller's session and its objects are left alone.
+        """
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            version = conn.execute(
+                sqlite_insert(ContentVersion)
+                .values(id=1, version=1, changed_at=now)
+                .on_conflict_do_update(
+                    index_elements=[ContentVersion.id],
+                    set_={"version": ContentVersion.version + 1, "changed_at": now},
+                )
+                .returning(ContentVersion.version)
+            ).scalar_one()
+
+        with self._lock:
+            self._version = version
+            self._checked_at = self._clock()
+            self.bumps += 1
+        return version
+
+    def stats(self) -> dict:
+        """Current version and counters for operators."""
+        with self._lock:
+            return {
+                "version": self._version,
+                "interval": self.interval,
+                "reads": self.reads,
+                "bumps": self.bumps,
+            }
+
+
+content_version = ContentVersionTracker()
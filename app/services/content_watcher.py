@@ -0,0 +1,95 @@
+"""
+Content directory watcher for Ace Citizenship Blog.
+
+Polls the markdown directory's (mtime, size) stats and syncs edits to the
+database without a restart. A burst of writes (a `git pull`, an editor's
+save-rename dance) is debounced: changes accumulate until the directory
+has been quiet for CONTENT_WATCH_DEBOUNCE seconds, then the whole batch is
+applied in one transaction.
+
+Only deletions observed while running remove posts. Files missing at
+startup are left alone, since posts created through the admin may live
+only in the database after a redeploy.
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from app.db.database import SessionLocal, run_in_db
+from app.services import posts as posts_service
+
+# Seconds between directory scans; 0 disables the watcher
+CONTENT_WATCH_INTERVAL = float(os.getenv("ACE_CONTENT_WATCH_INTERVAL", "2"))
+
+# Quiet period after the last change before a batch is synced
+CONTENT_WATCH_DEBOUNCE = float(os.getenv("ACE_CONTENT_WATCH_DEBOUNCE", "1"))
+
+
+def scan_content_dir() -> dict[Path, tuple[int, int]]:
+    """Map each markdown file to its (mtime_ns, size)."""
+    stats = {}
+    for path in posts_service.CONTENT_DIR.glob('*.md'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        stats[path] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+def sync_changes(modified: list[Path], deleted: list[Path]) -> posts_service.SyncReport:
+    """Apply one debounced batch with its own session."""
+    db = SessionLocal()
+    try:
+        return posts_service.sync_file_changes(db, modified, deleted)
+    finally:
+        db.close()
+
+
+async def watch_content_dir() -> None:
+    """Sync content-directory changes as they settle, until cancelled."""
+    previous = await asyncio.to_thread(scan_content_dir)
+    modified: set[Path] = set()
+    deleted: set[Path] = set()
+    last_change = 0.0
+
+    while True:
+        await asyncio.sleep(CONTENT_WATCH_INTERVAL)
+        try:
+            current = await asyncio.to_thread(scan_content_dir)
+        except OSError as e:
+            print(f"Content watcher: scan failed: {e}")
+            continue
+
+        if current != previous:
+            for path, stat in current.items():
+                if previous.get(path) != stat:
+                    modified.add(path)
+                    deleted.discard(path)
+            for path in previous.keys() - current.keys():
+                deleted.add(path)
+                modified.discard(path)
+            previous = current
+            last_change = time.monotonic()
+            continue
+
+        if not (modified or deleted) or time.monotonic() - last_change < CONTENT_WATCH_DEBOUNCE:
+            continue
+
+        batch_modified, batch_deleted = sorted(modified), sorted(deleted)
+        modified.clear()
+        deleted.clear()
+        try:
+            report = await run_in_db(sync_changes, batch_modified, batch_deleted)
+        except Exception as e:
+            print(f"Content watcher: sync failed: {e}")
+            # Retry the batch after the next quiet period
+            modified.update(batch_modified)
+            deleted.update(batch_deleted)
+            last_change = time.monotonic()
+            continue
+
+        if report.changed:
+            print(f"Content watcher: synced blog posts: {report}")
@@ -0,0 +1,148 @@
+"""
+Rendered-page cache for public blog routes.
+
+Holds fully rendered HTML keyed by route and parameters, bounded by total
+body size (LRU). The posts service clears it on every write, it resets
+itself when another worker's write bumps the shared content version, and
+it expires on its own when the next scheduled post is due to go live.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable, Optional
+
+from app.services.content_version import content_version
+
+# Total bytes of rendered HTML to keep in memory
+PAGE_CACHE_MAX_BYTES = int(os.getenv("ACE_PAGE_CACHE_BYTES", str(16 * 1024 * 1024)))
+
+
+class PageCache:
+    """Byte-bounded LRU cache of rendered response bodies.
+
+    Writers bump ``generation`` via ``clear()``; a render that started
+    before a write passes its starting generation to ``set()`` so a stale
+    page can never be stored after the invalidation. ``version`` returns
+    the shared content version; a change seen on lookup resets the cache.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = PAGE_CACHE_MAX_BYTES,
+        version: Optional[Callable[[], int]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self._version_source = version
+        self._version: Optional[int] = None
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._size = 0
+        self._expires_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        # Operator-visible counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _reset(self) -> None:
+        self._entries.clear()
+        self._size = 0
+        self._expires_at = None
+        self.generation += 1
+
+    def _check_version(self) -> None:
+        """Reset if another worker wrote since the cache was filled. Caller holds the lock."""
+        if self._version_source is None:
+            return
+        version = self._version_source()
+        if version != self._version:
+            if self._version is not None:
+                self.invalidations += 1
+                self._reset()
+            self._version = version
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return the cached body for key, or None on miss."""
+        with self._lock:
+            self._check_version()
+            if self._expires_at is not None and datetime.utcnow() >= self._expires_at:
+                self.invalidations += 1
+                self._reset()
+
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(
+        self,
+        key: Hashable,
+        body: bytes,
+        generation: int,
+        expires_at: Optional[datetime] = None,
+    ) -> None:
+        """Store a rendered body.
+
+        Args:
+            key: Cache key (route name plus parameters)
+            body: Rendered response body
+            generation: Value of ``generation`` read before rendering started
+            expires_at: UTC time after which the whole cache is stale
+                (e.g. the next scheduled post's ``scheduled_at``)
+        """
+        if len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+
+            self._entries[key] = body
+            self._size += len(body)
+
+            if expires_at is not None and (self._expires_at is None or expires_at < self._expires_at):
+                self._expires_at = expires_at
+
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached page (called after any post write)."""
+        with self._lock:
+            self.invalidations += 1
+            self._reset()
+            if self._version_source is not None:
+                self._version = self._version_source()
+
+    def stats(self) -> dict:
+        """Counters and sizes for operators."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "expires_at": self._expires_at.isoformat() if self._expires_at else None,
+            }
+
+
+page_cache = PageCache(version=content_version.current)
@@ -4,17 +4,81 @@ CRUD operations and markdown file sync.
 """
 
 import hashlib
+import html as html_lib
+import math
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from datetime import datetime, date
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
 import frontmatter
 import markdown
 import nh3
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from markupsafe import Markup, escape
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import (
+    or_, and_, select, update, delete, insert, func, literal_column, true, false,
+    tuple_, bindparam,
+)
+
+from app.db.models import ContentVersion, Post, RenderCache, posts_fts, reading_time_minutes
+from app.services.artifacts import artifact_cache
+from app.services.content_version import content_version
+from app.services.page_cache import page_cache
+
+# Columns needed to render post cards (lists, related posts, feeds).
+# Loading only these keeps content_md/content_html off the wire. Column
+# order matches the PostSummary fields, so column-only SELECTs of them
+# map straight onto it.
+CARD_COLUMNS = (
+    Post.id,
+    Post.slug,
+    Post.title,
+    Post.excerpt,
+    Post.featured_image,
+    Post.published_at,
+    Post.updated_at,
+    Post.word_count,
+)
+
+
+@dataclass(slots=True, frozen=True)
+class PostSummary:
+    """Lightweight published-post row for lists, feeds, sitemap and llms-full.
+
+    Built from a column-only SELECT, so there is no ORM instance, identity
+    map entry or markdown/HTML payload per row.
+    """
+    id: int
+    slug: str
+    title: str
+    excerpt: Optional[str]
+    featured_image: Optional[str]
+    published_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    word_count: Optional[int]
+    snippet: Optional[Markup] = None  # Highlighted search match, if any
+
+    @property
+    def reading_time(self) -> int:
+        """Reading time in minutes (~200 words/min)."""
+        return reading_time_minutes(self.word_count)
+
+    @property
+    def cursor(self) -> tuple[Optional[datetime], int]:
+        """Keyset position of this row, for the `after` argument of list queries."""
+        return self.published_at, self.id
 
-from app.db.models import Post
 
 # Content directory for markdown files
 CONTENT_DIR = Path(__file__).parent.parent.parent / "content" / "blog"
@@ -60,18 +124,50 @@ def parse_date(value: Union[str, date, datetime, None]) -> Optional[datetime]:
     return None
 
 
-def render_markdown(content: str) -> str:
-    """Convert markdown to HTML with XSS sanitization."""
-    md = markdown.Markdown(extensions=['extra', 'codehilite', 'toc'])
-    html = md.convert(content)
-    # Sanitize HTML to prevent XSS attacks
-    sanitized = nh3.clean(
-        html,
+MARKDOWN_EXTENSIONS = ('extra', 'codehilite', 'toc')
+
+# Sanitizer configuration is built once and frozen. nh3.Cleaner keeps the
+# compiled allow-lists; older nh3 releases without it re-read the sets per call.
+if hasattr(nh3, "Cleaner"):
+    sanitize_html = nh3.Cleaner(
         tags=ALLOWED_TAGS,
         attributes=ALLOWED_ATTRIBUTES,
         link_rel="noopener noreferrer"
-    )
-    return sanitized
+    ).clean
+else:
+    def sanitize_html(html: str) -> str:
+        return nh3.clean(
+            html,
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            link_rel="noopener noreferrer"
+        )
+
+# One Markdown instance per thread (and so per worker process); building one
+# loads every extension, so instances are reset and reused between documents
+_markdown_local = threading.local()
+
+
+def get_markdown() -> markdown.Markdown:
+    """Return this thread's Markdown instance, reset for a new document."""
+    md = getattr(_markdown_local, "md", None)
+    if md is None:
+        md = _markdown_local.md = markdown.Markdown(extensions=list(MARKDOWN_EXTENSIONS))
+    return md.reset()
+
+
+def _convert_markdown(content: str) -> tuple[str, list[dict]]:
+    """Convert markdown to sanitized HTML, returning the heading tokens too."""
+    md = get_markdown()
+    html = md.convert(content)
+    # Sanitize HTML to prevent XSS attacks
+    return sanitize_html(html), md.toc_tokens
+
+
+def render_markdown(content: str) -> str:
+    """Convert markdown to HTML with XSS sanitization."""
+    html, _ = _convert_markdown(content)
+    return html
 
 
 def compute_checksum(content: str) -> str:
@@ -79,6 +175,34 @@ def compute_checksum(content: str) -> str:
     return hashlib.sha256(content.encode()).hexdigest()
 
 
+def count_words(content_md: str) -> int:
+    """Count whitespace-separated words in markdown source."""
+    return len(content_md.split())
+
+
+def build_toc(toc_tokens: list[dict]) -> list[dict]:
+    """Flatten Python-Markdown toc tokens into an ordered heading outline.
+
+    Returns list of {"level": int, "id": str, "title": str} dicts.
+    """
+    toc = []
+    for token in toc_tokens:
+        toc.append({
+            "level": token["level"],
+            "id": token["id"],
+            "title": html_lib.unescape(token["name"]),
+        })
+        toc.extend(build_toc(token["children"]))
+    return toc
+
+
+# Patterns for FAQ extraction, compiled once
+FAQ_QUESTION_PATTERN = re.compile(r'<h[23][^>]*>([^<]*\?)</h[23]>', re.IGNORECASE)
+FAQ_HEADER_START_PATTERN = re.compile(r'<h[1-6]', re.IGNORECASE)
+FAQ_PARAGRAPH_PATTERN = re.compile(r'<p[^>]*>(.*?)</p>', re.IGNORECASE | re.DOTALL)
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
 def extract_faq_items(content_html: str, max_items: int = 10) -> list[dict]:
     """
     Extract FAQ items from HTML content for Schema.org FAQPage markup.
@@ -86,39 +210,27 @@ def extract_faq_items(content_html: str, max_items: int = 10) -> list[dict]:
     Looks for h2/h3 headers that are questions (end with ?) and pairs them
     with the following paragraph text as answers.
 
+    Runs once at write time (see set_post_content). Searches by position
+    instead of slicing, so long posts aren't copied once per header.
+
     Returns list of {"question": str, "answer": str} dicts.
     """
-    import re
-
     faq_items = []
 
-    # Pattern: h2 or h3 ending with ? followed by content until next h2/h3
-    # This regex finds question headers and captures their text
-    question_pattern = re.compile(
-        r'<h[23][^>]*>([^<]*\?)</h[23]>\s*<p>([^<]+(?:<[^/][^>]*>[^<]*</[^>]+>)*[^<]*)</p>',
-        re.IGNORECASE | re.DOTALL
-    )
-
-    # Simpler approach: find h2/h3 questions, then get next paragraph
-    header_pattern = re.compile(r'<h[23][^>]*>([^<]*\?)</h[23]>', re.IGNORECASE)
-    headers = list(header_pattern.finditer(content_html))
-
-    for match in headers[:max_items]:
+    for match in islice(FAQ_QUESTION_PATTERN.finditer(content_html), max_items):
         question = match.group(1).strip()
         # Find the content after this header until the next header
         start_pos = match.end()
-        next_header = re.search(r'<h[1-6]', content_html[start_pos:], re.IGNORECASE)
-        end_pos = start_pos + next_header.start() if next_header else len(content_html)
+        next_header = FAQ_HEADER_START_PATTERN.search(content_html, start_pos)
+        end_pos = next_header.start() if next_header else len(content_html)
 
-        answer_section = content_html[start_pos:end_pos]
         # Extract text from paragraphs
-        para_pattern = re.compile(r'<p[^>]*>(.*?)</p>', re.IGNORECASE | re.DOTALL)
-        paras = para_pattern.findall(answer_section)
+        paras = FAQ_PARAGRAPH_PATTERN.findall(content_html, start_pos, end_pos)
 
         if paras:
             # Clean HTML tags from answer
             answer = ' '.join(paras[:2])  # Take first 2 paragraphs
-            answer = re.sub(r'<[^>]+>', '', answer).strip()
+            answer = HTML_TAG_PATTERN.sub('', answer).strip()
             answer = ' '.join(answer.split())  # Normalize whitespace
 
             if answer and len(answer) > 20:  # Skip very short answers
@@ -130,6 +242,231 @@ def extract_faq_items(content_html: str, max_items: int = 10) -> list[dict]:
     return faq_items
 
 
+def render_post_content(content_md: str) -> dict:
+    """Render markdown and derive every stored column from it.
+
+    Returns a dict of Post attribute values. Pure function of the markdown,
+    so it can run in a worker process.
+    """
+    content_html, toc_tokens = _convert_markdown(content_md)
+    return {
+        "content_md": content_md,
+        "content_html": content_html,
+        "faq_items": extract_faq_items(content_html),
+        "toc": build_toc(toc_tokens),
+        "word_count": count_words(content_md),
+        "checksum": compute_checksum(content_md),
+    }
+
+
+# Batches at least this large are rendered in a process pool
+RENDER_PROCESS_POOL_MIN = 16
+
+
+def available_cpus() -> int:
+    """CPUs this process may actually use.
+
+    os.cpu_count() reports every CPU on the host, even inside a container
+    limited to one or two, so honour the affinity mask and a cgroup v2 quota.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+# Render pool size; each worker is a full interpreter with the app imported
+RENDER_WORKERS = int(os.getenv("ACE_RENDER_WORKERS", str(min(available_cpus(), 4))))
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared render pool, started on first use; None if there is one worker.
+
+    Workers are spawned rather than forked: forking a process that runs
+    the database and event loop threads can copy a held lock into the
+    child. Spawning costs an import of the app per worker, paid once
+    since the pool is kept for the life of the process.
+    """
+    global _render_pool
+    if RENDER_WORKERS <= 1:
+        return None
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the render pool's workers (on application shutdown)."""
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def render_many(contents: list[str]) -> list[dict]:
+    """render_post_content() over a batch, in order.
+
+    Large batches fan out across the render pool, where each worker reuses
+    its own Markdown instance for every document it gets. If a worker dies
+    the pool is replaced on the next batch and this one renders in-process.
+    """
+    pool = get_render_pool() if len(contents) >= RENDER_PROCESS_POOL_MIN else None
+    if pool is not None:
+        try:
+            return list(pool.map(render_post_content, contents, chunksize=4))
+        except BrokenProcessPool:
+            print("Render pool broke; rendering this batch in-process")
+            shutdown_render_pool()
+    return [render_post_content(content_md) for content_md in contents]
+
+
+# Bump whenever rendered output changes (Markdown extensions, sanitizer
+# allow-lists, FAQ or TOC extraction) so cached renders stop matching
+RENDERER_VERSION = 1
+
+# Render cache lookups since startup, for /admin/stats
+render_cache_stats = {"hits": 0, "misses": 0}
+
+
+def render_contents(db: Session, contents: list[str]) -> list[dict]:
+    """render_many() through the persistent render cache.
+
+    Looks every checksum up in render_cache, renders only the misses and
+    adds them to the session (committed with the caller's transaction), so
+    identical content is never rendered twice by any worker or deploy.
+    """
+    checksums = [compute_checksum(content_md) for content_md in contents]
+    cached = {
+        row.checksum: row
+        for row in db.execute(
+            select(RenderCache.checksum, RenderCache.content_html,
+                   RenderCache.faq_items, RenderCache.toc)
+            .where(
+                RenderCache.checksum.in_(set(checksums)),
+                RenderCache.renderer_version == RENDERER_VERSION
+            )
+        )
+    } if contents else {}
+
+    misses = {}
+    for checksum, content_md in zip(checksums, contents):
+        if checksum not in cached:
+            misses[checksum] = content_md
+    rendered = dict(zip(misses, render_many(list(misses.values()))))
+    render_cache_stats["hits"] += len(contents) - len(misses)
+    render_cache_stats["misses"] += len(misses)
+
+    if rendered:
+        # Another worker may have cached the same content meanwhile
+        db.execute(
+            sqlite_insert(RenderCache).on_conflict_do_nothing(),
+            [
+                {
+                    "checksum": checksum,
+                    "renderer_version": RENDERER_VERSION,
+                    "content_html": result["content_html"],
+                    "faq_items": result["faq_items"],
+                    "toc": result["toc"],
+                    "created_at": datetime.utcnow(),
+                }
+                for checksum, result in rendered.items()
+            ]
+        )
+
+    results = []
+    for checksum, content_md in zip(checksums, contents):
+        if checksum in rendered:
+            results.append(rendered[checksum])
+            continue
+        row = cached[checksum]
+        results.append({
+            "content_md": content_md,
+            "content_html": row.content_html,
+            "faq_items": row.faq_items,
+            "toc": row.toc,
+            "word_count": count_words(content_md),
+            "checksum": checksum,
+        })
+    return results
+
+
+def prune_render_cache(db: Session) -> int:
+    """Drop cached renders from other renderer versions or no current post.
+
+    Returns:
+        Number of entries removed
+    """
+    removed = db.execute(
+        delete(RenderCache).where(
+            or_(
+                RenderCache.renderer_version != RENDERER_VERSION,
+                RenderCache.checksum.not_in(
+                    select(Post.checksum).where(Post.checksum.is_not(None))
+                )
+            )
+        )
+    ).rowcount
+    db.commit()
+    return removed
+
+
+def set_post_content(post: Post, content_md: str, rendered: Optional[dict] = None) -> None:
+    """Set markdown content and everything derived from it.
+
+    Renders HTML and stores the FAQ items, heading outline and word count
+    so the request path only reads columns. Pass `rendered` (from
+    render_post_content) when it was already computed elsewhere.
+    """
+    if rendered is None:
+        rendered = render_post_content(content_md)
+    for name, value in rendered.items():
+        setattr(post, name, value)
+
+
+def is_live_at(post: Post, now: datetime) -> bool:
+    """Whether a post is visible on the public site at `now`."""
+    return post.status == 'published' or (
+        post.status == 'scheduled'
+        and post.scheduled_at is not None
+        and post.scheduled_at <= now
+    )
+
+
+def set_post_visibility(post: Post) -> None:
+    """Recompute `is_live` after a status or schedule change.
+
+    Live posts always carry a published_at (falling back to the scheduled
+    time, then now) so public listings can order and page on it.
+    """
+    now = datetime.utcnow()
+    post.is_live = is_live_at(post, now)
+    if post.is_live and post.published_at is None:
+        post.published_at = post.scheduled_at or now
+
+
+def invalidate_caches() -> None:
+    """Drop cached pages, counts and artifacts after a write that may change what they show.
+
+    Bumps the shared content version first, so other workers drop theirs too.
+    """
+    content_version.bump()
+    page_cache.clear()
+    artifact_cache.clear()
+    _search_totals.clear()
+
+
 # =============================================================================
 # READ OPERATIONS
 # =============================================================================
@@ -159,6 +496,90 @@ def list_posts(
     return query.order_by(Post.created_at.desc()).offset(offset).limit(limit).all()
 
 
+def published_filter():
+    """SQL predicate for posts visible on the public site.
+
+    Reads the materialized `is_live` flag so listings are a range scan on
+    idx_posts_live_published; see promote_due_posts() for how scheduled
+    posts become live.
+    """
+    return Post.is_live == true()
+
+
+def live_predicate(now: datetime):
+    """SQL form of is_live_at(), used to recompute `is_live` in bulk."""
+    return or_(
+        Post.status == 'published',
+        and_(
+            Post.status == 'scheduled',
+            Post.scheduled_at <= now
+        )
+    )
+
+
+# Newest first; id breaks ties so keyset pagination is stable
+PUBLISHED_ORDER = (Post.published_at.desc(), Post.id.desc())
+
+
+def after_cursor(cursor: tuple[datetime, int]):
+    """SQL predicate for rows that sort after `cursor` in PUBLISHED_ORDER.
+
+    A row-value comparison, which SQLite turns into a single index seek.
+    Live posts always have published_at set (see set_post_visibility).
+    """
+    return tuple_(Post.published_at, Post.id) < tuple_(*cursor)
+
+
+def page_of(stmt, conditions: tuple, limit: int, offset: int = 0):
+    """`stmt` (the columns to return) for one page of posts in PUBLISHED_ORDER.
+
+    The page's ids come from a narrow inner query that idx_posts_live_published
+    covers, so skipped rows are never read from the table; only the page's
+    rows are then fetched by primary key.
+    """
+    page = (
+        select(Post.id)
+        .where(*conditions)
+        .order_by(*PUBLISHED_ORDER)
+        .offset(offset)
+        .limit(limit)
+        .subquery()
+    )
+    return stmt.join_from(page, Post, Post.id == page.c.id).order_by(*PUBLISHED_ORDER)
+
+
+def paginate(db: Session, stmt, conditions: tuple, limit: int, offset: int) -> tuple[list, int]:
+    """Run one page of posts and return (rows, total) from a single query.
+
+    A narrow inner query picks the page's ids in PUBLISHED_ORDER and
+    carries the total as COUNT(*) OVER(), evaluated before LIMIT/OFFSET;
+    `stmt` (the columns to return) is joined onto just those ids. A page
+    past the end has no rows to carry the total, so only then is a
+    separate count issued.
+    """
+    page = (
+        select(Post.id, func.count().over().label("total"))
+        .where(*conditions)
+        .order_by(*PUBLISHED_ORDER)
+        .offset(offset)
+        .limit(limit)
+        .subquery()
+    )
+    rows = db.execute(
+        stmt.add_columns(page.c.total)
+        .join_from(page, Post, Post.id == page.c.id)
+        .order_by(*PUBLISHED_ORDER)
+    ).all()
+    if rows:
+        return [row[:-1] for row in rows], rows[0][-1]
+    if offset == 0:
+        return [], 0
+    total = db.execute(
+        select(func.count()).select_from(Post).where(*conditions)
+    ).scalar_one()
+    return [], total
+
+
 def get_published_posts(
     db: Session,
     limit: int = 12,
@@ -173,21 +594,93 @@ def get_published_posts(
     Returns:
         Tuple of (posts, total_count)
     """
-    now = datetime.utcnow()
-    query = db.query(Post).filter(
-        or_(
-            Post.status == 'published',
-            and_(
-                Post.status == 'scheduled',
-                Post.scheduled_at <= now
-            )
-        )
-    )
+    stmt = select(Post).options(load_only(*CARD_COLUMNS))
+    rows, total = paginate(db, stmt, (published_filter(),), limit, offset)
 
-    total = query.count()
-    posts = query.order_by(Post.published_at.desc()).offset(offset).limit(limit).all()
+    return [row[0] for row in rows], total
 
-    return posts, total
+
+def list_published_summaries(
+    db: Session,
+    limit: int = 12,
+    offset: int = 0,
+    after: Optional[tuple[datetime, int]] = None
+) -> list[PostSummary]:
+    """List published posts as PostSummary rows, newest first.
+
+    Pass the last row's `cursor` as `after` to fetch the next page by
+    keyset instead of offset, so deep pages cost the same as the first.
+    """
+    conditions = (published_filter(),)
+    if after is not None:
+        conditions += (after_cursor(after),)
+    stmt = page_of(select(*CARD_COLUMNS), conditions, limit, offset)
+    return [PostSummary(*row) for row in db.execute(stmt)]
+
+
+# Columns for sitemap entries; all served from idx_posts_live_published
+SITEMAP_COLUMNS = (Post.id, Post.slug, Post.published_at, Post.updated_at)
+
+
+def iter_published_rows(
+    db: Session,
+    columns: tuple = CARD_COLUMNS,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    batch_size: int = 500
+) -> Iterator:
+    """Yield `columns` of published posts newest first, without a size cap.
+
+    Rows are fetched in keyset batches, so memory stays flat however many
+    posts there are and every batch after the first is an index seek.
+    `columns` must include Post.published_at and Post.id.
+    """
+    after = None
+    while limit is None or limit > 0:
+        size = batch_size if limit is None else min(batch_size, limit)
+        stmt = select(*columns).where(published_filter())
+        if after is not None:
+            stmt = stmt.where(after_cursor(after))
+        else:
+            stmt = stmt.offset(offset)
+        rows = db.execute(stmt.order_by(*PUBLISHED_ORDER).limit(size)).all()
+        yield from rows
+        if len(rows) < size:
+            return
+        after = (rows[-1].published_at, rows[-1].id)
+        if limit is not None:
+            limit -= len(rows)
+
+
+def get_published_state(db: Session) -> tuple[int, Optional[datetime]]:
+    """Count of published posts and when the published set last changed.
+
+    The time is the later of the newest updated_at and the shared content
+    version's changed_at. updated_at alone misses posts leaving the set
+    (unpublished, deleted) and scheduled posts going live, which keep it.
+    Answered from idx_posts_live_published and the one-row version table;
+    used to build cache validators (ETag / Last-Modified) without loading
+    any posts.
+    """
+    count, posts_modified, content_changed = db.execute(
+        select(
+            func.count(),
+            func.max(Post.updated_at),
+            select(ContentVersion.changed_at).scalar_subquery(),
+        ).where(published_filter())
+    ).one()
+    return count, max(filter(None, (posts_modified, content_changed)), default=None)
+
+
+def get_published_summaries(
+    db: Session,
+    limit: int = 12,
+    offset: int = 0
+) -> tuple[list[PostSummary], int]:
+    """Get a page of published PostSummary rows plus the total count."""
+    conditions = (published_filter(),)
+    rows, total = paginate(db, select(*CARD_COLUMNS), conditions, limit, offset)
+    return [PostSummary(*row) for row in rows], total
 
 
 def get_related_posts(
@@ -196,17 +689,26 @@ def get_related_posts(
     limit: int = 3
 ) -> list[Post]:
     """Get related posts for display at end of article."""
-    now = datetime.utcnow()
-    return db.query(Post).filter(
-        Post.id != current_post_id,
-        or_(
-            Post.status == 'published',
-            and_(
-                Post.status == 'scheduled',
-                Post.scheduled_at <= now
-            )
-        )
-    ).order_by(Post.published_at.desc()).limit(limit).all()
+    stmt = page_of(
+        select(Post).options(load_only(*CARD_COLUMNS)),
+        (Post.id != current_post_id, published_filter()),
+        limit,
+    )
+    return db.execute(stmt).scalars().all()
+
+
+def get_next_scheduled_at(db: Session) -> Optional[datetime]:
+    """Get the time the next scheduled post goes live, if any.
+
+    May be in the past when a post is due but not yet promoted; callers
+    treat that as "now".
+    """
+    row = db.query(Post.scheduled_at).filter(
+        Post.status == 'scheduled',
+        Post.is_live == false(),
+        Post.scheduled_at.is_not(None)
+    ).order_by(Post.scheduled_at.asc()).first()
+    return row.scheduled_at if row else None
 
 
 def search_published_posts(
@@ -214,32 +716,136 @@ def search_published_posts(
     query_text: str,
     limit: int = 12,
     offset: int = 0
-) -> tuple[list[Post], int]:
-    """Search published posts by title and content."""
-    now = datetime.utcnow()
-    search_pattern = f"%{query_text}%"
+) -> tuple[list[PostSummary], int]:
+    """Search published posts by title, excerpt and content.
 
-    query = db.query(Post).filter(
-        or_(
-            Post.status == 'published',
-            and_(
-                Post.status == 'scheduled',
-                Post.scheduled_at <= now
-            )
-        ),
-        or_(
-            Post.title.ilike(search_pattern),
-            Post.content_md.ilike(search_pattern),
-            Post.excerpt.ilike(search_pattern)
+    Uses the posts_fts index ranked by bm25 (title matches weigh most), and
+    attaches a highlighted snippet of the best-matching text to each row.
+    """
+    match_query = build_search_query(query_text)
+    if not match_query:
+        return [], 0
+
+    fts = literal_column("posts_fts")
+    conditions = (
+        fts.op("MATCH")(match_query),
+        # Unary + keeps SQLite off idx_posts_live_published here: with the
+        # index, posts becomes the outer loop and MATCH runs once per post
+        literal_column("+posts.is_live") == true(),
+    )
+    source = posts_fts.join(Post, Post.id == posts_fts.c.rowid)
+
+    # FTS5 ranking/snippet functions can't share a query with COUNT(*) OVER(),
+    # so totals are memoized per query and content version
+    totals_key = (content_version.current(), match_query)
+    total = _search_totals.get(totals_key)
+    if total is None:
+        total = db.execute(
+            select(func.count()).select_from(source).where(*conditions)
+        ).scalar_one()
+        _search_totals[totals_key] = total
+        if len(_search_totals) > SEARCH_TOTALS_MAX:
+            _search_totals.popitem(last=False)
+
+    stmt = (
+        select(
+            *CARD_COLUMNS,
+            func.snippet(fts, -1, SNIPPET_START, SNIPPET_END, "…", SNIPPET_TOKENS),
         )
+        .select_from(source)
+        .where(*conditions)
+        .order_by(func.bm25(fts, *SEARCH_WEIGHTS), *PUBLISHED_ORDER)
+        .offset(offset)
+        .limit(limit)
     )
-
-    total = query.count()
-    posts = query.order_by(Post.published_at.desc()).offset(offset).limit(limit).all()
+    posts = [
+        PostSummary(*row[:-1], snippet=highlight_snippet(row[-1]))
+        for row in db.execute(stmt)
+    ]
 
     return posts, total
 
 
+# =============================================================================
+# SEARCH INDEX
+# =============================================================================
+
+# bm25 column weights for (title, excerpt, body)
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+SEARCH_MAX_TERMS = 10
+SNIPPET_TOKENS = 24
+# Control characters mark matches so the snippet can be escaped safely
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+
+SEARCH_TERM_PATTERN = re.compile(r'\w+')
+
+# Match counts per (content version, FTS query), cleared by invalidate_caches();
+# other workers' writes change the version, so their entries age out
+SEARCH_TOTALS_MAX = 256
+_search_totals: OrderedDict[tuple[int, str], int] = OrderedDict()
+
+
+def build_search_query(query_text: str) -> str:
+    """Turn free-text input into an FTS5 MATCH expression.
+
+    Each word becomes a quoted prefix term, so user input can't inject FTS
+    syntax and partial words still match as they're typed.
+    """
+    terms = SEARCH_TERM_PATTERN.findall(query_text)[:SEARCH_MAX_TERMS]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def highlight_snippet(snippet: Optional[str]) -> Optional[Markup]:
+    """Escape an FTS snippet and wrap its matches in <mark>."""
+    if not snippet:
+        return None
+    escaped = str(escape(snippet))
+    return Markup(escaped.replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>"))
+
+
+def html_to_text(content_html: str) -> str:
+    """Strip tags from rendered HTML for indexing."""
+    return " ".join(html_lib.unescape(HTML_TAG_PATTERN.sub(" ", content_html)).split())
+
+
+def index_post_for_search(db: Session, post: Post) -> None:
+    """Insert or replace a post's row in the search index (no commit)."""
+    db.execute(delete(posts_fts).where(posts_fts.c.rowid == post.id))
+    db.execute(insert(posts_fts).values(
+        rowid=post.id,
+        title=post.title,
+        excerpt=post.excerpt or "",
+        body=html_to_text(post.content_html or ""),
+    ))
+
+
+def remove_post_from_search(db: Session, post_id: int) -> None:
+    """Remove a post's row from the search index (no commit)."""
+    db.execute(delete(posts_fts).where(posts_fts.c.rowid == post_id))
+
+
+def rebuild_search_index(db: Session) -> int:
+    """Rebuild the search index from the posts table if it's out of step.
+
+    Returns:
+        Number of posts indexed (0 if the index was already complete)
+    """
+    indexed = db.execute(select(func.count()).select_from(posts_fts)).scalar_one()
+    total = db.query(Post.id).count()
+    if indexed == total:
+        return 0
+
+    db.execute(delete(posts_fts))
+    for post in db.query(Post).options(
+        load_only(Post.id, Post.title, Post.excerpt, Post.content_html)
+    ).yield_per(100):
+        index_post_for_search(db, post)
+    db.commit()
+
+    return total
+
+
 # =============================================================================
 # WRITE OPERATIONS
 # =============================================================================
@@ -256,22 +862,20 @@ def create_post(
     sync_to_file: bool = True
 ) -> Post:
     """Create a new post."""
-    content_html = render_markdown(content_md)
-
     post = Post(
         title=title,
         slug=slug,
         excerpt=excerpt,
-        content_md=content_md,
-        content_html=content_html,
         featured_image=featured_image,
         seo_title=seo_title,
         seo_description=seo_description,
-        status='draft',
-        checksum=compute_checksum(content_md)
+        status='draft'
     )
+    set_post_content(post, content_md, render_contents(db, [content_md])[0])
 
     db.add(post)
+    db.flush()
+    index_post_for_search(db, post)
     db.commit()
     db.refresh(post)
 
@@ -279,6 +883,8 @@ def create_post(
         sync_post_to_file(post)
         db.commit()
 
+    invalidate_caches()
+
     return post
 
 
@@ -302,10 +908,8 @@ def update_post(
         post.slug = slug
     if excerpt is not None:
         post.excerpt = excerpt
-    if content_md is not None:
-        post.content_md = content_md
-        post.content_html = render_markdown(content_md)
-        post.checksum = compute_checksum(content_md)
+    if content_md is not None and compute_checksum(content_md) != post.checksum:
+        set_post_content(post, content_md, render_contents(db, [content_md])[0])
     if featured_image is not None:
         post.featured_image = featured_image
     if seo_title is not None:
@@ -314,9 +918,11 @@ def update_post(
         post.seo_description = seo_description
     if status is not None:
         post.status = status
+        set_post_visibility(post)
 
     post.updated_at = datetime.utcnow()
 
+    index_post_for_search(db, post)
     db.commit()
     db.refresh(post)
 
@@ -324,6 +930,8 @@ def update_post(
         sync_post_to_file(post)
         db.commit()
 
+    invalidate_caches()
+
     return post
 
 
@@ -334,15 +942,19 @@ def delete_post(db: Session, post: Post) -> None:
         if file_path.exists():
             file_path.unlink()
 
+    remove_post_from_search(db, post.id)
     db.delete(post)
     db.commit()
 
+    invalidate_caches()
+
 
 def publish_post(db: Session, post: Post) -> Post:
     """Publish a post."""
     post.status = 'published'
     post.published_at = datetime.utcnow()
     post.updated_at = datetime.utcnow()
+    set_post_visibility(post)
 
     db.commit()
     db.refresh(post)
@@ -350,6 +962,8 @@ def publish_post(db: Session, post: Post) -> Post:
     sync_post_to_file(post)
     db.commit()
 
+    invalidate_caches()
+
     return post
 
 
@@ -357,6 +971,7 @@ def unpublish_post(db: Session, post: Post) -> Post:
     """Revert post to draft status."""
     post.status = 'draft'
     post.updated_at = datetime.utcnow()
+    set_post_visibility(post)
 
     db.commit()
     db.refresh(post)
@@ -364,6 +979,8 @@ def unpublish_post(db: Session, post: Post) -> Post:
     sync_post_to_file(post)
     db.commit()
 
+    invalidate_caches()
+
     return post
 
 
@@ -373,6 +990,7 @@ def schedule_post(db: Session, post: Post, scheduled_at: datetime) -> Post:
     post.scheduled_at = scheduled_at
     post.published_at = scheduled_at
     post.updated_at = datetime.utcnow()
+    set_post_visibility(post)
 
     db.commit()
     db.refresh(post)
@@ -380,6 +998,8 @@ def schedule_post(db: Session, post: Post, scheduled_at: datetime) -> Post:
     sync_post_to_file(post)
     db.commit()
 
+    invalidate_caches()
+
     return post
 
 
@@ -413,76 +1033,311 @@ def sync_post_to_file(post: Post) -> Path:
     with open(file_path, 'w', encoding='utf-8') as f:
         f.write(frontmatter.dumps(fm_post))
 
+    stat = file_path.stat()
     post.file_path = str(file_path)
+    post.file_mtime_ns = stat.st_mtime_ns
+    post.file_size = stat.st_size
 
     return file_path
 
 
+@dataclass(slots=True)
+class PostFile:
+    """A markdown file read from the content directory."""
+    path: Path
+    mtime_ns: int
+    size: int
+    slug: str
+    metadata: dict
+    content_md: str
+    checksum: str
+
+
+@dataclass(slots=True)
+class SyncReport:
+    """What a file sync did, for startup and watcher logging."""
+    scanned: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    rendered: int = 0
+    seconds: float = 0.0
+    slugs: list[str] = field(default_factory=list)  # Created, updated or deleted
+
+    @property
+    def changed(self) -> int:
+        return self.created + self.updated + self.deleted
+
+    def __str__(self) -> str:
+        return (
+            f"{self.scanned} scanned, {self.created} created, {self.updated} updated, "
+            f"{self.deleted} deleted, {self.unchanged} unchanged "
+            f"({self.rendered} rendered) in {self.seconds * 1000:.1f} ms"
+        )
+
+
+def read_post_file(file_path: Path) -> Optional[PostFile]:
+    """Read and parse a markdown file, or None if it no longer exists.
+
+    The file is stat'ed before reading, so an edit that lands mid-read
+    leaves a newer mtime for the next sync to pick up.
+    """
+    try:
+        stat = file_path.stat()
+        with open(file_path, 'r', encoding='utf-8') as f:
+            fm_post = frontmatter.load(f)
+    except FileNotFoundError:
+        return None
+
+    return PostFile(
+        path=file_path,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        slug=fm_post.metadata.get('slug') or file_path.stem,
+        metadata=fm_post.metadata,
+        content_md=fm_post.content,
+        checksum=compute_checksum(fm_post.content),
+    )
+
+
+def apply_post_files(db: Session, post_files: list[PostFile]) -> SyncReport:
+    """Write parsed markdown files to the database in one transaction.
+
+    Files whose content checksum matches the stored post only have their
+    stat recorded; the rest are rendered (in parallel for large batches),
+    copied onto their posts and re-indexed.
+    """
+    # Last file wins if two files claim the same slug
+    post_files = list({post_file.slug: post_file for post_file in post_files}.values())
+    report = SyncReport(scanned=len(post_files))
+    slugs = [post_file.slug for post_file in post_files]
+    posts = {
+        post.slug: post
+        for post in db.query(Post).filter(Post.slug.in_(slugs))
+    } if slugs else {}
+
+    stale = [
+        post_file for post_file in post_files
+        if post_file.slug not in posts or posts[post_file.slug].checksum != post_file.checksum
+    ]
+    rendered = render_contents(db, [post_file.content_md for post_file in stale])
+    report.rendered = len(rendered)
+
+    # Unchanged content: record the stat without touching updated_at
+    stale_slugs = {post_file.slug for post_file in stale}
+    stat_rows = [
+        {
+            "post_id": posts[post_file.slug].id,
+            "file_path": str(post_file.path),
+            "file_mtime_ns": post_file.mtime_ns,
+            "file_size": post_file.size,
+        }
+        for post_file in post_files
+        if post_file.slug not in stale_slugs
+    ]
+    if stat_rows:
+        posts_table = Post.__table__
+        db.execute(
+            update(posts_table)
+            .where(posts_table.c.id == bindparam("post_id"))
+            .values(updated_at=posts_table.c.updated_at),
+            stat_rows,
+        )
+    report.unchanged = len(stat_rows)
+
+    changed = []
+    for post_file, content in zip(stale, rendered):
+        metadata = post_file.metadata
+        post = posts.get(post_file.slug)
+
+        if post:
+            post.title = metadata.get('title', post.title)
+            post.updated_at = datetime.utcnow()
+            report.updated += 1
+        else:
+            post = Post(
+                title=metadata.get('title', post_file.slug.replace('-', ' ').title()),
+                slug=post_file.slug
+            )
+            db.add(post)
+            posts[post_file.slug] = post
+            report.created += 1
+
+        set_post_content(post, post_file.content_md, content)
+        post.excerpt = metadata.get('excerpt')
+        post.featured_image = metadata.get('featured_image')
+        post.seo_title = metadata.get('seo_title')
+        post.seo_description = metadata.get('seo_description')
+        post.status = metadata.get('status', 'draft')
+        post.file_path = str(post_file.path)
+        post.file_mtime_ns = post_file.mtime_ns
+        post.file_size = post_file.size
+
+        if metadata.get('published_at'):
+            post.published_at = parse_date(metadata['published_at'])
+        set_post_visibility(post)
+
+        changed.append(post)
+        report.slugs.append(post_file.slug)
+
+    if changed:
+        db.flush()
+        for post in changed:
+            index_post_for_search(db, post)
+    db.commit()
+
+    if changed:
+        invalidate_caches()
+
+    return report
+
+
+def sync_files(db: Session, file_paths: list[Path]) -> SyncReport:
+    """Sync the given markdown files to the database in one transaction."""
+    start = time.perf_counter()
+    post_files = [
+        post_file for post_file in map(read_post_file, file_paths)
+        if post_file is not None
+    ]
+    report = apply_post_files(db, post_files)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def sync_file_changes(db: Session, modified: list[Path], deleted: list[Path]) -> SyncReport:
+    """Apply a batch of content-directory changes in one transaction.
+
+    Posts whose file was deleted are removed, unless another file in the
+    batch now provides the same slug (a rename), in which case that post is
+    updated in place.
+    """
+    start = time.perf_counter()
+    post_files = [
+        post_file for post_file in map(read_post_file, modified)
+        if post_file is not None
+    ]
+    renamed = {post_file.slug for post_file in post_files}
+    gone = [str(path) for path in deleted if not path.exists()]
+
+    removed = []
+    if gone:
+        for post in db.query(Post).filter(Post.file_path.in_(gone)):
+            if post.slug in renamed:
+                continue
+            remove_post_from_search(db, post.id)
+            db.delete(post)
+            removed.append(post.slug)
+
+    # Commits the deletions along with the file changes
+    report = apply_post_files(db, post_files)
+    report.deleted = len(removed)
+    report.slugs.extend(removed)
+    if removed and not (report.created or report.updated):
+        invalidate_caches()
+
+    report.seconds = time.perf_counter() - start
+    return report
+
+
 def sync_file_to_post(db: Session, file_path: Path) -> Optional[Post]:
     """Sync markdown file to database."""
-    if not file_path.exists():
+    post_file = read_post_file(file_path)
+    if post_file is None:
         return None
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        fm_post = frontmatter.load(f)
-
-    slug = fm_post.metadata.get('slug') or file_path.stem
-    content_md = fm_post.content
-    checksum = compute_checksum(content_md)
-
-    post = get_post_by_slug(db, slug)
-
-    if post:
-        if post.checksum == checksum:
-            return post
-
-        post.title = fm_post.metadata.get('title', post.title)
-        post.excerpt = fm_post.metadata.get('excerpt')
-        post.content_md = content_md
-        post.content_html = render_markdown(content_md)
-        post.featured_image = fm_post.metadata.get('featured_image')
-        post.seo_title = fm_post.metadata.get('seo_title')
-        post.seo_description = fm_post.metadata.get('seo_description')
-        post.status = fm_post.metadata.get('status', 'draft')
-        post.file_path = str(file_path)
-        post.checksum = checksum
-        post.updated_at = datetime.utcnow()
-
-        if fm_post.metadata.get('published_at'):
-            post.published_at = parse_date(fm_post.metadata['published_at'])
-    else:
-        post = Post(
-            title=fm_post.metadata.get('title', slug.replace('-', ' ').title()),
-            slug=slug,
-            excerpt=fm_post.metadata.get('excerpt'),
-            content_md=content_md,
-            content_html=render_markdown(content_md),
-            featured_image=fm_post.metadata.get('featured_image'),
-            seo_title=fm_post.metadata.get('seo_title'),
-            seo_description=fm_post.metadata.get('seo_description'),
-            status=fm_post.metadata.get('status', 'draft'),
-            file_path=str(file_path),
-            checksum=checksum
+    apply_post_files(db, [post_file])
+    return get_post_by_slug(db, post_file.slug)
+
+
+def sync_all_files(db: Session) -> SyncReport:
+    """Sync markdown files in the content directory to the database.
+
+    Only files whose mtime or size differ from the values recorded at the
+    last sync are read; everything is applied in one transaction.
+    """
+    start = time.perf_counter()
+
+    stats = {path: path.stat() for path in CONTENT_DIR.glob('*.md')}
+    synced = {
+        file_path: (mtime_ns, size)
+        for file_path, mtime_ns, size in db.execute(
+            select(Post.file_path, Post.file_mtime_ns, Post.file_size)
+            .where(Post.file_path.is_not(None))
         )
+    }
+    modified = [
+        path for path, stat in stats.items()
+        if synced.get(str(path)) != (stat.st_mtime_ns, stat.st_size)
+    ]
 
-        if fm_post.metadata.get('published_at'):
-            post.published_at = parse_date(fm_post.metadata['published_at'])
+    report = sync_files(db, modified)
+    report.scanned = len(stats)
+    report.unchanged += len(stats) - len(modified)
 
-        db.add(post)
+    rebuild_search_index(db)
 
-    db.commit()
-    db.refresh(post)
+    report.seconds = time.perf_counter() - start
+    return report
 
-    return post
 
+def backfill_derived_fields(db: Session) -> int:
+    """Compute FAQ items, heading outline and word count for older rows.
 
-def sync_all_files(db: Session) -> list[Post]:
-    """Sync all markdown files in content directory to database."""
-    posts = []
+    Rows written before these columns existed have them NULL; re-derive
+    them from the stored markdown in a single transaction.
 
-    for file_path in CONTENT_DIR.glob('*.md'):
-        post = sync_file_to_post(db, file_path)
-        if post:
-            posts.append(post)
+    Returns:
+        Number of posts updated
+    """
+    posts = db.query(Post).filter(
+        or_(
+            Post.faq_items.is_(None),
+            Post.toc.is_(None),
+            Post.word_count.is_(None)
+        )
+    ).all()
+
+    rendered = render_contents(db, [post.content_md for post in posts])
+    for post, content in zip(posts, rendered):
+        set_post_content(post, post.content_md, content)
+
+    if posts:
+        db.commit()
+        invalidate_caches()
+
+    return len(posts)
+
+
+def promote_due_posts(db: Session) -> int:
+    """Bring every row's `is_live` flag up to date in one transaction.
+
+    Makes scheduled posts whose time has passed live (run by the publish
+    scheduler), and backfills the flag for rows written before it existed.
+    updated_at is left untouched: going live doesn't change the content.
+
+    Returns:
+        Number of posts whose visibility changed
+    """
+    now = datetime.utcnow()
+    live = live_predicate(now)
+
+    db.execute(
+        update(Post)
+        .where(live, Post.published_at.is_(None))
+        .values(
+            published_at=func.coalesce(Post.scheduled_at, now),
+            updated_at=Post.updated_at
+        )
+    )
+    changed = db.execute(
+        update(Post)
+        .where(Post.is_live != live)
+        .values(is_live=live, updated_at=Post.updated_at)
+    ).rowcount
+    db.commit()
+
+    if changed:
+        invalidate_caches()
 
-    return posts
+    return changed
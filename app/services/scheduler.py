@@ -0,0 +1,48 @@
+"""
+Publish scheduler for Ace Citizenship Blog.
+
+Scheduled posts become visible by flipping their materialized `is_live`
+flag. This background task sleeps until the next post is due (checking
+at least every SCHEDULER_MAX_SLEEP seconds, so posts scheduled from
+another process are picked up too) and promotes everything that is due.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+from app.db.database import SessionLocal, run_in_db
+from app.services import posts as posts_service
+
+# Longest the scheduler sleeps between checks, in seconds
+SCHEDULER_MAX_SLEEP = float(os.getenv("ACE_SCHEDULER_MAX_SLEEP", "60"))
+
+# Floor between checks, so a failing promotion can't spin the loop
+SCHEDULER_MIN_SLEEP = 1.0
+
+
+def promote_and_get_next() -> tuple[int, datetime | None]:
+    """Promote due posts; return (promoted count, next scheduled time)."""
+    db = SessionLocal()
+    try:
+        promoted = posts_service.promote_due_posts(db)
+        return promoted, posts_service.get_next_scheduled_at(db)
+    finally:
+        db.close()
+
+
+async def run_publish_scheduler() -> None:
+    """Promote scheduled posts as they come due, until cancelled."""
+    while True:
+        delay = SCHEDULER_MAX_SLEEP
+        try:
+            promoted, next_at = await run_in_db(promote_and_get_next)
+            if promoted:
+                print(f"Scheduler: {promoted} scheduled blog posts went live")
+            if next_at is not None:
+                until_due = (next_at - datetime.utcnow()).total_seconds()
+                delay = min(delay, until_due)
+        except Exception as e:
+            print(f"Scheduler: promotion failed: {e}")
+
+        await asyncio.sleep(max(delay, SCHEDULER_MIN_SLEEP))
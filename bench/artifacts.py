@@ -0,0 +1,81 @@
+"""
+Sitemap, feed and llms-full.txt cost per request as the blog grows.
+
+For each --posts count, runs a child process on a fresh database with
+that many synthetic posts, makes one request per document (the build,
+if the checkout caches them), then times --requests more through
+TestClient with Accept-Encoding: br, gzip. With prebuilt artifacts the
+repeat cost stays flat as the post count grows; without them it grows
+with it.
+
+    python bench/artifacts.py [--posts 100 10000] [--requests 50] [--root CHECKOUT]
+"""
+
+import subprocess
+import sys
+import time
+
+from benchlib import argument_parser, make_posts, percentile, prepare, random_client_headers
+
+DOCUMENTS = ("/sitemap.xml", "/sitemap-1.xml", "/blog/feed.xml", "/llms-full.txt")
+
+
+def measure(posts: int, requests: int) -> None:
+    import random
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    make_posts(posts)
+    rng = random.Random(0)
+    with TestClient(app) as client:
+        # Startup logs go to stdout too, so the header follows them
+        print(f"{'posts':>7} {'document':16} {'first ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'KiB sent':>10}")
+        for path in DOCUMENTS:
+            headers = {**random_client_headers(rng), "Accept-Encoding": "br, gzip"}
+            started = time.perf_counter()
+            response = client.get(path, headers=headers)
+            first = time.perf_counter() - started
+            if response.status_code != 200:
+                # /sitemap-1.xml only exists once the sitemap is an index
+                print(f"{posts:>7} {path:16} {'HTTP ' + str(response.status_code):>10}")
+                continue
+
+            latencies = []
+            for _ in range(requests):
+                headers = {**random_client_headers(rng), "Accept-Encoding": "br, gzip"}
+                started = time.perf_counter()
+                client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            print(
+                f"{posts:>7} {path:16} {first * 1e3:10.1f} {percentile(latencies, 0.5) * 1e3:10.2f}"
+                f" {percentile(latencies, 0.99) * 1e3:10.2f} {len(response.content) / 1024:10.1f}"
+            )
+
+
+def main(args) -> None:
+    for posts in args.posts:
+        # A fresh process and database per count: the app reads its
+        # configuration at import, and make_posts only ever appends
+        subprocess.run(
+            [
+                sys.executable, __file__, "--root", str(args.root),
+                "--requests", str(args.requests), "--only", str(posts),
+            ],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--only", type=int, default=None, help="internal: measure one count in this process")
+    args = parser.parse_args()
+    if args.only is None:
+        main(args)
+    else:
+        prepare(args)
+        measure(args.only, args.requests)
@@ -0,0 +1,123 @@
+"""
+Shared setup for the benchmark scripts in this directory.
+
+Each script measures the tree it is pointed at: this checkout by
+default, or another one with --root (e.g. a `git worktree` of the
+commit before a change), so before/after numbers come from the same
+script. The app reads its configuration at import, so scripts call
+prepare() before importing anything from `app`.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+WORDS = (
+    "citizenship test civics question answer president congress vote rights "
+    "amendment constitution liberty senate court history flag oath"
+).split()
+
+
+def argument_parser(description: str) -> argparse.ArgumentParser:
+    """Parser with the options every benchmark takes."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--root", type=Path, default=REPO_ROOT,
+        help="checkout to benchmark (default: this one)",
+    )
+    parser.add_argument(
+        "--db", type=Path, default=None,
+        help="SQLite database to use (default: a fresh temporary one)",
+    )
+    return parser
+
+
+def prepare(args: argparse.Namespace) -> Path:
+    """Point the app at a database and put the checkout on sys.path.
+
+    Returns the working directory used for scratch files.
+    """
+    work = Path(tempfile.mkdtemp(prefix="ace-bench-"))
+    os.environ["ACE_DB_PATH"] = str(args.db or work / "ace.db")
+    os.environ.setdefault("ACE_RATE_LIMIT_DB_PATH", str(work / "rate_limit.db"))
+    os.environ["ACE_CONTENT_WATCH_INTERVAL"] = "0"
+    sys.path.insert(0, str(args.root.resolve()))
+    return work
+
+
+def make_posts(count: int, words_per_post: int = 1500, seed: int = 0) -> None:
+    """Fill the database with `count` published synthetic posts.
+
+    Rows are inserted directly (no rendering), newest first, one hour
+    apart. Does nothing if the database already has that many posts.
+    """
+    from app.db.database import SessionLocal, init_db
+    from app.db.models import Post
+    from app.services import posts as posts_service
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if db.query(Post).count() >= count:
+            return
+        rng = random.Random(seed)
+        now = datetime.utcnow()
+        columns = {column.name for column in Post.__table__.columns}
+        rows = []
+        for number in range(count):
+            body = " ".join(rng.choice(WORDS) for _ in range(words_per_post))
+            row = {
+                "slug": f"post-{number}",
+                "title": f"Post {number} about {rng.choice(WORDS)}",
+                "excerpt": " ".join(rng.choice(WORDS) for _ in range(30)),
+                "content_md": body,
+                "content_html": f"<p>{body}</p>",
+                "status": "published",
+                "published_at": now - timedelta(hours=number),
+                "updated_at": now - timedelta(hours=number),
+                "word_count": words_per_post,
+                "faq_items": [],
+                "toc": [],
+                "is_live": True,
+            }
+            # Older checkouts lack some derived columns
+            rows.append({key: value for key, value in row.items() if key in columns})
+        db.execute(Post.__table__.insert(), rows)
+        db.commit()
+        if hasattr(posts_service, "rebuild_search_index"):
+            posts_service.rebuild_search_index(db)
+            db.commit()
+    finally:
+        db.close()
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Fastest of `repeat` runs of `number` calls, in seconds per call."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - started) / number)
+    return min(times)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def random_client_headers(rng: random.Random = random) -> dict[str, str]:
+    """Browser-like headers from a random client IP, so rate limits don't kick in."""
+    return {
+        "X-Forwarded-For": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) Firefox/130.0",
+    }
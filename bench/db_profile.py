@@ -0,0 +1,124 @@
+"""
+Concurrent readers while the admin commits post edits, per ACE_DB_PROFILE.
+
+For each --profiles entry, runs a child process on a fresh database with
+--posts synthetic posts. --readers threads each open a session per
+operation and alternate a post lookup by slug with a listing page, while
+one writer thread edits a post's content through update_post() and
+commits, for --seconds. Reports reader latency and throughput, commit
+latency, and any "database is locked" errors. Checkouts without profiles
+ignore ACE_DB_PROFILE, so both rows measure their fixed settings.
+
+    python bench/db_profile.py [--profiles performance safe] [--readers 8]
+                               [--seconds 5] [--posts 2000] [--root CHECKOUT]
+"""
+
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from benchlib import argument_parser, make_posts, percentile, prepare
+
+
+def measure(profile: str, readers: int, seconds: float, posts: int, work) -> None:
+    from sqlalchemy.exc import OperationalError
+
+    from app.db.database import SessionLocal
+    from app.services import posts as posts_service
+
+    posts_service.CONTENT_DIR = work / "blog"
+    make_posts(posts)
+
+    stop = threading.Event()
+    read_latencies: list[list[float]] = [[] for _ in range(readers)]
+    commit_latencies: list[float] = []
+    errors = {"read": 0, "write": 0}
+
+    def reader(latencies: list[float], seed: int) -> None:
+        rng = random.Random(seed)
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                if rng.random() < 0.5:
+                    posts_service.get_post_by_slug(db, f"post-{rng.randrange(posts)}")
+                else:
+                    posts_service.get_published_posts(db, limit=12, offset=12 * rng.randrange(posts // 12))
+            except OperationalError:
+                errors["read"] += 1
+            finally:
+                db.close()
+            latencies.append(time.perf_counter() - started)
+
+    def writer() -> None:
+        edit = 0
+        while not stop.is_set():
+            edit += 1
+            db = SessionLocal()
+            try:
+                post = posts_service.get_post_by_slug(db, f"post-{edit % 50}")
+                started = time.perf_counter()
+                posts_service.update_post(
+                    db, post, content_md=f"{post.content_md}\n\nEdit {edit}.", sync_to_file=False
+                )
+                commit_latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                db.rollback()
+                errors["write"] += 1
+            finally:
+                db.close()
+            time.sleep(0.05)  # An editor saving, not a bulk import
+
+    threads = [threading.Thread(target=reader, args=(read_latencies[n], n)) for n in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    reads = sorted(latency for latencies in read_latencies for latency in latencies)
+    commits = sorted(commit_latencies) or [float("nan")]
+    print(
+        f"{profile:12} {len(reads) / seconds:9.0f} {percentile(reads, 0.5) * 1e3:9.2f}"
+        f" {percentile(reads, 0.99) * 1e3:9.2f} {reads[-1] * 1e3:9.1f}"
+        f" {len(commit_latencies):8} {percentile(commits, 0.5) * 1e3:9.1f} {percentile(commits, 0.99) * 1e3:9.1f}"
+        f" {errors['read']:>6}/{errors['write']}"
+    )
+
+
+def main(args) -> None:
+    print(f"{args.posts} posts, {args.readers} readers, 1 writer, {args.seconds:g} s")
+    print(
+        f"{'profile':12} {'reads/s':>9} {'read p50':>9} {'read p99':>9} {'read max':>9}"
+        f" {'commits':>8} {'cmt p50':>9} {'cmt p99':>9} {'errors r/w':>10}"
+    )
+    for profile in args.profiles:
+        # A fresh process per profile: the PRAGMAs are chosen at import
+        subprocess.run(
+            [
+                sys.executable, __file__, "--root", str(args.root), "--readers", str(args.readers),
+                "--seconds", str(args.seconds), "--posts", str(args.posts), "--only", profile,
+            ],
+            env={**os.environ, "ACE_DB_PROFILE": profile},
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=["performance", "safe"])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--only", default=None, help="internal: measure one profile in this process")
+    args = parser.parse_args()
+    if args.only is None:
+        main(args)
+    else:
+        work = prepare(args)
+        measure(args.only, args.readers, args.seconds, args.posts, work)
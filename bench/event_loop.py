@@ -0,0 +1,109 @@
+"""
+Event loop responsiveness under load, against a real uvicorn server.
+
+Starts uvicorn on the checkout, then probes GET / at a steady pace while
+other clients hammer a database-heavy endpoint. If route handlers run
+their queries on the event loop, the probe waits behind them.
+
+    python bench/event_loop.py [--load search|sitemap] [--clients 16]
+                               [--posts 10000] [--db corpus.db] [--root CHECKOUT]
+"""
+
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from benchlib import argument_parser, make_posts, percentile, prepare, random_client_headers
+
+LOADS = {
+    "search": lambda rng: f"/blog?q=vote&page={rng.randint(1, 400)}",
+    "sitemap": lambda rng: "/sitemap.xml",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run(base_url: str, load: str, clients: int, probes: int) -> None:
+    import httpx
+
+    rng = random.Random(0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        for _ in range(300):
+            try:
+                if (await client.get("/", headers=random_client_headers(rng))).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+
+        async def probe(count: int) -> list[float]:
+            latencies = []
+            for _ in range(count):
+                started = time.perf_counter()
+                await client.get("/", headers=random_client_headers(rng))
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+            return sorted(latencies)
+
+        idle = await probe(100)
+
+        stop = False
+        served = 0
+
+        async def hammer() -> None:
+            nonlocal served
+            while not stop:
+                await client.get(LOADS[load](rng), headers=random_client_headers(rng))
+                served += 1
+
+        hammers = [asyncio.create_task(hammer()) for _ in range(clients)]
+        await asyncio.sleep(0.5)
+        started = time.perf_counter()
+        busy = await probe(probes)
+        elapsed = time.perf_counter() - started
+        stop = True
+        await asyncio.gather(*hammers)
+
+    print(f"{'GET / probe':26} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label, latencies in (("idle", idle), (f"{clients} clients on {load}", busy)):
+        print(
+            f"{label:26} {percentile(latencies, 0.5) * 1e3:8.1f}"
+            f" {percentile(latencies, 0.99) * 1e3:8.1f} {latencies[-1] * 1e3:8.1f}"
+        )
+    print(f"load served: {served / elapsed:.1f} req/s")
+
+
+def main(args) -> None:
+    make_posts(args.posts)
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=args.root,
+        env=dict(os.environ),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(run(f"http://127.0.0.1:{port}", args.load, args.clients, args.probes))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--load", choices=sorted(LOADS), default="search")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--probes", type=int, default=150)
+    parser.add_argument("--posts", type=int, default=10000)
+    args = parser.parse_args()
+    prepare(args)
+    main(args)
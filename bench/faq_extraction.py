@@ -0,0 +1,87 @@
+"""
+FAQ extraction cost and the blog post page view of a long post.
+
+Builds a long synthetic post (400 question headings), times
+extract_faq_items() on its HTML, then publishes it and times
+GET /blog/<slug> in-process with the page cache emptied before each
+request and compression off. Where FAQ items are stored at write time,
+the page view no longer pays for the extraction.
+
+    python bench/faq_extraction.py [--questions 400] [--root CHECKOUT]
+"""
+
+import asyncio
+import logging
+import time
+
+from benchlib import argument_parser, best_of, prepare, random_client_headers
+
+SLUG = "bench-long-faq"
+
+
+def long_post(questions: int) -> str:
+    return "\n\n".join(
+        f"## Question number {number}?\n\n"
+        + "Lorem ipsum dolor sit amet. " * 40
+        + "\n\n### Detail\n\n"
+        + "More words here. " * 30
+        for number in range(questions)
+    )
+
+
+async def page_view(requests: int) -> float:
+    """Best uncached, uncompressed render time of the post page."""
+    import httpx
+
+    from app.main import app, lifespan
+    from app.services.page_cache import page_cache
+
+    headers = {**random_client_headers(), "Accept-Encoding": "identity"}
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="https://bench") as client:
+            response = await client.get(f"/blog/{SLUG}", headers=headers)
+            assert response.status_code == 200, response.status_code
+            times = []
+            for _ in range(requests):
+                page_cache.clear()
+                started = time.perf_counter()
+                await client.get(f"/blog/{SLUG}", headers={**random_client_headers(), **headers})
+                times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main(questions: int, work) -> None:
+    from app.db.database import SessionLocal, init_db
+    from app.services import posts as posts_service
+
+    posts_service.CONTENT_DIR = work / "content"
+    posts_service.CONTENT_DIR.mkdir()
+
+    content_md = long_post(questions)
+    content_html = posts_service.render_markdown(content_md)
+    extract = best_of(lambda: posts_service.extract_faq_items(content_html), repeat=3, number=20)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        post = posts_service.create_post(
+            db, title="Long FAQ", slug=SLUG, content_md=content_md, sync_to_file=False
+        )
+        posts_service.publish_post(db, post)
+    finally:
+        db.close()
+    view = asyncio.run(page_view(20))
+
+    print(f"post HTML {len(content_html) // 1024} KiB, {questions} questions")
+    print(f"{'extract_faq_items':24} {extract * 1e3:8.2f} ms")
+    print(f"{'GET /blog/<slug>, uncached':24} {view * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=400)
+    args = parser.parse_args()
+    work = prepare(args)
+    logging.disable(logging.CRITICAL)
+    main(args.questions, work)
@@ -0,0 +1,104 @@
+"""
+KVRateLimiter cost per check, against the KV stand-in in tests/.
+
+Starts tests/kv_standin.py with --latency seconds added to every
+response, points the limiter at it, and times --checks sequential
+is_rate_limited() calls spread over --clients client IPs. Then sets the
+stand-in to hang (an outage) and times --outage-checks concurrent
+checks. Also counts the KV requests made per check, including the ones
+a write-behind flush makes after the checks.
+
+    python bench/kv_rate_limit.py [--checks 500] [--clients 50] [--latency 0.02]
+                                  [--outage-checks 20] [--root CHECKOUT]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from benchlib import REPO_ROOT, argument_parser, percentile, prepare
+
+sys.path.insert(0, str(REPO_ROOT / "tests"))
+from kv_standin import KVStandIn  # noqa: E402
+
+
+def client_ip(number: int) -> str:
+    return f"198.51.100.{number % 250}"
+
+
+async def timed_check(limiter, ip: str) -> float:
+    started = time.perf_counter()
+    await limiter.is_rate_limited(ip)
+    return time.perf_counter() - started
+
+
+async def finish(limiter, kv_rate_limit) -> None:
+    """Write out pending increments and close the shared client, if the checkout has them."""
+    if hasattr(limiter, "close"):
+        await limiter.close()
+    if hasattr(kv_rate_limit, "close_kv_client"):
+        await kv_rate_limit.close_kv_client()
+
+
+async def run(standin: KVStandIn, base_url: str, args) -> None:
+    from app.security import kv_rate_limit
+
+    def make_limiter():
+        limiter = kv_rate_limit.KVRateLimiter(requests_per_minute=10**9, prefix="bench", site_name="bench")
+        if hasattr(limiter, "_kv_base_url"):
+            # Checkouts before CF_API_BASE hardcode the Cloudflare host
+            limiter._kv_base_url = limiter._kv_base_url.replace("https://api.cloudflare.com/client/v4", base_url)
+        return limiter
+
+    limiter = make_limiter()
+    healthy = []
+    for number in range(args.checks):
+        healthy.append(await timed_check(limiter, client_ip(number % args.clients)))
+    await finish(limiter, kv_rate_limit)
+    requests = standin.requests
+
+    standin.fault = "hang"
+    limiter = make_limiter()
+    started = time.perf_counter()
+    outage = await asyncio.gather(*(timed_check(limiter, client_ip(n)) for n in range(args.outage_checks)))
+    outage_elapsed = time.perf_counter() - started
+    standin.fault = None  # Let a pending flush finish instead of hanging
+    await finish(limiter, kv_rate_limit)
+
+    healthy.sort()
+    outage.sort()
+    print(f"stand-in latency {args.latency * 1e3:g} ms, {args.clients} clients")
+    print(f"{'case':30} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for label, latencies in ((f"{args.checks} checks, KV healthy", healthy),
+                             (f"{args.outage_checks} checks, KV hanging", outage)):
+        print(
+            f"{label:30} {percentile(latencies, 0.5) * 1e3:9.3f}"
+            f" {percentile(latencies, 0.99) * 1e3:9.3f} {latencies[-1] * 1e3:9.3f}"
+        )
+    print(f"KV requests per check (healthy): {requests / args.checks:.2f}")
+    print(f"outage batch wall time: {outage_elapsed:.2f} s")
+
+
+def main(args) -> None:
+    standin = KVStandIn()
+    standin.latency = args.latency
+    standin.hang_seconds = 3.0  # Past the limiter's 2 s KV timeout
+    base_url = standin.start()
+    os.environ["CF_API_BASE"] = base_url
+    os.environ["CF_API_TOKEN"] = "bench-token"
+    try:
+        asyncio.run(run(standin, base_url, args))
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--checks", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the stand-in adds per response")
+    parser.add_argument("--outage-checks", type=int, default=20)
+    args = parser.parse_args()
+    prepare(args)
+    main(args)
@@ -0,0 +1,60 @@
+"""
+Request throughput through the full middleware stack, in-process.
+
+Drives the ASGI app with httpx's ASGITransport (no sockets, one request
+at a time) and reports requests/sec and latency percentiles per path.
+Every request comes from a different client IP so rate limiting never
+answers instead of the app.
+
+    python bench/middleware.py [--requests 400] [--root CHECKOUT]
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+from benchlib import argument_parser, percentile, prepare, random_client_headers
+
+PATHS = ("/", "/blog", "/sitemap.xml")
+
+
+async def measure(client, path: str, requests: int, rng: random.Random) -> tuple[float, list[float]]:
+    for _ in range(20):
+        await client.get(path, headers=random_client_headers(rng))
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        sent = time.perf_counter()
+        response = await client.get(path, headers=random_client_headers(rng))
+        latencies.append(time.perf_counter() - sent)
+        assert response.status_code == 200, (path, response.status_code)
+    return requests / (time.perf_counter() - started), sorted(latencies)
+
+
+async def main(requests: int) -> None:
+    import httpx
+
+    from app.main import app, lifespan
+
+    rng = random.Random(0)
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="https://bench") as client:
+            print(f"{'path':14} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+            for path in PATHS:
+                rate, latencies = await measure(client, path, requests, rng)
+                print(
+                    f"{path:14} {rate:8.0f} {percentile(latencies, 0.5) * 1e3:8.2f}"
+                    f" {percentile(latencies, 0.99) * 1e3:8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400, help="requests per path")
+    args = parser.parse_args()
+    prepare(args)
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main(args.requests))
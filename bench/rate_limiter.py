@@ -0,0 +1,98 @@
+"""
+InMemoryRateLimiter cost per check, memory per key and cleanup pauses.
+
+Sprays --keys distinct client keys (twice each), then checks one hot key
+allowed 1000 requests a minute 1000 times, then moves the limiter's clock
+past every sprayed key's windows and times the check that cleans them
+up. Memory is measured in a separate pass, since tracemalloc slows the
+checks. Past ACE_RATE_LIMIT_MAX_KEYS (50,000 by default) keys overflow,
+so memory per key is per tracked key.
+
+    python bench/rate_limiter.py [--keys 100000] [--root CHECKOUT]
+"""
+
+import inspect
+import time
+import tracemalloc
+
+from benchlib import argument_parser, prepare
+
+
+def spray(limiter, clients: list[str]) -> tuple[float, float]:
+    """Seconds per check for each key's first and second request."""
+    started = time.perf_counter()
+    for key in clients:
+        limiter.check(key, 30)
+    first = (time.perf_counter() - started) / len(clients)
+    started = time.perf_counter()
+    for key in clients:
+        limiter.check(key, 30)
+    return first, (time.perf_counter() - started) / len(clients)
+
+
+def main(keys: int) -> None:
+    from app.security.rate_limit import InMemoryRateLimiter
+
+    clients = [f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}:anonymous" for n in range(keys)]
+    hot_key = "198.51.100.1:allowed"
+
+    now = [time.monotonic()]
+    has_clock = "clock" in inspect.signature(InMemoryRateLimiter).parameters
+
+    def make_limiter():
+        if has_clock:
+            return InMemoryRateLimiter(60, clock=lambda: now[0])
+        return InMemoryRateLimiter(60)
+
+    # Memory, on its own limiter: tracemalloc slows every allocation
+    tracemalloc.start()
+    measured = make_limiter()
+    spray(measured, clients)
+    memory = tracemalloc.get_traced_memory()[0]
+    measured.check(hot_key, 1000)
+    before_hot = tracemalloc.get_traced_memory()[0]
+    for _ in range(999):
+        measured.check(hot_key, 1000)
+    hot_memory = tracemalloc.get_traced_memory()[0] - before_hot
+    tracemalloc.stop()
+
+    # Older limiters track every key and may not report stats
+    tracked = measured.stats().get("keys", keys) if hasattr(measured, "stats") else keys
+    del measured
+
+    limiter = make_limiter()
+    first, repeat = spray(limiter, clients)
+    limiter.check(hot_key, 1000)
+    started = time.perf_counter()
+    for _ in range(999):
+        limiter.check(hot_key, 1000)
+    hot = (time.perf_counter() - started) / 999
+
+    # Every sprayed key goes idle for more than two windows
+    if has_clock:
+        now[0] += 180
+    else:
+        # Checkouts before clock= read time.time(); make the sweep due now
+        limiter._last_cleanup -= 61
+    started = time.perf_counter()
+    limiter.check("198.51.100.2:anonymous", 30)
+    pause = time.perf_counter() - started
+
+    print(f"{keys} keys, {tracked} tracked")
+    print(f"{'first request per key':28} {first * 1e6:9.2f} us")
+    print(f"{'repeat request per key':28} {repeat * 1e6:9.2f} us")
+    print(f"{'memory per tracked key':28} {memory / tracked:9.0f} B")
+    print(f"{'hot key, 1000 req/min':28} {hot * 1e6:9.2f} us")
+    print(f"{'memory for the hot key':28} {hot_memory / 1024:9.1f} KiB")
+    print(f"{'check that runs cleanup':28} {pause * 1e3:9.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--keys", type=int, default=100_000,
+        help="distinct keys; past ACE_RATE_LIMIT_MAX_KEYS (50,000) they overflow",
+    )
+    args = parser.parse_args()
+    prepare(args)
+    main(args.keys)
@@ -0,0 +1,61 @@
+"""
+Markdown rendering throughput.
+
+Renders every post in content/blog with render_post_content() on one
+thread for a few seconds, times a short document on its own, and
+renders a batch through render_many(), which uses the process pool when
+the checkout has one.
+
+    python bench/render.py [--seconds 5] [--batch 8] [--root CHECKOUT]
+"""
+
+import time
+
+from benchlib import REPO_ROOT, argument_parser, best_of, prepare
+
+SHORT_DOCUMENT = "## A question?\n\nA short answer with *emphasis* and a [link](/blog).\n"
+
+
+def main(seconds: float, batch: int) -> None:
+    import frontmatter
+
+    from app.services import posts as posts_service
+
+    documents = [
+        frontmatter.load(path).content
+        for path in sorted((REPO_ROOT / "content" / "blog").glob("*.md"))
+    ]
+
+    rendered = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for document in documents:
+            posts_service.render_post_content(document)
+            rendered += 1
+    single = rendered / (time.perf_counter() - started)
+
+    short = best_of(lambda: posts_service.render_post_content(SHORT_DOCUMENT), repeat=5, number=200)
+
+    contents = documents * batch
+    posts_service.render_many(contents)  # Start the pool, if any
+    started = time.perf_counter()
+    posts_service.render_many(contents)
+    many = len(contents) / (time.perf_counter() - started)
+    if hasattr(posts_service, "shutdown_render_pool"):
+        posts_service.shutdown_render_pool()
+
+    workers = getattr(posts_service, "RENDER_WORKERS", "os.cpu_count()")
+    print(f"{len(documents)} posts from content/blog")
+    print(f"{'render':40} {'result':>14}")
+    print(f"{'one thread':40} {single:8.1f} posts/s")
+    print(f"{'short document':40} {short * 1e3:11.3f} ms")
+    print(f"{f'render_many, {batch}x the posts, workers={workers}':40} {many:8.1f} posts/s")
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=8, help="copies of the posts for render_many")
+    args = parser.parse_args()
+    prepare(args)
+    main(args.seconds, args.batch)
@@ -0,0 +1,55 @@
+"""
+Blog search: ILIKE scans versus the FTS5 index.
+
+Runs one page of results plus the total, the way the blog index needs
+them, for a term in every post and for a term in none, both as the old
+ILIKE '%term%' query and through search_published_posts().
+
+    python bench/search.py [--posts 10000] [--db corpus.db] [--root CHECKOUT]
+"""
+
+from sqlalchemy import or_
+
+from benchlib import argument_parser, best_of, make_posts, prepare
+
+TERMS = (("in every post", "liberty"), ("in no post", "zzzq"))
+
+
+def main(count: int) -> None:
+    from app.db.database import SessionLocal
+    from app.db.models import Post
+    from app.services import posts as posts_service
+
+    make_posts(count)
+    db = SessionLocal()
+
+    def ilike(term: str):
+        pattern = f"%{term}%"
+        query = db.query(Post).filter(
+            posts_service.published_filter(),
+            or_(Post.title.ilike(pattern), Post.excerpt.ilike(pattern), Post.content_md.ilike(pattern)),
+        )
+        return query.order_by(Post.published_at.desc()).limit(12).all(), query.count()
+
+    def fts(term: str):
+        # Measure the first search for a term, not the cached total
+        getattr(posts_service, "_search_totals", {}).clear()
+        return posts_service.search_published_posts(db, term)
+
+    print(f"{count} posts")
+    print(f"{'term':14} {'ILIKE ms':>9} {'FTS5 ms':>9}")
+    try:
+        for label, term in TERMS:
+            ilike_time = best_of(lambda: ilike(term), repeat=5)
+            fts_time = best_of(lambda: fts(term), repeat=5)
+            print(f"{label:14} {ilike_time * 1e3:9.1f} {fts_time * 1e3:9.1f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=10000)
+    args = parser.parse_args()
+    prepare(args)
+    main(args.posts)
@@ -0,0 +1,81 @@
+"""
+Cost of SecurityHeadersMiddleware per response.
+
+Calls the middleware directly around a stub app that sends a small
+three-header response, and subtracts the same loop with the stub alone,
+so the figure is only the middleware's own work: picking the header
+variant and stamping it onto http.response.start.
+
+    python bench/security_headers.py [--responses 20000] [--root CHECKOUT]
+"""
+
+import asyncio
+import time
+
+from benchlib import argument_parser, prepare
+
+START = {
+    "type": "http.response.start",
+    "status": 200,
+    "headers": [
+        (b"content-type", b"text/html; charset=utf-8"),
+        (b"content-length", b"13"),
+        (b"cache-control", b"no-cache"),
+    ],
+}
+BODY = {"type": "http.response.body", "body": b"<html></html>"}
+
+
+async def stub_app(scope, receive, send):
+    await send({**START, "headers": list(START["headers"])})
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def discard(message):
+    pass
+
+
+def scope_for(host: str, path: str) -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "scheme": "https",
+        "headers": [(b"host", host.encode())],
+        "server": (host, 443),
+    }
+
+
+async def per_response(app, scope: dict, responses: int) -> float:
+    started = time.perf_counter()
+    for _ in range(responses):
+        await app(scope, receive, discard)
+    return (time.perf_counter() - started) / responses
+
+
+async def main(responses: int) -> None:
+    from app.security.headers import SecurityHeadersMiddleware
+
+    middleware = SecurityHeadersMiddleware(stub_app)
+    print(f"{'request':28} {'us/response':>12}")
+    for label, scope in (
+        ("production, page", scope_for("acecitizenship.app", "/blog")),
+        ("production, static asset", scope_for("acecitizenship.app", "/static/css/site.css")),
+        ("localhost, page", scope_for("localhost", "/blog")),
+    ):
+        await per_response(middleware, scope, 1000)
+        overhead = min([await per_response(stub_app, scope, responses) for _ in range(3)])
+        total = min([await per_response(middleware, scope, responses) for _ in range(3)])
+        print(f"{label:28} {(total - overhead) * 1e6:12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--responses", type=int, default=20000)
+    args = parser.parse_args()
+    prepare(args)
+    asyncio.run(main(args.responses))
@@ -0,0 +1,67 @@
+"""
+Startup sync of markdown files into the database.
+
+Copies the posts in content/blog, under new slugs, into a scratch
+content directory until there are --files of them, then times
+sync_all_files() the way startup runs it: on an empty database, on a
+restart with nothing changed, after every file was touched, and after
+ten files were edited.
+
+    python bench/startup_sync.py [--files 500] [--root CHECKOUT]
+"""
+
+import os
+import time
+
+from benchlib import REPO_ROOT, argument_parser, prepare
+
+
+def write_corpus(directory, files: int) -> None:
+    import frontmatter
+
+    sources = sorted((REPO_ROOT / "content" / "blog").glob("*.md"))
+    for number in range(files):
+        post = frontmatter.load(sources[number % len(sources)])
+        post.metadata["slug"] = f"{post.metadata.get('slug', 'post')}-{number}"
+        post.content += f"\n\nCopy {number}.\n"
+        (directory / f"{post.metadata['slug']}.md").write_text(frontmatter.dumps(post))
+
+
+def main(files: int, work) -> None:
+    from app.db.database import SessionLocal, init_db
+    from app.services import posts as posts_service
+
+    content = work / "blog"
+    content.mkdir()
+    write_corpus(content, files)
+    posts_service.CONTENT_DIR = content
+    init_db()
+
+    def sync(label: str) -> None:
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            posts_service.sync_all_files(db)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        print(f"{label:28} {elapsed * 1e3:9.0f}")
+
+    print(f"{files} files")
+    print(f"{'case':28} {'ms':>9}")
+    sync("first sync (empty database)")
+    sync("restart, nothing changed")
+    for path in content.glob("*.md"):
+        os.utime(path)
+    sync("restart, all files touched")
+    for path in sorted(content.glob("*.md"))[:10]:
+        path.write_text(path.read_text() + "\nEdited.\n")
+    sync("restart, 10 files edited")
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=500)
+    args = parser.parse_args()
+    work = prepare(args)
+    main(args.files, work)
@@ -0,0 +1,74 @@
+"""
+Full ORM Post rows versus column-projected PostSummary rows.
+
+Fetches every published post of a synthetic corpus both ways, the way
+the sitemap, feed and llms-full.txt list them, and reports the time and
+the memory still held by the result (tracemalloc).
+
+    python bench/summaries.py [--posts 10000] [--db corpus.db] [--root CHECKOUT]
+"""
+
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchlib import argument_parser, make_posts, prepare
+
+
+def measure(fetch) -> tuple[float, float, float]:
+    """Best time, retained and peak MB of fetch(db) over three runs."""
+    from app.db.database import SessionLocal
+
+    times = []
+    for _ in range(3):
+        db = SessionLocal()
+        gc.collect()
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = fetch(db)
+        times.append(time.perf_counter() - started)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del rows
+        db.close()
+    return min(times), retained / 1e6, peak / 1e6
+
+
+def main(count: int) -> None:
+    from app.db.models import Post
+    from app.services import posts as posts_service
+
+    make_posts(count)
+
+    try:
+        visible = posts_service.published_filter()
+    except TypeError:
+        # Older checkouts take the current time
+        visible = posts_service.published_filter(datetime.utcnow())
+
+    def orm_posts(db):
+        return (
+            db.query(Post)
+            .filter(visible)
+            .order_by(Post.published_at.desc())
+            .limit(count)
+            .all()
+        )
+
+    def summaries(db):
+        return posts_service.list_published_summaries(db, limit=count)
+
+    print(f"{count} posts")
+    print(f"{'rows':16} {'ms':>8} {'retained MB':>12} {'peak MB':>8}")
+    for label, fetch in (("full ORM Post", orm_posts), ("PostSummary", summaries)):
+        elapsed, retained, peak = measure(fetch)
+        print(f"{label:16} {elapsed * 1e3:8.0f} {retained:12.1f} {peak:8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argument_parser(__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=10000)
+    args = parser.parse_args()
+    prepare(args)
+    main(args.posts)
@@ -0,0 +1,43 @@
+"""
+Shared test setup.
+
+The database path is read when app.db.database is imported, so it is
+pointed at a throwaway directory here, before any test imports the app.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix="ace-tests-")
+os.environ["ACE_DB_PATH"] = os.path.join(TEST_DIR, "ace.db")
+os.environ["ACE_RATE_LIMIT_DB_PATH"] = os.path.join(TEST_DIR, "rate_limit.db")
+os.environ["ACE_CONTENT_WATCH_INTERVAL"] = "0"
+
+from app.db.database import SessionLocal, init_db  # noqa: E402
+from app.services import posts as posts_service  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the schema once per run."""
+    init_db()
+
+
+@pytest.fixture(autouse=True)
+def content_dir(tmp_path, monkeypatch):
+    """Keep sync_post_to_file() and friends out of content/blog."""
+    directory = tmp_path / "content"
+    directory.mkdir()
+    monkeypatch.setattr(posts_service, "CONTENT_DIR", directory)
+    return directory
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
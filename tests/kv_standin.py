@@ -0,0 +1,115 @@
+"""
+Local stand-in for the Cloudflare KV values API.
+
+Serves GET and PUT on .../storage/kv/namespaces/<id>/values/<key> from a
+dict, over HTTP/1.1 keep-alive like the real API, so KVRateLimiter can be
+exercised end to end without credentials. Set `latency` to delay every
+response by that many seconds, like a remote API. Set `fault` to fail
+every request: a status code to answer with it, "hang" to stall for
+`hang_seconds`, or "reset" to drop the connection without a response.
+"""
+
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import time
+from typing import Optional, Union
+
+VALUES_PATH = re.compile(
+    r"^/client/v4/accounts/[^/]+/storage/kv/namespaces/[^/]+/values/(?P<key>[^?]+)"
+)
+
+
+class KVStandIn:
+    """In-process KV API server; start() returns the CF_API_BASE to use."""
+
+    def __init__(self):
+        self.store: dict[str, int] = {}
+        self.fault: Optional[Union[int, str]] = None
+        self.hang_seconds = 5.0
+        self.latency = 0.0
+        self.lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        # Requests received, those that reached the store, and connections opened
+        self.requests = 0
+        self.gets = 0
+        self.puts = 0
+        self.connections = 0
+
+    def start(self) -> str:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/client/v4"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def standin(self) -> KVStandIn:
+        return self.server.standin
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.standin.lock:
+            self.standin.connections += 1
+
+    def _send(self, status: int, body: bytes = b"") -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fault(self) -> bool:
+        """Fail this request as configured; True if it was failed."""
+        with self.standin.lock:
+            self.standin.requests += 1
+        if self.standin.latency:
+            time.sleep(self.standin.latency)
+        fault = self.standin.fault
+        if fault is None:
+            return False
+        if fault == "hang":
+            time.sleep(self.standin.hang_seconds)
+            self.close_connection = True
+        elif fault == "reset":
+            self.close_connection = True
+            self.connection.close()
+        else:
+            self._send(fault, b'{"success":false}')
+        return True
+
+    def do_GET(self):
+        if self._fault():
+            return
+        key = VALUES_PATH.match(self.path)["key"]
+        with self.standin.lock:
+            self.standin.gets += 1
+            value = self.standin.store.get(key)
+        if value is None:
+            self._send(404)
+        else:
+            self._send(200, str(value).encode())
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self._fault():
+            return
+        key = VALUES_PATH.match(self.path)["key"]
+        with self.standin.lock:
+            self.standin.puts += 1
+            self.standin.store[key] = int(body)
+        self._send(200, b'{"success":true}')
@@ -0,0 +1,43 @@
+"""Admin post routes."""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db.database import engine
+from app.main import app
+from app.routes.auth import SESSION_COOKIE_NAME, create_session_token
+from app.services import posts as posts_service
+
+
+@pytest.fixture
+def admin_client():
+    with TestClient(app, base_url="https://testserver") as client:
+        client.cookies.set(SESSION_COOKIE_NAME, create_session_token())
+        yield client
+
+
+def test_create_post_queries_off_the_event_loop(admin_client, db):
+    event_loop_queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        # Anything not on the database pool ran on the event loop
+        if not threading.current_thread().name.startswith("ace-db"):
+            event_loop_queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = admin_client.post("/admin/posts/new", data={
+            "title": "Admin Created",
+            "slug": "admin-created",
+            "content_md": "Body text.",
+        }, follow_redirects=False)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    post = posts_service.get_post_by_slug(db, "admin-created")
+    assert response.status_code == 303
+    assert response.headers["location"] == f"/admin/posts/{post.id}/edit"
+    assert event_loop_queries == []
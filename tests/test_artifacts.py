@@ -0,0 +1,73 @@
+"""Single-flight builds in the artifact cache."""
+
+import threading
+import time
+
+from app.services.artifacts import ArtifactCache, build_artifact
+
+
+class ObservedLock:
+    """A lock that calls `after_release` each time it is released."""
+
+    def __init__(self, after_release):
+        self._lock = threading.Lock()
+        self._after_release = after_release
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+        self._after_release()
+
+
+def slow_build(started: threading.Event):
+    def build():
+        started.set()
+        time.sleep(0.05)
+        return build_artifact(b"<urlset/>", "application/xml")
+    return build
+
+
+def test_concurrent_misses_build_once():
+    cache = ArtifactCache()
+    started = threading.Event()
+    results = []
+
+    def request():
+        results.append(cache.get_or_build("sitemap", slow_build(started)))
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.builds == 1
+    assert len(results) == 8 and all(artifact is results[0] for artifact in results)
+
+
+def test_miss_right_after_a_build_finds_the_artifact():
+    cache = ArtifactCache()
+    finished = threading.Event()
+    late = []
+
+    def after_release():
+        # The first time the key's build lock is gone after the build
+        # returned, send in another request for it
+        if finished.is_set() and "feed" not in cache._build_locks and not late:
+            late.append(None)
+            thread = threading.Thread(target=lambda: late.append(cache.get_or_build("feed", build)))
+            thread.start()
+            thread.join()
+
+    def build():
+        finished.set()
+        return build_artifact(b"<rss/>", "application/rss+xml")
+
+    cache._lock = ObservedLock(after_release)
+    first = cache.get_or_build("feed", build)
+
+    assert late[1] is first
+    assert cache.builds == 1
@@ -0,0 +1,73 @@
+"""Fingerprinted static URLs and their caching headers."""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app import assets
+from app.assets import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, AssetManifest, AssetStaticFiles, asset_url
+
+FILES = {
+    "css/site.css": b"body { color: black; }",
+    "js/app.min.js": b"console.log('app');",
+    "fonts/LICENSE": b"Open Font License",
+    ".nojekyll": b"",
+}
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    for name, body in FILES.items():
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+    monkeypatch.setattr(assets, "asset_manifest", AssetManifest(tmp_path))
+    app = Starlette(routes=[Mount("/static", AssetStaticFiles(directory=tmp_path))])
+    with TestClient(app) as client:
+        yield tmp_path, client
+
+
+@pytest.mark.parametrize("name", sorted(FILES))
+def test_asset_url_round_trips(static, name):
+    _, client = static
+    url = asset_url(name)
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.content == FILES[name]
+    if "." in name.rpartition("/")[2].lstrip("."):
+        assert url != f"/static/{name}"
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    else:
+        # No suffix to put the hash in front of: the plain URL, revalidated
+        assert url == f"/static/{name}"
+        assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+
+
+def test_plain_path_is_not_immutable(static):
+    _, client = static
+    response = client.get("/static/css/site.css")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+
+
+def test_stale_hash_serves_the_current_file_for_revalidation(static):
+    directory, client = static
+    stale_url = asset_url("css/site.css")
+    path = directory / "css" / "site.css"
+    path.write_bytes(b"body { color: navy; }")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000_000))
+
+    stale = client.get(stale_url)
+    current_url = asset_url("css/site.css")
+    current = client.get(current_url)
+
+    assert current_url != stale_url
+    assert stale.status_code == 200
+    assert stale.content == b"body { color: navy; }"
+    assert stale.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    assert current.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
@@ -0,0 +1,81 @@
+"""Circuit breaker state machine, on a fake clock."""
+
+import pytest
+
+from app.security.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock():
+    now = [0.0]
+    return now
+
+
+@pytest.fixture
+def breaker(clock):
+    # rand() of 0.5 means no jitter
+    return CircuitBreaker(
+        failure_threshold=3, recovery=10.0, max_recovery=40.0, clock=lambda: clock[0], rand=lambda: 0.5
+    )
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(breaker):
+    fail(breaker, 2)
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_lets_one_probe_through_when_half_open(breaker, clock):
+    fail(breaker, 3)
+    clock[0] = 9.9
+    assert not breaker.allow()
+
+    clock[0] = 10.0
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probes_back_off_to_the_cap(breaker, clock):
+    fail(breaker, 3)
+    retry_at = 10.0
+    for delay in (20.0, 40.0, 40.0):
+        clock[0] = retry_at
+        fail(breaker, 1)
+        assert breaker.state == OPEN
+        assert breaker.stats()["retry_in"] == delay
+        retry_at += delay
+
+    # Recovery resets the delay
+    clock[0] = retry_at
+    assert breaker.allow()
+    breaker.record_success()
+    fail(breaker, 3)
+    assert breaker.stats()["retry_in"] == 10.0
+
+
+def test_jitter_spreads_the_retry(clock):
+    early = CircuitBreaker(failure_threshold=1, recovery=10.0, clock=lambda: clock[0], rand=lambda: 0.0)
+    late = CircuitBreaker(failure_threshold=1, recovery=10.0, clock=lambda: clock[0], rand=lambda: 1.0)
+    fail(early, 1)
+    fail(late, 1)
+
+    assert early.stats()["retry_in"] == 8.0
+    assert late.stats()["retry_in"] == 12.0
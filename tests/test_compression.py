@@ -0,0 +1,179 @@
+"""Accept-Encoding negotiation, response compression and static siblings."""
+
+import asyncio
+import gzip
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app.compression import CompressionMiddleware, PrecompressedStaticFiles, choose_encoding
+
+PAGE = ("<p>" + "citizenship test question " * 200 + "</p>").encode()
+CHUNKS = [b"<li>" + b"civics answer " * 100 + b"</li>" for _ in range(4)]
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip;q=0.5, br;q=0.8", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "br"),
+        ("br;q=0, *", "zstd"),
+        ("*;q=0.1, gzip;q=0.5", "gzip"),
+        ("GZIP; Q=1", "gzip"),
+        ("gzip;q=0", None),
+        ("*;q=0", None),
+        ("identity", None),
+        ("gzip;q=oops", None),
+        (None, None),
+    ],
+)
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header, ("br", "zstd", "gzip")) == expected
+
+
+def test_ties_go_to_the_preferred_coding():
+    assert choose_encoding("gzip, br", ("br", "gzip")) == "br"
+
+
+async def page(request):
+    return HTMLResponse(PAGE, headers={"ETag": '"page-v1"'})
+
+
+async def small(request):
+    return HTMLResponse(b"<p>short</p>")
+
+
+async def stream(request):
+    async def body():
+        for chunk in CHUNKS:
+            yield chunk
+
+    length = str(sum(map(len, CHUNKS)))
+    return StreamingResponse(body(), media_type="text/html", headers={"Content-Length": length})
+
+
+APP = CompressionMiddleware(
+    Starlette(routes=[
+        Route("/page", page),
+        Route("/small", small),
+        Route("/stream", stream),
+        Route("/admin/page", page),
+    ]),
+    minimum_size=500,
+)
+
+
+def call(path: str, accept_encoding: str = "gzip") -> tuple[dict, list[bytes]]:
+    """Send one GET through the middleware; returns (headers, body chunks) as sent."""
+    messages = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # Streaming responses listen for a disconnect; the client stays
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"accept-encoding", accept_encoding.encode())],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    asyncio.run(APP(scope, receive, send))
+    start, *bodies = messages
+    headers = {name.decode().lower(): value.decode() for name, value in start["headers"]}
+    return headers, [message.get("body", b"") for message in bodies]
+
+
+def test_page_is_compressed_and_its_etag_weakened():
+    headers, chunks = call("/page")
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"page-v1"'
+    assert int(headers["content-length"]) == len(chunks[0])
+    assert gzip.decompress(b"".join(chunks)) == PAGE
+
+
+def test_identity_when_nothing_acceptable():
+    headers, chunks = call("/page", "gzip;q=0")
+
+    assert "content-encoding" not in headers
+    assert headers["etag"] == '"page-v1"'
+    assert b"".join(chunks) == PAGE
+
+
+def test_small_bodies_pass_through():
+    headers, chunks = call("/small")
+
+    assert "content-encoding" not in headers
+    assert b"".join(chunks) == b"<p>short</p>"
+
+
+def test_admin_is_never_compressed():
+    headers, chunks = call("/admin/page")
+
+    assert "content-encoding" not in headers
+    assert "vary" not in headers
+    assert b"".join(chunks) == PAGE
+
+
+def test_streamed_body_is_encoded_chunk_by_chunk():
+    headers, chunks = call("/stream")
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)) == b"".join(CHUNKS)
+
+
+@pytest.fixture
+def static(tmp_path):
+    source = tmp_path / "site.css"
+    source.write_bytes(b"body { color: black; }\n" * 50)
+    sibling = tmp_path / "site.css.gz"
+    sibling.write_bytes(gzip.compress(source.read_bytes()))
+    app = Starlette(routes=[Mount("/static", PrecompressedStaticFiles(directory=tmp_path))])
+    with TestClient(app) as client:
+        yield source, sibling, client
+
+
+def test_fresh_sibling_is_served(static):
+    source, sibling, client = static
+    response = client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/css")
+    assert int(response.headers["content-length"]) == sibling.stat().st_size
+    assert response.content == source.read_bytes()
+
+
+def test_stale_sibling_is_ignored(static):
+    source, sibling, client = static
+    source.write_bytes(b"body { color: navy; }\n" * 50)
+    mtime = source.stat().st_mtime
+    os.utime(sibling, (mtime - 10, mtime - 10))
+
+    response = client.get("/static/site.css", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.content == source.read_bytes()
@@ -0,0 +1,66 @@
+"""Cross-worker cache invalidation through the shared content version."""
+
+from app.services import posts as posts_service
+from app.services.artifacts import ArtifactCache, build_artifact
+from app.services.content_version import ContentVersionTracker, content_version
+from app.services.page_cache import PageCache, page_cache
+
+
+def worker_caches():
+    """A page and artifact cache wired up the way one worker's are."""
+    tracker = ContentVersionTracker(path=content_version.path, interval=0)
+    return tracker, PageCache(version=tracker.current), ArtifactCache(version=tracker.current)
+
+
+def test_write_in_one_worker_clears_the_others():
+    writer, writer_pages, _ = worker_caches()
+    _, pages, artifacts = worker_caches()
+
+    pages.set("page", b"old", pages.generation)
+    artifacts.get_or_build("feed", lambda: build_artifact(b"old", "text/plain"))
+    assert pages.get("page") == b"old"
+    assert artifacts.lookup("feed") is not None
+
+    writer.bump()
+    writer_pages.clear()
+
+    assert pages.get("page") is None
+    assert artifacts.lookup("feed") is None
+
+
+def test_local_clear_does_not_reset_twice():
+    tracker, pages, _ = worker_caches()
+    pages.get("warm")  # Adopt the current version
+    tracker.bump()
+    pages.clear()
+    pages.set("page", b"new", pages.generation)
+
+    assert pages.get("page") == b"new"
+    assert pages.invalidations == 1
+
+
+def test_reads_are_throttled():
+    now = [0.0]
+    tracker = ContentVersionTracker(path=content_version.path, interval=1.0, clock=lambda: now[0])
+    other = ContentVersionTracker(path=content_version.path, interval=0)
+
+    seen = tracker.current()
+    other.bump()
+    assert tracker.current() == seen
+    now[0] = 1.0
+    assert tracker.current() == seen + 1
+    assert tracker.reads == 2
+
+
+def test_scheduler_in_another_worker_invalidates(db, monkeypatch):
+    """promote_due_posts only reports changes in the worker that made them."""
+    monkeypatch.setattr(content_version, "interval", 0)
+    body = b"<html>cached</html>"
+    page_cache.get("blog_index")  # Adopt writes made by earlier tests
+    page_cache.set("blog_index", body, page_cache.generation)
+    assert page_cache.get("blog_index") == body
+
+    ContentVersionTracker(path=content_version.path, interval=0).bump()
+
+    assert page_cache.get("blog_index") is None
+    assert posts_service.promote_due_posts(db) == 0
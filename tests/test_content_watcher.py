@@ -0,0 +1,126 @@
+"""Debounced syncing of the content directory while the app runs."""
+
+import asyncio
+import os
+
+import pytest
+
+from app.db.database import SessionLocal
+from app.services import content_watcher
+from app.services import posts as posts_service
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Fast polling and a short quiet period; records each synced batch."""
+    monkeypatch.setattr(content_watcher, "CONTENT_WATCH_INTERVAL", 0.01)
+    monkeypatch.setattr(content_watcher, "CONTENT_WATCH_DEBOUNCE", 0.2)
+    synced = []
+    sync_changes = content_watcher.sync_changes
+
+    def record(modified, deleted):
+        report = sync_changes(modified, deleted)
+        synced.append(([path.name for path in modified], [path.name for path in deleted]))
+        return report
+
+    monkeypatch.setattr(content_watcher, "sync_changes", record)
+    return synced
+
+
+def write_post(directory, name: str, slug: str, body: str = "Body text.") -> None:
+    (directory / name).write_text(f"---\ntitle: {slug}\nslug: {slug}\nstatus: published\n---\n\n{body}\n")
+
+
+def run_watcher(steps):
+    """Run the watcher while `steps` (an async function) changes the directory."""
+    async def main():
+        watcher = asyncio.create_task(content_watcher.watch_content_dir())
+        await asyncio.sleep(0.05)  # First scan
+        try:
+            await steps()
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+
+    asyncio.run(main())
+
+
+async def wait_for(batches: list, count: int) -> None:
+    for _ in range(300):
+        if len(batches) >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"expected {count} batches, got {batches}")
+
+
+def post_for(slug: str):
+    db = SessionLocal()
+    try:
+        return posts_service.get_post_by_slug(db, slug)
+    finally:
+        db.close()
+
+
+def test_writes_within_the_debounce_window_sync_as_one_batch(content_dir, batches):
+    async def steps():
+        for number in range(3):
+            write_post(content_dir, f"watch-batch-{number}.md", f"watch-batch-{number}")
+            await asyncio.sleep(0.05)
+        await wait_for(batches, 1)
+        await asyncio.sleep(0.3)  # Nothing else arrives
+
+    run_watcher(steps)
+
+    assert batches == [(["watch-batch-0.md", "watch-batch-1.md", "watch-batch-2.md"], [])]
+    assert all(post_for(f"watch-batch-{number}") is not None for number in range(3))
+
+
+def test_rename_updates_the_post_in_place(content_dir, batches):
+    async def steps():
+        write_post(content_dir, "watch-old-name.md", "watch-rename")
+        await wait_for(batches, 1)
+        created = post_for("watch-rename")
+        assert created is not None
+        post_ids.append(created.id)
+        os.rename(content_dir / "watch-old-name.md", content_dir / "watch-new-name.md")
+        await wait_for(batches, 2)
+
+    post_ids = []
+    run_watcher(steps)
+    post = post_for("watch-rename")
+
+    assert batches[1] == (["watch-new-name.md"], ["watch-old-name.md"])
+    assert post is not None and post.id == post_ids[0]
+    assert post.file_path == str(content_dir / "watch-new-name.md")
+
+
+def test_delete_removes_the_post(content_dir, batches):
+    async def steps():
+        write_post(content_dir, "watch-delete.md", "watch-delete")
+        await wait_for(batches, 1)
+        assert post_for("watch-delete") is not None
+        (content_dir / "watch-delete.md").unlink()
+        await wait_for(batches, 2)
+
+    run_watcher(steps)
+
+    assert batches[1] == ([], ["watch-delete.md"])
+    assert post_for("watch-delete") is None
+
+
+def test_files_missing_at_startup_are_left_alone(content_dir, batches):
+    write_post(content_dir, "watch-startup.md", "watch-startup")
+    db = SessionLocal()
+    try:
+        posts_service.sync_all_files(db)
+    finally:
+        db.close()
+    (content_dir / "watch-startup.md").unlink()
+
+    async def steps():
+        await asyncio.sleep(0.4)
+
+    run_watcher(steps)
+
+    assert batches == []
+    assert post_for("watch-startup") is not None
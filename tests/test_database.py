@@ -0,0 +1,56 @@
+"""SQLite PRAGMA profiles on pooled connections."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.db.database import SQLITE_PROFILES
+
+# What SQLite reports back for the symbolic values the profiles use
+PRAGMA_READBACK = {"WAL": "wal", "DELETE": "delete", "NORMAL": 1, "FULL": 2, "MEMORY": 2}
+
+# Checks out several connections at once, so each comes from its own
+# connect(), and reports every profile PRAGMA as seen on each of them
+READ_PRAGMAS = """
+import json
+from sqlalchemy import text
+from app.db.database import DB_PROFILE, SQLITE_PROFILES, engine
+
+connections = [engine.connect() for _ in range(3)]
+print(json.dumps([
+    {name: conn.execute(text(f"PRAGMA {name}")).scalar() for name in [*SQLITE_PROFILES[DB_PROFILE], "foreign_keys"]}
+    for conn in connections
+]))
+"""
+
+
+@pytest.mark.parametrize("profile", sorted(SQLITE_PROFILES))
+def test_profile_applies_to_every_pooled_connection(profile, tmp_path):
+    result = subprocess.run(
+        [sys.executable, "-c", READ_PRAGMAS],
+        env={**os.environ, "ACE_DB_PATH": str(tmp_path / "ace.db"), "ACE_DB_PROFILE": profile},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    expected = {
+        name: PRAGMA_READBACK.get(value, value)
+        for name, value in SQLITE_PROFILES[profile].items()
+    }
+    expected["foreign_keys"] = 1
+
+    assert json.loads(result.stdout) == [expected] * 3
+
+
+def test_unknown_profile_is_rejected_at_import():
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.db.database"],
+        env={**os.environ, "ACE_DB_PROFILE": "fast"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "ACE_DB_PROFILE must be one of" in result.stderr
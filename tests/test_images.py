@@ -0,0 +1,50 @@
+"""Responsive image variants and their markup."""
+
+import json
+
+import pytest
+
+from app import build, images
+from app.images import variant_path
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def test_variant_paths_keep_directory_and_suffix():
+    paths = {
+        variant_path(static_path, 320, "webp")
+        for static_path in ("images/a/hero.jpg", "images/b/hero.jpg", "images/b/hero.png", "images/hero.jpg")
+    }
+
+    assert len(paths) == 4
+    assert variant_path("images/a/hero.jpg", 320, "webp") == "images/variants/a/hero.jpg-320.webp"
+
+
+def test_build_covers_subdirectories(tmp_path, monkeypatch):
+    static = tmp_path / "static"
+    variants = static / "images" / "variants"
+    for name, color in (("a/hero.jpg", "red"), ("b/hero.png", "blue")):
+        path = static / "images" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (400, 200), color).save(path)
+    monkeypatch.setattr(build, "STATIC_DIR", static)
+    monkeypatch.setattr(build, "VARIANTS_DIR", variants)
+    monkeypatch.setattr(build, "IMAGE_MANIFEST", variants / "manifest.json")
+    monkeypatch.setattr(build, "VARIANT_FORMATS", ("webp",))
+
+    build.build_image_variants()
+    manifest = json.loads((variants / "manifest.json").read_text())
+
+    assert sorted(manifest) == ["images/a/hero.jpg", "images/b/hero.png"]
+    for static_path, entry in manifest.items():
+        for width in entry["formats"]["webp"]:
+            assert (static / variant_path(static_path, width, "webp")).is_file()
+
+    # Each original's variants come from that original
+    with Image.open(static / variant_path("images/b/hero.png", 400, "webp")) as variant:
+        assert variant.convert("RGB").getpixel((0, 0))[2] > 200
+
+    monkeypatch.setattr(images, "image_manifest", manifest)
+    markup = images.picture("/static/images/b/hero.png", "Hero")
+    assert "/static/images/variants/b/hero.png-320." in markup
+    assert "variants/a/" not in markup
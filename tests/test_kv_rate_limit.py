@@ -0,0 +1,193 @@
+"""KV rate limiting against a local stand-in for the KV API."""
+
+import asyncio
+
+import pytest
+
+from app.security import kv_rate_limit
+from app.security.circuit_breaker import CircuitBreaker
+from app.security.kv_rate_limit import KVRateLimiter, close_kv_client
+from kv_standin import KVStandIn
+
+CLIENT = "198.51.100.20"
+WINDOW = 1000
+
+
+@pytest.fixture
+def kv(monkeypatch):
+    """A running stand-in, with the KV module pointed at it and reset."""
+    standin = KVStandIn()
+    monkeypatch.setattr(kv_rate_limit, "CF_API_BASE", standin.start())
+    monkeypatch.setattr(kv_rate_limit, "CF_API_TOKEN", "test-token")
+    monkeypatch.setattr(kv_rate_limit, "_kv_client", None)
+    monkeypatch.setattr(kv_rate_limit, "_limiters", [])
+    monkeypatch.setattr(kv_rate_limit, "kv_breaker", CircuitBreaker())
+    # Pin the window so a test can't straddle a minute boundary
+    monkeypatch.setattr(KVRateLimiter, "_current_window", lambda self: WINDOW)
+    yield standin
+    standin.stop()
+
+
+def run(coroutine):
+    """Run a test body, then close the shared client on the same loop."""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await close_kv_client()
+
+    return asyncio.run(main())
+
+
+def window_key(limiter: KVRateLimiter) -> str:
+    return limiter._get_window_key(CLIENT, WINDOW)
+
+
+async def allowed(limiter: KVRateLimiter, requests: int) -> int:
+    """How many of `requests` concurrent checks get through."""
+    limited = await asyncio.gather(*(limiter.is_rate_limited(CLIENT) for _ in range(requests)))
+    return limited.count(False)
+
+
+def test_concurrent_requests_get_exactly_the_limit(kv):
+    async def body():
+        limiter = KVRateLimiter(requests_per_minute=10, prefix="form", site_name="test")
+        count = await allowed(limiter, 50)
+        await limiter.flush()
+        return limiter, count
+
+    limiter, count = run(body())
+    assert count == 10
+    assert kv.store[window_key(limiter)] == 10
+    assert limiter.stats()["flushed_increments"] == 10
+
+
+def test_flush_merges_counts_from_other_instances(kv):
+    async def body():
+        first = KVRateLimiter(requests_per_minute=5, prefix="form", site_name="test")
+        second = KVRateLimiter(requests_per_minute=5, prefix="form", site_name="test")
+
+        assert await allowed(first, 3) == 3
+        await first.flush()
+        assert await allowed(second, 1) == 1
+        await second.flush()
+        # second now knows about first's three requests
+        return first, await allowed(second, 5)
+
+    first, count = run(body())
+    assert count == 1
+    assert kv.store[window_key(first)] == 5
+
+
+def test_failed_flush_is_retried(kv):
+    async def body():
+        limiter = KVRateLimiter(requests_per_minute=10, prefix="form", site_name="test")
+        await allowed(limiter, 4)
+
+        kv.fault = 500
+        await limiter.flush()
+        assert limiter.stats()["flush_errors"] == 1
+        assert limiter.stats()["pending_keys"] == 1
+        assert window_key(limiter) not in kv.store
+
+        kv.fault = None
+        await limiter.flush()
+        return limiter
+
+    limiter = run(body())
+    assert kv.store[window_key(limiter)] == 4
+    assert limiter.stats()["pending_keys"] == 0
+    assert limiter.stats()["flushed_increments"] == 4
+
+
+def test_calls_share_pooled_connections(kv):
+    async def body():
+        limiter = KVRateLimiter(requests_per_minute=100, prefix="form", site_name="test")
+        for _ in range(5):
+            await allowed(limiter, 2)
+            await limiter.flush()
+
+    run(body())
+    assert kv.puts == 5
+    assert kv.connections == 1
+
+
+@pytest.mark.parametrize("status", [500, 429, 401, 403])
+def test_failing_kv_opens_the_breaker(kv, status):
+    async def body():
+        limiter = KVRateLimiter(requests_per_minute=100, prefix="form", site_name="test")
+        await allowed(limiter, 1)
+        kv.fault = status
+        for _ in range(8):
+            await limiter.flush()
+        return limiter
+
+    limiter = run(body())
+    assert kv_rate_limit.kv_breaker.state == "open"
+    # Five failed calls opened it; the other flushes never left the process
+    assert kv.requests == 5
+    assert limiter.stats()["pending_keys"] == 1
+
+
+def test_outage_costs_a_bounded_number_of_timeouts(kv, monkeypatch):
+    monkeypatch.setattr(kv_rate_limit, "KV_TIMEOUT", 0.2)
+    kv.fault = "hang"
+    kv.hang_seconds = 1.0
+
+    async def body():
+        limiter = KVRateLimiter(requests_per_minute=100, prefix="form", site_name="test")
+        await allowed(limiter, 1)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for _ in range(20):
+            await limiter.flush()
+        return loop.time() - started
+
+    elapsed = run(body())
+    assert kv.requests == 5
+    assert elapsed < 5 * 0.2 + 0.5
+
+
+def test_reset_connections_count_as_failures(kv):
+    kv.fault = "reset"
+
+    async def body():
+        limiter = KVRateLimiter(requests_per_minute=100, prefix="form", site_name="test")
+        await allowed(limiter, 1)
+        for _ in range(5):
+            await limiter.flush()
+
+    run(body())
+    assert kv_rate_limit.kv_breaker.state == "open"
+
+
+def test_half_open_breaker_sends_one_probe(kv, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        kv_rate_limit, "kv_breaker", CircuitBreaker(clock=lambda: now[0], rand=lambda: 0.5)
+    )
+    clients = [f"198.51.100.{number}" for number in range(3)]
+
+    async def body():
+        limiter = KVRateLimiter(requests_per_minute=100, prefix="form", site_name="test")
+        for client in clients:
+            await limiter.is_rate_limited(client)
+
+        kv.fault = 500
+        for _ in range(5):
+            await limiter.flush()
+        assert kv_rate_limit.kv_breaker.state == "open"
+
+        kv.fault = None
+        now[0] = 10.0
+        before = kv.requests
+        await limiter.flush()  # Three clients, but only one probe goes out
+        assert kv.requests - before == 2  # The probe's GET, then its PUT once closed
+        assert kv_rate_limit.kv_breaker.state == "closed"
+
+        await limiter.flush()
+        return limiter
+
+    limiter = run(body())
+    assert all(kv.store[limiter._get_window_key(client, WINDOW)] == 1 for client in clients)
+    assert limiter.stats()["pending_keys"] == 0
@@ -0,0 +1,75 @@
+"""HEAD handling and security headers on the middleware stack."""
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.main import app
+from app.security.headers import SecurityHeadersMiddleware
+
+SECURITY_HEADERS = (
+    "x-content-type-options",
+    "x-frame-options",
+    "referrer-policy",
+    "strict-transport-security",
+    "cross-origin-opener-policy",
+    "content-security-policy",
+    "permissions-policy",
+)
+
+
+@pytest.fixture
+def client():
+    with TestClient(app, base_url="https://testserver") as client:
+        yield client
+
+
+@pytest.mark.parametrize("path", ["/", "/robots.txt", "/blog/feed.xml"])
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_head_matches_get_without_a_body(client, path, encoding):
+    headers = {"Accept-Encoding": encoding}
+    get = client.get(path, headers=headers)
+    head = client.head(path, headers=headers)
+
+    assert head.status_code == get.status_code == 200
+    assert head.content == b""
+    assert head.headers["content-length"] == get.headers["content-length"]
+    assert head.headers.get("content-encoding") == get.headers.get("content-encoding")
+
+
+def test_security_headers_appear_once(client):
+    response = client.get("/")
+
+    for name in SECURITY_HEADERS:
+        assert len(response.headers.get_list(name)) == 1, name
+
+
+async def own_headers(request):
+    # A route that sets some of the same headers itself
+    headers = {"X-Frame-Options": "SAMEORIGIN", "Content-Security-Policy": "default-src *"}
+    return PlainTextResponse("ok", headers=headers)
+
+
+def test_middleware_replaces_headers_the_app_set():
+    middleware = SecurityHeadersMiddleware(Starlette(routes=[Route("/", own_headers)]))
+    response = TestClient(middleware, base_url="https://testserver").get("/")
+
+    assert response.headers.get_list("x-frame-options") == ["DENY"]
+    assert len(response.headers.get_list("content-security-policy")) == 1
+    assert response.headers["content-security-policy"].startswith("default-src 'self'")
+
+
+def test_setting_csp_overrides_rebuilds_the_headers():
+    middleware = SecurityHeadersMiddleware(Starlette(routes=[Route("/", own_headers)]))
+    client = TestClient(middleware, base_url="https://testserver")
+    assert "img-src 'self' data: https:" in client.get("/").headers["content-security-policy"]
+
+    middleware.csp_overrides = {"img-src": "'self'"}
+    csp = client.get("/").headers["content-security-policy"]
+
+    assert "img-src 'self';" in csp
+    assert "data:" not in csp
+    with pytest.raises(TypeError):
+        middleware.csp_overrides["img-src"] = "*"
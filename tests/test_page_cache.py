@@ -0,0 +1,46 @@
+"""Keys of the rendered blog page cache."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import posts as posts_service
+from app.services.page_cache import page_cache
+
+
+@pytest.fixture
+def client(db):
+    if posts_service.get_post_by_slug(db, "cache-keys") is None:
+        post = posts_service.create_post(db, title="Cache Keys", slug="cache-keys", content_md="Body text.")
+        posts_service.publish_post(db, post)
+    with TestClient(app, base_url="https://testserver") as client:
+        page_cache.clear()
+        yield client
+
+
+def test_host_header_is_not_part_of_the_key(client):
+    first = client.get("/blog/cache-keys", headers={"Host": "evil.example"})
+    hits = page_cache.hits
+    second = client.get("/blog/cache-keys")
+
+    assert page_cache.hits == hits + 1
+    assert second.text == first.text
+    assert "evil.example" not in second.text
+
+
+def test_unknown_parameters_share_the_listing_entry(client):
+    client.get("/blog?page=1")
+    hits = page_cache.hits
+    client.get("/blog?utm_source=feed&page=1")
+    client.get("/blog")
+
+    assert page_cache.stats()["entries"] == 1
+    assert page_cache.hits == hits + 2
+
+
+def test_searches_and_pages_past_the_end_are_not_stored(client):
+    for query in ("vote", "vote ", "x" * 500):
+        assert client.get("/blog", params={"q": query}).status_code == 200
+    assert client.get("/blog?page=9999").status_code == 200
+
+    assert page_cache.stats()["entries"] == 0
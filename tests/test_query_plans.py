@@ -0,0 +1,107 @@
+"""
+Query plans of the public post queries.
+
+Each test runs the real service function, captures the SQL it sends and
+checks SQLite's EXPLAIN QUERY PLAN for it, so a new index or a reworded
+filter can't silently turn a range scan into a table scan (or, for
+search, make posts the outer loop and run MATCH once per post).
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.db.database import engine
+from app.services import posts as posts_service
+
+LIVE_INDEX = "USING COVERING INDEX idx_posts_live_published"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def live_posts():
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for number in range(30):
+            post = posts_service.create_post(
+                db,
+                title=f"Plan post {number}",
+                slug=f"plan-post-{number}",
+                content_md=f"The constitution, amendment {number}.",
+                sync_to_file=False,
+            )
+            posts_service.update_post(db, post, status="published", sync_to_file=False)
+    finally:
+        db.close()
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plans(db, call) -> list[list[str]]:
+    """Run `call` and return the plan (detail lines) of every statement it sent."""
+    with captured_statements() as statements:
+        result = call()
+        if hasattr(result, "__next__"):
+            list(result)
+    assert statements
+    connection = db.connection()
+    return [
+        [row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+        for sql, params in statements
+    ]
+
+
+def assert_live_range_scan(plan: list[str]) -> None:
+    """posts is read through the covering index, plus primary-key lookups at most."""
+    post_steps = [step for step in plan if " posts " in f"{step} "]
+    assert any(LIVE_INDEX in step for step in post_steps), plan
+    for step in post_steps:
+        assert LIVE_INDEX in step or "USING INTEGER PRIMARY KEY" in step, plan
+
+
+@pytest.mark.parametrize("name, call", [
+    ("listing", lambda db: posts_service.list_published_summaries(db, limit=12)),
+    ("listing offset", lambda db: posts_service.list_published_summaries(db, limit=12, offset=12)),
+    ("keyset", lambda db: posts_service.list_published_summaries(
+        db, limit=12, after=posts_service.list_published_summaries(db, limit=1)[0].cursor
+    )),
+    ("paginated", lambda db: posts_service.get_published_summaries(db, limit=12, offset=12)),
+    ("related", lambda db: posts_service.get_related_posts(
+        db, posts_service.get_post_by_slug(db, "plan-post-0").id
+    )),
+    ("sitemap", lambda db: posts_service.iter_published_rows(
+        db, posts_service.SITEMAP_COLUMNS, batch_size=10, limit=25
+    )),
+    ("state", lambda db: posts_service.get_published_state(db)),
+])
+def test_public_queries_use_live_index(db, name, call):
+    for plan in query_plans(db, lambda: call(db)):
+        if not any(" posts " in f"{step} " for step in plan):
+            continue  # e.g. get_post_by_slug looking up the current post
+        if any("idx_posts_slug" in step or "ix_posts_slug" in step for step in plan):
+            continue
+        assert_live_range_scan(plan)
+
+
+def test_search_drives_from_fts(db):
+    plans = query_plans(db, lambda: posts_service.search_published_posts(db, "constitution"))
+    assert len(plans) == 2  # Total, then the page
+    for plan in plans:
+        table_steps = [step for step in plan if step.startswith(("SCAN", "SEARCH"))]
+        assert table_steps[0].startswith("SCAN posts_fts VIRTUAL TABLE"), plan
+        assert "SEARCH posts USING INTEGER PRIMARY KEY" in table_steps[1], plan
+        assert not any(LIVE_INDEX in step for step in plan), plan
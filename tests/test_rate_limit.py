@@ -0,0 +1,96 @@
+"""In-process rate limiter configuration."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.security.rate_limit import InMemoryRateLimiter
+
+
+def test_max_keys_env_is_validated_at_import():
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.security.rate_limit"],
+        env={**os.environ, "ACE_RATE_LIMIT_MAX_KEYS": "0"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert "ACE_RATE_LIMIT_MAX_KEYS must be at least 1" in result.stderr
+
+
+def test_max_keys_must_be_positive():
+    with pytest.raises(ValueError):
+        InMemoryRateLimiter(max_keys=0)
+
+
+@pytest.mark.parametrize("overflow", ["sketch", "evict"])
+def test_single_key_table_makes_room(overflow):
+    limiter = InMemoryRateLimiter(max_keys=1, overflow=overflow, clock=lambda: 0.0)
+
+    assert limiter.check("first", 1)[0]
+    assert limiter.check("second", 1)[0]
+    assert limiter.stats()["keys"] == 1
+
+
+def sliding_limiter(now: list[float]) -> InMemoryRateLimiter:
+    """A 60 s limiter on a clock the test moves."""
+    return InMemoryRateLimiter(60, clock=lambda: now[0])
+
+
+def allowed_now(limiter: InMemoryRateLimiter, key: str, limit: int) -> int:
+    """How many requests get through before the first rejection."""
+    count = 0
+    while limiter.check(key, limit)[0]:
+        count += 1
+    return count
+
+
+def test_limit_carries_across_window_boundary():
+    now = [50.0]
+    limiter = sliding_limiter(now)
+    assert allowed_now(limiter, "client", 10) == 10
+
+    # 15 s into the next window, 3/4 of the previous bucket still counts:
+    # 10 * 0.75 = 7.5, so 3 more fit, not a fresh 10
+    now[0] = 75.0
+    assert allowed_now(limiter, "client", 10) == 3
+
+
+@pytest.mark.parametrize(
+    "limit, earlier, at",
+    [
+        (3, 2, 83.0),  # Previous bucket decays within this window
+        (3, 1, 85.0),  # This window's bucket is full: wait into the next one
+        (10, 10, 75.0),
+    ],
+)
+def test_reset_is_the_first_second_a_request_fits(limit, earlier, at):
+    now = [59.0]
+    limiter = sliding_limiter(now)
+    for _ in range(earlier):
+        limiter.check("client", 1000)
+    now[0] = at
+    allowed_now(limiter, "client", limit)
+    allowed, remaining, reset = limiter.check("client", limit)
+    assert not allowed and remaining == 0
+
+    now[0] = at + reset - 1
+    assert not limiter.check("client", limit)[0]
+    now[0] = at + reset
+    assert limiter.check("client", limit)[0]
+
+
+def test_keys_are_limited_independently():
+    now = [10.0]
+    limiter = sliding_limiter(now)
+    assert allowed_now(limiter, "first", 5) == 5
+    assert not limiter.check("first", 5)[0]
+
+    assert allowed_now(limiter, "second", 5) == 5
+    now[0] = 70.0
+    assert allowed_now(limiter, "third", 5) == 5
+    # 10 s into the next window: 5 * 50/60 still counts for each full key
+    assert allowed_now(limiter, "first", 5) == 1
+    assert allowed_now(limiter, "second", 5) == 1
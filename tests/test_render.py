@@ -0,0 +1,66 @@
+"""Batch rendering through the shared process pool."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.services import posts as posts_service
+
+
+@pytest.fixture
+def render_pool(monkeypatch):
+    monkeypatch.setattr(posts_service, "RENDER_WORKERS", 2)
+    yield
+    posts_service.shutdown_render_pool()
+
+
+def test_pool_renders_the_same_as_in_process(render_pool):
+    contents = [f"## Question {number}?\n\nAnswer number {number}." for number in range(16)]
+
+    rendered = posts_service.render_many(contents)
+    pool = posts_service.get_render_pool()
+
+    assert rendered == [posts_service.render_post_content(content_md) for content_md in contents]
+    assert pool.submit(os.getpid).result() != os.getpid()
+    # A second batch goes to the same pool rather than a new one
+    assert posts_service.render_many(contents) == rendered
+    assert posts_service.get_render_pool() is pool
+
+
+def test_small_batches_and_single_worker_render_in_process(monkeypatch):
+    monkeypatch.setattr(posts_service, "RENDER_WORKERS", 1)
+    contents = ["Body text."] * 20
+
+    assert posts_service.get_render_pool() is None
+    assert posts_service.render_many(contents)[0]["content_html"] == "<p>Body text.</p>"
+
+
+def test_render_workers_default_is_capped():
+    # 32 CPUs in the affinity mask, no ACE_RENDER_WORKERS
+    script = (
+        "import os; os.sched_getaffinity = lambda pid: set(range(32)); "
+        "from app.services import posts; print(posts.RENDER_WORKERS, posts.available_cpus())"
+    )
+    env = {key: value for key, value in os.environ.items() if key != "ACE_RENDER_WORKERS"}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    workers, cpus = map(int, result.stdout.split()[-2:])
+
+    assert workers == min(cpus, 4)
+    assert workers <= 4
+
+
+def test_available_cpus_honours_the_cgroup_quota(monkeypatch):
+    read_text = Path.read_text
+
+    def fake_read_text(path, *args, **kwargs):
+        if str(path) == "/sys/fs/cgroup/cpu.max":
+            return "150000 100000\n"  # 1.5 CPUs
+        return read_text(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(32)))
+    monkeypatch.setattr(Path, "read_text", fake_read_text)
+
+    assert posts_service.available_cpus() == 2
@@ -0,0 +1,55 @@
+"""The persistent render cache behind render_contents()."""
+
+from sqlalchemy import select
+
+from app.db.models import RenderCache
+from app.services import posts as posts_service
+
+
+def counting_render_many(monkeypatch) -> list[int]:
+    """Count the documents render_contents() actually renders."""
+    rendered = []
+    render_many = posts_service.render_many
+
+    def count(contents):
+        rendered.append(len(contents))
+        return render_many(contents)
+
+    monkeypatch.setattr(posts_service, "render_many", count)
+    return rendered
+
+
+def cached_versions(db, content_md: str) -> list[int]:
+    checksum = posts_service.compute_checksum(content_md)
+    return sorted(db.scalars(select(RenderCache.renderer_version).where(RenderCache.checksum == checksum)))
+
+
+def test_same_checksum_is_rendered_once(db, monkeypatch):
+    rendered = counting_render_many(monkeypatch)
+    content = "## Render cache hit\n\nWhat is the supreme law of the land?\n"
+
+    first = posts_service.render_contents(db, [content])
+    db.commit()
+    second = posts_service.render_contents(db, [content, content])
+
+    assert sum(rendered) == 1
+    assert second == [first[0], first[0]]
+    assert cached_versions(db, content) == [posts_service.RENDERER_VERSION]
+
+
+def test_renderer_version_bump_rerenders_and_prunes_old_rows(db, monkeypatch):
+    content = "## Renderer upgrade\n\nName one branch of the government.\n"
+    post = posts_service.create_post(db, title="Renderer Upgrade", slug="renderer-upgrade", content_md=content)
+    assert cached_versions(db, content) == [posts_service.RENDERER_VERSION]
+
+    rendered = counting_render_many(monkeypatch)
+    new_version = posts_service.RENDERER_VERSION + 1
+    monkeypatch.setattr(posts_service, "RENDERER_VERSION", new_version)
+    posts_service.render_contents(db, [post.content_md])
+    db.commit()
+
+    assert sum(rendered) == 1
+    assert cached_versions(db, content) == [new_version - 1, new_version]
+
+    assert posts_service.prune_render_cache(db) >= 1
+    assert cached_versions(db, content) == [new_version]
@@ -0,0 +1,56 @@
+"""Validators and paging of the prebuilt sitemap."""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import posts as posts_service
+
+
+@pytest.fixture
+def client():
+    with TestClient(app, base_url="https://testserver") as client:
+        yield client
+
+
+def publish(db, slug):
+    post = posts_service.create_post(db, title=slug.title(), slug=slug, content_md="Body text.")
+    return posts_service.publish_post(db, post)
+
+
+def test_unpublish_moves_last_modified(client, db):
+    publish(db, "seo-first")
+    post = publish(db, "seo-second")
+
+    response = client.get("/sitemap.xml")
+    assert "/blog/seo-second<" in response.text
+    last_modified = response.headers["last-modified"]
+
+    time.sleep(1)  # Last-Modified has one-second resolution
+    posts_service.unpublish_post(db, post)
+
+    response = client.get("/sitemap.xml", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert "/blog/seo-second<" not in response.text
+    assert response.headers["last-modified"] != last_modified
+
+    for path in ("/blog/feed.xml", "/llms-full.txt"):
+        assert client.get(path, headers={"If-Modified-Since": last_modified}).status_code == 200
+
+
+def test_unchanged_sitemap_revalidates(client):
+    response = client.get("/sitemap.xml")
+    assert client.get(
+        "/sitemap.xml", headers={"If-Modified-Since": response.headers["last-modified"]}
+    ).status_code == 304
+    assert client.get(
+        "/sitemap.xml", headers={"If-None-Match": response.headers["etag"]}
+    ).status_code == 304
+
+
+def test_child_sitemaps_need_an_index(client):
+    assert client.get("/sitemap.xml").status_code == 200
+    assert client.get("/sitemap-1.xml").status_code == 404
+    assert client.get("/sitemap-2.xml").status_code == 404
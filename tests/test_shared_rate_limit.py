@@ -0,0 +1,59 @@
+"""Rate limit counters shared across worker processes."""
+
+import multiprocessing
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.security.rate_limit import RateLimitMiddleware
+from app.security.shared_rate_limit import SQLiteRateLimiter
+
+LIMIT = 50
+PROCESSES = 4
+CHECKS_PER_PROCESS = 40
+
+
+def hammer(path: str) -> int:
+    """One worker process spending checks on the shared key."""
+    # A fixed clock keeps every process in the same window
+    limiter = SQLiteRateLimiter(path, clock=lambda: 1_000_020.0)
+    return sum(limiter.check("203.0.113.7:human", LIMIT)[0] for _ in range(CHECKS_PER_PROCESS))
+
+
+def test_processes_share_one_quota(tmp_path):
+    path = str(tmp_path / "rate_limit.db")
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(PROCESSES) as pool:
+        allowed = pool.map(hammer, [path] * PROCESSES)
+
+    assert sum(allowed) == LIMIT
+    assert SQLiteRateLimiter(path).stats()["fallbacks"] == 0
+
+
+@pytest.fixture
+def sqlite_middleware():
+    """An app behind a RateLimitMiddleware on the (test) shared SQLite file."""
+    app = Starlette(routes=[Route("/", lambda request: PlainTextResponse("ok"))])
+    return RateLimitMiddleware(app, backend="sqlite")
+
+
+def test_middleware_checks_off_the_event_loop(sqlite_middleware):
+    limiter = sqlite_middleware.limiter
+    threads = []
+    check = limiter.check
+
+    def recording_check(key, limit):
+        threads.append(threading.current_thread().name)
+        return check(key, limit)
+
+    limiter.check = recording_check
+    with TestClient(sqlite_middleware) as client:
+        response = client.get("/", headers={"User-Agent": "Mozilla/5.0 Firefox/130.0"})
+
+    assert response.status_code == 200
+    assert "X-RateLimit-Remaining" in response.headers
+    assert threads and all(name.startswith("ace-rate-limit") for name in threads)
@@ -0,0 +1,66 @@
+"""Count-min sketch overflow and eviction in the in-memory rate limiter."""
+
+import random
+
+from app.security.rate_limit import InMemoryRateLimiter
+from app.security.sketch import WindowedCountMinSketch
+
+
+def test_sketch_never_under_counts():
+    # A narrow sketch, so many keys collide
+    sketch = WindowedCountMinSketch(width=16, depth=2)
+    rng = random.Random(0)
+    true_counts = {f"10.0.0.{n}": rng.randint(0, 20) for n in range(200)}
+    for key, count in true_counts.items():
+        for _ in range(count):
+            sketch.add(sketch.slots(key), 7)
+
+    for key, count in true_counts.items():
+        current, previous = sketch.counts(sketch.slots(key), 7)
+        assert current >= count
+        assert previous == 0
+
+
+def test_overflow_keys_are_never_let_through_late():
+    limiter = InMemoryRateLimiter(max_keys=2, overflow="sketch", clock=lambda: 10.0)
+    limiter.check("tracked-1", 5)
+    limiter.check("tracked-2", 5)
+
+    for n in range(300):
+        key = f"198.51.100.{n}"
+        allowed = sum(limiter.check(key, 5)[0] for _ in range(8))
+        assert allowed <= 5
+
+    stats = limiter.stats()
+    assert stats["keys"] == 2
+    assert stats["overflow_checks"] == 300 * 8
+
+
+def test_evict_drops_the_least_recently_used_key():
+    limiter = InMemoryRateLimiter(max_keys=2, overflow="evict", clock=lambda: 10.0)
+    for _ in range(3):
+        limiter.check("old", 3)
+    for _ in range(3):
+        limiter.check("recent", 3)
+    assert not limiter.check("old", 3)[0]  # Touch "old": "recent" is now least recent
+
+    assert limiter.check("new", 3)[0]
+    assert limiter.stats()["evictions"] == 1
+    assert not limiter.check("old", 3)[0]
+    # The evicted key starts over from zero
+    assert limiter.check("recent", 3)[0]
+
+
+def test_rotate_keeps_one_previous_window():
+    sketch = WindowedCountMinSketch(width=16, depth=2)
+    slots = sketch.slots("client")
+    for _ in range(4):
+        sketch.add(slots, 5)
+
+    assert sketch.counts(slots, 5) == (4, 0)
+    assert sketch.counts(slots, 6) == (0, 4)
+    assert not sketch.is_empty(6)
+
+    # Window 7 passed with no calls: both buckets are over by window 8
+    assert sketch.counts(slots, 8) == (0, 0)
+    assert sketch.is_empty(8)